@@ -0,0 +1,34 @@
+import hashlib
+
+# 批次状态
+BATCH_RUNNING = 'running'  # 发送中（程序异常退出后仍为此状态）
+BATCH_STOPPED = 'stopped'  # 用户停止
+BATCH_COMPLETED = 'completed'  # 全部处理完毕
+BATCH_ABANDONED = 'abandoned'  # 用户放弃继续发送
+
+# 行状态，以 (batch_id, 行号) 作为行标识
+ROW_SENDING = 'sending'  # 已交给SMTP服务器，尚未得到结果
+ROW_RETRY = 'retry'  # 临时性失败，等待重试（见 retry_queue）
+ROW_SENT = 'sent'
+ROW_FAILED = 'failed'
+ROW_UNKNOWN = 'unknown'  # 发送中途程序退出，无法确定是否已送达
+
+# 继续发送时需要跳过的行：已有结果，或可能已经送达（宁可漏发也不重复发送）
+DONE_STATES = (ROW_SENT, ROW_FAILED, ROW_UNKNOWN, ROW_SENDING)
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """计算文件的 SHA-256，用于确认继续发送时源文件没有被修改
+
+    Args:
+        path: 文件路径
+        chunk_size: 每次读取的字节数
+
+    Returns:
+        str: 十六进制摘要
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -7,6 +7,20 @@ from pathlib import Path
 from message_box import MessageBox
 
 class Config:
+    # 批量发送参数默认值
+    DEFAULT_SEND_SETTINGS = {
+        'workers': 1,  # 并发连接数，每个连接独立登录
+        'transport': 'smtplib',  # 发送引擎：smtplib（每个连接一个线程）或 asyncio（单线程事件循环）
+        'rotation_enabled': False,  # 是否在多个发件人之间轮换发送
+        'rotation_senders': [],  # 参与轮换的发件人邮箱
+        'rotation_strategy': 'round_robin',  # 分配策略，见 SenderPool.STRATEGIES
+        'sender_weights': {},  # 发件人权重 {邮箱: 权重}
+        'retry_max_attempts': 5,  # 临时性失败（4xx、连接断开）每封邮件最多尝试次数
+        'retry_base_delay': 10,  # 首次重试等待秒数，之后每次翻倍
+        'retry_max_delay': 300,  # 重试最长等待秒数
+        'group_send': True,  # 模板不含变量时，一封邮件同时发给多个收件人（多个 RCPT TO）
+    }
+
     def __init__(self):
         # 获取用户目录
         user_dir = str(Path.home())
@@ -138,6 +152,35 @@ class Config:
             MessageBox.show_error(f"获取最后使用的发件人失败: {str(e)}")
             return ''
 
+    def get_send_settings(self):
+        """获取批量发送参数
+
+        Returns:
+            dict: 发送参数，未设置的项使用默认值
+        """
+        send_settings = dict(self.DEFAULT_SEND_SETTINGS)
+        try:
+            send_settings.update(self.settings.get('send_settings', {}))
+        except Exception as e:
+            MessageBox.show('错误', f"获取发送参数失败: {str(e)}", 'critical')
+        return send_settings
+
+    def save_send_settings(self, **kwargs):
+        """保存批量发送参数
+
+        Args:
+            **kwargs: 要更新的发送参数
+
+        Returns:
+            bool: 是否保存成功
+        """
+        try:
+            self.settings.setdefault('send_settings', {}).update(kwargs)
+            return self.save_settings()
+        except Exception as e:
+            MessageBox.show('错误', f"保存发送参数失败: {str(e)}", 'critical')
+            return False
+
     def get_variables(self):
         """从数据库获取所有变量名"""
         return self.db.get_variables()
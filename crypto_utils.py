@@ -1,4 +1,6 @@
 import warnings
+import threading
+import time
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
@@ -8,19 +10,51 @@ import base64
 warnings.filterwarnings('ignore', message='You are using cryptography on a 32-bit Python')
 
 class CryptoUtils:
+    # 使用固定的盐值（在实际应用中应该安全存储）
+    SALT = b'email_sender_salt'
+    # 密钥派生迭代次数
+    ITERATIONS = 100000
+
+    # 进程内共享的密钥和 Fernet 对象，只派生一次
+    _key = None
+    _fernet = None
+    _lock = threading.Lock()
+    # 密钥派生耗时（秒），用于启动耗时统计
+    key_derive_time = 0.0
+
     def __init__(self):
-        # 使用固定的盐值（在实际应用中应该安全存储）
-        self.salt = b'email_sender_salt' # 盐值 
-        self.key = self._generate_key() # 生成加密密钥
-        self.fernet = Fernet(self.key) # 创建Fernet对象
+        self.salt = self.SALT # 盐值 
+        self.key, self.fernet = self._get_fernet() # 加密密钥和Fernet对象
+
+    @classmethod
+    def _get_fernet(cls):
+        """获取进程内共享的密钥和 Fernet 对象，第一次调用时派生密钥
+
+        每个 Database 实例都会创建 CryptoUtils，密钥派生需要约 100ms，只在进程内执行一次。
+        Fernet 对象可以在多个线程中同时使用。
+
+        Returns:
+            tuple: (密钥, Fernet对象)
+        """
+        if cls._fernet is None:
+            with cls._lock:
+                if cls._fernet is None:
+                    start = time.perf_counter()
+                    key = cls._generate_key()
+                    fernet = Fernet(key)
+                    cls.key_derive_time = time.perf_counter() - start
+                    cls._key = key
+                    cls._fernet = fernet
+        return cls._key, cls._fernet
 
-    def _generate_key(self):
+    @classmethod
+    def _generate_key(cls):
         """生成加密密钥"""
         kdf = PBKDF2HMAC(
             algorithm=hashes.SHA256(),
             length=32,
-            salt=self.salt,
-            iterations=100000,
+            salt=cls.SALT,
+            iterations=cls.ITERATIONS,
         )
         key = base64.urlsafe_b64encode(kdf.derive(b'email_sender_secret_key'))
         return key
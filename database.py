@@ -1,13 +1,235 @@
 import os
 import sqlite3
 import json
+import time
+import atexit
+from datetime import datetime, timezone
 from pathlib import Path
+from queue import Queue, Empty
 from crypto_utils import CryptoUtils
 from logger import Logger
+import schema_migrations
 import threading
 
+class _ConnectionLease:
+    """线程持有的数据库连接，线程结束（线程局部数据被清理）时归还连接池"""
+
+    def __init__(self, database, conn):
+        self.database = database
+        self.conn = conn
+
+    def __del__(self):
+        try:
+            self.database._release(self.conn)
+        except Exception:
+            pass
+
+
+class SendLogWriter:
+    """发送日志的后台写入线程
+
+    发送线程只把日志放入队列，由本线程攒够一批（或等待一小段时间）后在一个事务中
+    写入并提交，发送过程中不再为每封邮件等待一次磁盘同步。
+    批次结束、读取发送日志和程序退出时调用 flush 确保日志已写入。
+    """
+    # 每次提交最多写入的日志数
+    BATCH_SIZE = 500
+    # 日志在队列中最多等待的时间（秒）
+    FLUSH_INTERVAL = 0.3
+    # 队列中最多积压的日志数，超过时写入方等待
+    MAX_PENDING = 20000
+    # flush 最多等待的时间（秒）
+    FLUSH_TIMEOUT = 10
+
+    INSERT_SQL = '''
+        INSERT INTO send_logs (batch_id, sender_email, recipient_email, recipient_name, subject, status, error_message,
+                               server_response, send_time)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    # 批次汇总：没有检查点的批次（如旧版本创建的批次）补充一行
+    BATCH_INSERT_SQL = 'INSERT OR IGNORE INTO batches (batch_id, start_time) VALUES (?, ?)'
+    BATCH_UPDATE_SQL = '''
+        UPDATE batches SET
+            success_count = success_count + ?,
+            failure_count = failure_count + ?,
+            skipped_count = skipped_count + ?,
+            end_time = MAX(COALESCE(end_time, ''), ?)
+        WHERE batch_id = ?
+    '''
+    # 发送成功的状态和跳过的状态前缀
+    SUCCESS_STATUS = '发送成功'
+    SKIPPED_PREFIX = '已跳过'
+
+    def __init__(self, database):
+        self.database = database
+        self.queue = Queue(self.MAX_PENDING)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        # 写入失败而丢弃的日志数
+        self.failed_count = 0
+
+    def _ensure_started(self):
+        """第一次写入时启动写入线程"""
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    thread = threading.Thread(target=self._run, name='SendLogWriter')
+                    thread.daemon = True
+                    thread.start()
+                    # 程序退出前写入队列中剩余的日志
+                    atexit.register(self.flush)
+                    self._thread = thread
+
+    def put(self, row):
+        """加入一条待写入的日志
+
+        Args:
+            row: 与 INSERT_SQL 参数顺序一致的元组
+        """
+        self._ensure_started()
+        self.queue.put(row)
+
+    def flush(self, timeout=None):
+        """等待此前加入的日志全部写入
+
+        Args:
+            timeout: 最多等待的秒数，默认 FLUSH_TIMEOUT
+
+        Returns:
+            bool: 是否已全部写入（超时或有日志写入失败时为 False）
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        failed_count = self.failed_count
+        done = threading.Event()
+        self.queue.put(done)
+        if not done.wait(self.FLUSH_TIMEOUT if timeout is None else timeout):
+            return False
+        return self.failed_count == failed_count
+
+    def _run(self):
+        """写入线程：收集一批日志后一次提交"""
+        while True:
+            item = self.queue.get()
+            rows, waiters = [], []
+            deadline = time.monotonic() + self.FLUSH_INTERVAL
+            # 收到 flush 请求时立即提交，否则攒够一批或到达等待时间后提交
+            while True:
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break
+                rows.append(item)
+                if len(rows) >= self.BATCH_SIZE:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except Empty:
+                    break
+            self._write(rows)
+            for waiter in waiters:
+                waiter.set()
+
+    def _write(self, rows):
+        """在一个事务中写入一批日志
+
+        个别日志违反约束时整组回滚，改为逐条写入，只丢弃有问题的日志。
+        错误在提交后才写入系统日志（系统日志使用同一个连接，不能混入本事务）。
+        """
+        if not rows:
+            return
+        conn = self.database.conn
+        errors = []
+        try:
+            try:
+                conn.executemany(self.INSERT_SQL, rows)
+            except sqlite3.IntegrityError:
+                conn.rollback()
+                written = []
+                for row in rows:
+                    try:
+                        conn.execute(self.INSERT_SQL, row)
+                        written.append(row)
+                    except sqlite3.IntegrityError as e:
+                        errors.append(f"写入发送日志失败（{row[2]}）: {str(e)}")
+                rows = written
+            # 批次汇总与日志在同一个事务中更新
+            summary = self._summarize(rows)
+            conn.executemany(self.BATCH_INSERT_SQL, [(row[0], row[4]) for row in summary])
+            conn.executemany(self.BATCH_UPDATE_SQL, [row[1:4] + row[5:] + row[:1] for row in summary])
+            conn.commit()
+            self.failed_count += len(errors)
+        except Exception as e:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            self.failed_count += len(rows) + len(errors)
+            errors = [f"写入发送日志失败（{len(rows)} 条）: {str(e)}"]
+        for error in errors:
+            Logger().error(error)
+
+    def _summarize(self, rows):
+        """按批次统计一组日志
+
+        Returns:
+            list: [(批次ID, 成功数, 失败数, 跳过数, 最早发送时间, 最晚发送时间)]
+        """
+        summary = {}
+        for row in rows:
+            batch_id, status, send_time = row[0], row[5], row[8]
+            counts = summary.get(batch_id)
+            if counts is None:
+                counts = summary[batch_id] = [0, 0, 0, send_time, send_time]
+            if status == self.SUCCESS_STATUS:
+                counts[0] += 1
+            elif status.startswith(self.SKIPPED_PREFIX):
+                counts[2] += 1
+            else:
+                counts[1] += 1
+            counts[3] = min(counts[3], send_time)
+            counts[4] = max(counts[4], send_time)
+        return [(batch_id,) + tuple(counts) for batch_id, counts in summary.items()]
+
+
 class Database:
+    """进程内共享的数据库服务
+
+    与 Logger 一样为单例，多次创建得到同一个实例，数据库结构只初始化一次。
+    每个线程使用自己的连接（线程第一次访问 conn 时从连接池取得），连接不会跨线程使用；
+    线程结束后连接归还连接池，供之后的线程复用。
+    """
+    # 连接池中最多保留的空闲连接数
+    MAX_IDLE_CONNECTIONS = 4
+    # 每个连接统一设置的参数：WAL 模式提高并发性能，忙等待避免多线程写入时立即报错
+    PRAGMAS = (
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        'PRAGMA busy_timeout=20000',
+        'PRAGMA temp_store=MEMORY',
+    )
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls, config=None):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super(Database, cls).__new__(cls)
+                    instance._initialize()
+                    cls._instance = instance
+        return cls._instance
+
     def __init__(self, config=None):
+        # 共享实例保存第一次传入的配置
+        if config is not None and self.config is None:
+            self.config = config
+
+    def _initialize(self):
+        """初始化共享实例（只执行一次）"""
         # 添加线程锁
         self._lock = threading.Lock()
         
@@ -19,26 +241,95 @@ class Database:
             
         self.db_path = os.path.join(self.app_dir, 'email_sender.db')
         self.crypto = CryptoUtils()
-        self.config = config
+        self.config = None
         
-        # 延迟初始化数据库
-        self._conn = None
+        # 每个线程持有的连接
+        self._local = threading.local()
+        # 连接池：空闲连接和所有已创建的连接
+        self._pool_lock = threading.Lock()
+        self._idle = []
+        self._connections = set()
+        # 数据库结构是否已初始化
+        self._schema_lock = threading.RLock()
+        self._schema_ready = False
+        # 发送日志的后台写入线程
+        self.send_log_writer = SendLogWriter(self)
         
         # 初始化日志
         self.logger = Logger()
         
     @property
     def conn(self):
-        """延迟创建数据库连接，并设置超时和线程安全"""
-        if self._conn is None:
-            self._conn = sqlite3.connect(self.db_path, timeout=20)
-            # 启用WAL模式以提高并发性能
-            self._conn.execute('PRAGMA journal_mode=WAL')
-            self.init_database()
-        return self._conn
+        """当前线程的数据库连接，第一次访问时从连接池取得"""
+        lease = getattr(self._local, 'lease', None)
+        if lease is None:
+            lease = _ConnectionLease(self, self._acquire())
+            self._local.lease = lease
+            if not self._schema_ready:
+                self.init_database()
+        return lease.conn
+
+    def _connect(self):
+        """创建新连接并设置统一的参数"""
+        # 连接由连接池在线程之间转交，同一时刻只有一个线程使用
+        conn = sqlite3.connect(self.db_path, timeout=20, check_same_thread=False)
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _acquire(self):
+        """从连接池取出空闲连接，没有时新建"""
+        with self._pool_lock:
+            if self._idle:
+                return self._idle.pop()
+        conn = self._connect()
+        with self._pool_lock:
+            self._connections.add(conn)
+        return conn
+
+    def _release(self, conn):
+        """连接归还连接池，未提交的修改回滚；空闲连接过多时关闭"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            pass
+        with self._pool_lock:
+            if conn not in self._connections:
+                return
+            if len(self._idle) < self.MAX_IDLE_CONNECTIONS:
+                self._idle.append(conn)
+                return
+            self._connections.discard(conn)
+        conn.close()
+
+    def release_connection(self):
+        """当前线程不再使用数据库时主动归还连接（线程结束时也会自动归还）"""
+        lease = getattr(self._local, 'lease', None)
+        if lease is not None:
+            del self._local.lease
+
+    def close(self):
+        """关闭所有连接"""
+        with self._pool_lock:
+            connections = list(self._connections)
+            self._connections.clear()
+            self._idle.clear()
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
 
     def init_database(self):
-        """初始化数据库"""
+        """初始化数据库结构，每个进程只执行一次"""
+        with self._schema_lock:
+            if not self._schema_ready:
+                self._schema_ready = self._create_schema()
+            return self._schema_ready
+
+    def _create_schema(self):
+        """创建数据表和预设数据"""
         try:
             # 检查数据库文件是否存在
             db_exists = os.path.exists(self.db_path)
@@ -91,7 +382,56 @@ class Database:
                     status TEXT NOT NULL,
                     error_message TEXT,
                     send_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    batch_id TEXT NOT NULL
+                    batch_id TEXT NOT NULL,
+                    server_response TEXT
+                )
+            ''')
+            
+            # 创建重试队列表：保存临时性失败的已渲染邮件，按 next_attempt 重新发送
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS retry_queue (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    batch_id TEXT NOT NULL,
+                    row_number INTEGER NOT NULL,
+                    sender_email TEXT,
+                    recipient_email TEXT NOT NULL,
+                    recipient_name TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    attachments TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 1,
+                    next_attempt REAL NOT NULL,
+                    last_error TEXT,
+                    created_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_retry_queue_batch
+                ON retry_queue (batch_id, next_attempt)
+            ''')
+            
+            # 创建批次检查点表：批次定义（源文件、模板、发件人、附件）和状态
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS batch_checkpoints (
+                    batch_id TEXT PRIMARY KEY,
+                    source_file TEXT,
+                    source_hash TEXT,
+                    total_rows INTEGER NOT NULL,
+                    definition TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    created_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # 创建批次行状态表：只记录已开始发送的行
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS batch_rows (
+                    batch_id TEXT NOT NULL,
+                    row_number INTEGER NOT NULL,
+                    recipient_email TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    PRIMARY KEY (batch_id, row_number)
                 )
             ''')
             
@@ -248,6 +588,8 @@ class Database:
                 self.conn.commit()
                 self.logger.info("已初始化默认SMTP服务器配置")
 
+            # 升级已有数据库的表结构（新增列、索引等）
+            schema_migrations.migrate(self.conn)
             return True
         except Exception as e:
             self.logger.error(f"初始化数据库失败: {str(e)}")
@@ -267,6 +609,20 @@ class Database:
             })
         return senders
 
+    def get_sender_nickname(self, email):
+        """获取发件人昵称（不读取和解密授权码）
+        
+        Args:
+            email: 发件人邮箱地址
+            
+        Returns:
+            str: 昵称，未设置或发件人不存在时返回 None
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT nickname FROM senders WHERE email = ?', (email,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
     def add_sender(self, email, password, server_type='QQ企业邮箱', nickname=None):
         """添加或更新发件人"""
         cursor = self.conn.cursor()
@@ -548,16 +904,36 @@ class Database:
             print(f"获取模板失败: {str(e)}")
             return None
         
-    def add_send_log(self, batch_id, sender_email, recipient_email, recipient_name, subject, status, error_message=None):
-        """添加发送日志"""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            INSERT INTO send_logs (batch_id, sender_email, recipient_email, recipient_name, subject, status, error_message)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (batch_id, sender_email, recipient_email, recipient_name, subject, status, error_message))
-        self.conn.commit()
+    def add_send_log(self, batch_id, sender_email, recipient_email, recipient_name, subject, status, error_message=None,
+                     server_response=None):
+        """添加发送日志
+
+        日志由后台写入线程批量提交，调用时不等待写入磁盘；发送时间为调用时的时间。
+        
+        Args:
+            server_response: 服务器接受邮件时的响应（如 250 OK queued as ...）
+        """
+        send_time = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        self.send_log_writer.put((batch_id, self._text(sender_email), self._text(recipient_email),
+                                  self._text(recipient_name), self._text(subject), self._text(status),
+                                  error_message, server_response, send_time))
         return True
 
+    @staticmethod
+    def _text(value):
+        """必填的文本列：空值（None、表格中的空单元格 NaN）记为空字符串"""
+        if value is None or (isinstance(value, float) and value != value):
+            return ''
+        return str(value)
+
+    def flush_send_logs(self, timeout=None):
+        """等待已添加的发送日志全部写入数据库
+
+        Returns:
+            bool: 是否已全部写入
+        """
+        return self.send_log_writer.flush(timeout)
+
     def get_send_logs(self, start_date=None, end_date=None, batch_id=None):
         """获取发送日志
         
@@ -569,6 +945,8 @@ class Database:
         Returns:
             list: 发送日志列表
         """
+        # 先写入队列中尚未提交的日志
+        self.flush_send_logs()
         cursor = self.conn.cursor()
         query = '''
             SELECT 
@@ -580,7 +958,8 @@ class Database:
                 subject,
                 status,
                 error_message,
-                send_time
+                send_time,
+                server_response
             FROM send_logs 
             WHERE 1=1
         '''
@@ -589,12 +968,13 @@ class Database:
         if batch_id:
             query += ' AND batch_id = ?'
             params.append(batch_id)
+        # 日期条件写成时间范围 [开始日期, 结束日期的下一天)，可以使用 send_time 索引
         if start_date:
-            query += ' AND date(send_time) >= date(?)'
+            query += ' AND send_time >= date(?)'
             params.append(start_date)
         if end_date:
-            # 修改结束日期查询，包含当天的所有数据
-            query += ' AND date(send_time) <= date(?, "+1 day")'
+            # 包含结束日期当天的所有数据
+            query += " AND send_time < date(?, '+1 day')"
             params.append(end_date)
         
         query += ' ORDER BY send_time DESC'
@@ -602,6 +982,278 @@ class Database:
         cursor.execute(query, params)
         return cursor.fetchall()
 
+    def get_sent_counts_today(self):
+        """获取各发件人今天已成功发送的邮件数
+        
+        Returns:
+            dict: {发件人邮箱: 数量}
+        """
+        try:
+            self.flush_send_logs()
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                SELECT sender_email, COUNT(*)
+                FROM send_logs
+                WHERE status = '发送成功'
+                  AND send_time >= datetime('now', 'localtime', 'start of day', 'utc')
+                GROUP BY sender_email
+            ''')
+            return dict(cursor.fetchall())
+        except Exception as e:
+            self.logger.error(f"获取今日发送数量失败: {str(e)}")
+            return {}
+
+    def add_retry_job(self, batch_id, task, attachments, attempts, next_attempt, last_error):
+        """将临时性失败的邮件加入重试队列
+        
+        Args:
+            batch_id: 批次ID
+            task: 邮件任务，包含 row、email、name、subject、content、sender_email
+            attachments: 附件路径列表
+            attempts: 已尝试次数
+            next_attempt: 下次尝试时间（time.time() 时间戳）
+            last_error: 最近一次的错误信息
+            
+        Returns:
+            int: 重试任务ID
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            INSERT INTO retry_queue (batch_id, row_number, sender_email, recipient_email, recipient_name,
+                                     subject, content, attachments, attempts, next_attempt, last_error)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (batch_id, task['row'], task.get('sender_email'), task['email'], task['name'],
+              task['subject'], task['content'], json.dumps(attachments or []),
+              attempts, next_attempt, last_error))
+        job_id = cursor.lastrowid
+        cursor.execute('UPDATE batches SET retry_count = retry_count + 1 WHERE batch_id = ?', (batch_id,))
+        self.conn.commit()
+        return job_id
+
+    def update_retry_job(self, job_id, attempts, next_attempt, last_error):
+        """重试再次临时失败后，更新尝试次数和下次尝试时间"""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            UPDATE retry_queue SET attempts = ?, next_attempt = ?, last_error = ?
+            WHERE id = ?
+        ''', (attempts, next_attempt, last_error, job_id))
+        cursor.execute('''
+            UPDATE batches SET retry_count = retry_count + 1
+            WHERE batch_id = (SELECT batch_id FROM retry_queue WHERE id = ?)
+        ''', (job_id,))
+        self.conn.commit()
+        return True
+
+    def remove_retry_job(self, job_id):
+        """重试成功或最终失败后，从重试队列删除"""
+        cursor = self.conn.cursor()
+        cursor.execute('DELETE FROM retry_queue WHERE id = ?', (job_id,))
+        self.conn.commit()
+        return True
+
+    def get_due_retry_jobs(self, batch_id, now, exclude=None, limit=100):
+        """获取批次中已到重试时间的任务
+        
+        Args:
+            batch_id: 批次ID
+            now: 当前时间戳
+            exclude: 已在发送中的任务ID集合
+            limit: 最多返回数量
+            
+        Returns:
+            list: 任务字典列表，按下次尝试时间排序
+        """
+        exclude = exclude or set()
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT id, row_number, sender_email, recipient_email, recipient_name,
+                   subject, content, attachments, attempts, last_error
+            FROM retry_queue
+            WHERE batch_id = ? AND next_attempt <= ?
+            ORDER BY next_attempt
+            LIMIT ?
+        ''', (batch_id, now, limit + len(exclude)))
+        jobs = []
+        for row in cursor.fetchall():
+            if row[0] in exclude:
+                continue
+            jobs.append({
+                'retry_id': row[0],
+                'row': row[1],
+                'sender_email': row[2],
+                'email': row[3],
+                'name': row[4],
+                'subject': row[5],
+                'content': row[6],
+                'attachments': json.loads(row[7] or '[]'),
+                'attempts': row[8],
+                'last_error': row[9]
+            })
+        return jobs[:limit]
+
+    def remove_retry_jobs_for_row(self, batch_id, row_number):
+        """删除批次中某一行的重试任务"""
+        cursor = self.conn.cursor()
+        cursor.execute('DELETE FROM retry_queue WHERE batch_id = ? AND row_number = ?', (batch_id, row_number))
+        self.conn.commit()
+        return True
+
+    def count_retry_jobs(self, batch_id):
+        """获取批次中等待重试的任务数"""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT COUNT(*) FROM retry_queue WHERE batch_id = ?', (batch_id,))
+        return cursor.fetchone()[0]
+
+    def create_batch_checkpoint(self, batch_id, source_file, source_hash, total_rows, definition):
+        """创建批次检查点
+        
+        Args:
+            batch_id: 批次ID
+            source_file: 收件人源文件路径
+            source_hash: 源文件 SHA-256
+            total_rows: 收件人总数
+            definition: 批次定义（模板、发件人、附件等），保存为 JSON
+            
+        Raises:
+            sqlite3.IntegrityError: 批次ID已存在
+        """
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute('''
+                INSERT INTO batch_checkpoints
+                    (batch_id, source_file, source_hash, total_rows, definition, status)
+                VALUES (?, ?, ?, ?, ?, 'running')
+            ''', (batch_id, source_file, source_hash, total_rows, json.dumps(definition, ensure_ascii=False)))
+            # 批次汇总，发送过程中由发送日志写入线程累加各项数量
+            cursor.execute('''
+                INSERT INTO batches (batch_id, template_name, senders, total_rows, status)
+                VALUES (?, ?, ?, ?, 'running')
+            ''', (batch_id, definition.get('template_name'), ','.join(definition.get('senders') or []) or None,
+                  total_rows))
+        except sqlite3.IntegrityError:
+            # 不覆盖已有批次的检查点和统计
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+        return True
+
+    def update_batch_status(self, batch_id, status):
+        """更新批次状态，见 batch_checkpoint 中的 BATCH_* 常量"""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            UPDATE batch_checkpoints SET status = ?, updated_time = CURRENT_TIMESTAMP
+            WHERE batch_id = ?
+        ''', (status, batch_id))
+        cursor.execute('UPDATE batches SET status = ? WHERE batch_id = ?', (status, batch_id))
+        self.conn.commit()
+        return True
+
+    def get_batches(self, start_date=None, end_date=None):
+        """从批次汇总表获取批次列表，最近的在前，不需要扫描发送日志
+        
+        Args:
+            start_date (str, optional): 开始日期，格式：yyyy-MM-dd
+            end_date (str, optional): 结束日期，格式：yyyy-MM-dd
+            
+        Returns:
+            list: 批次字典列表，包含 batch_id、template_name、senders、total_rows、success_count、
+                failure_count、skipped_count、retry_count、status、start_time、end_time、
+                throughput（每分钟发送数，无法计算时为 None）
+        """
+        try:
+            # 先写入队列中尚未提交的日志，汇总数量与发送日志一致
+            self.flush_send_logs()
+            cursor = self.conn.cursor()
+            query = '''
+                SELECT batch_id, template_name, senders, total_rows, success_count, failure_count,
+                       skipped_count, retry_count, status, start_time, end_time,
+                       (julianday(end_time) - julianday(start_time)) * 86400
+                FROM batches
+                WHERE 1=1
+            '''
+            params = []
+            
+            if start_date:
+                query += ' AND start_time >= date(?)'
+                params.append(start_date)
+            if end_date:
+                query += " AND start_time < date(?, '+1 day')"
+                params.append(end_date)
+            
+            query += ' ORDER BY start_time DESC'
+            
+            cursor.execute(query, params)
+            batches = []
+            for row in cursor.fetchall():
+                seconds = row[11]
+                sent = row[4] + row[5]
+                batches.append({
+                    'batch_id': row[0],
+                    'template_name': row[1],
+                    'senders': row[2],
+                    'total_rows': row[3],
+                    'success_count': row[4],
+                    'failure_count': row[5],
+                    'skipped_count': row[6],
+                    'retry_count': row[7],
+                    'status': row[8],
+                    'start_time': row[9],
+                    'end_time': row[10],
+                    'throughput': sent * 60 / seconds if seconds and seconds > 0 else None
+                })
+            return batches
+        except Exception as e:
+            self.logger.error(f"获取批次列表失败: {str(e)}")
+            return []
+
+    def get_unfinished_batches(self):
+        """获取未完成（发送中断或用户停止）的批次，最近的在前
+        
+        Returns:
+            list: 批次字典列表，包含 batch_id、source_file、source_hash、total_rows、definition、status
+        """
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                SELECT batch_id, source_file, source_hash, total_rows, definition, status
+                FROM batch_checkpoints
+                WHERE status IN ('running', 'stopped')
+                ORDER BY created_time DESC
+            ''')
+            return [{
+                'batch_id': row[0],
+                'source_file': row[1],
+                'source_hash': row[2],
+                'total_rows': row[3],
+                'definition': json.loads(row[4]),
+                'status': row[5]
+            } for row in cursor.fetchall()]
+        except Exception as e:
+            self.logger.error(f"获取未完成批次失败: {str(e)}")
+            return []
+
+    def set_batch_row_state(self, batch_id, row_number, recipient_email, state):
+        """记录批次中一行的发送状态"""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            INSERT OR REPLACE INTO batch_rows (batch_id, row_number, recipient_email, state)
+            VALUES (?, ?, ?, ?)
+        ''', (batch_id, row_number, recipient_email, state))
+        self.conn.commit()
+        return True
+
+    def get_batch_row_states(self, batch_id):
+        """获取批次中已开始发送的行
+        
+        Returns:
+            dict: {行号: (收件人邮箱, 状态)}
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT row_number, recipient_email, state FROM batch_rows WHERE batch_id = ?
+        ''', (batch_id,))
+        return {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+
     def add_system_log(self, level, filename, line_number, message):
         """添加系统日志"""
         try:
@@ -637,11 +1289,12 @@ class Database:
             '''
             params = []
             
+            # 日期条件写成时间范围 [开始日期, 结束日期的下一天)，可以使用 timestamp 索引
             if start_date:
-                query += ' AND date(timestamp) >= date(?)'
+                query += ' AND timestamp >= date(?)'
                 params.append(start_date)
             if end_date:
-                query += ' AND date(timestamp) <= date(?)'
+                query += " AND timestamp < date(?, '+1 day')"
                 params.append(end_date)
             if level:
                 query += ' AND level = ?'
@@ -655,14 +1308,6 @@ class Database:
             self.logger.error(f"获取系统日志失败: {str(e)}")
             return []
 
-    def __del__(self):
-        """析构函数：确保在对象销毁时关闭数据库连接"""
-        if self._conn:
-            try:
-                self._conn.close()
-            except:
-                pass
-
     def get_senders(self):
         """获取所有发件人列表
         
@@ -5,8 +5,11 @@ from email.header import Header
 import re
 import os
 import time
+import threading
 from email.mime.application import MIMEApplication
+from email.generator import BytesGenerator
 import email.utils
+import io
 
 class EmailServer:
     # 添加附件大小限制常量（20MB）
@@ -15,6 +18,34 @@ class EmailServer:
     TEST_EMAIL_INTERVAL = 60  # 秒
     # 添加类属性来跟踪最后发送时间
     last_test_time = 0  # 初始化为0
+    # 单个连接默认最多发送的邮件数，达到后重新建立连接
+    # 服务器配置中的 max_messages_per_session 可覆盖，0 表示不限制
+    MAX_MESSAGES_PER_SESSION = 100
+    # 连接空闲超过该时间（秒）后，发送前先用 RSET 检查连接是否仍然可用
+    SESSION_IDLE_CHECK = 30
+    # 发送后确认策略（服务器配置 verify_policy）：
+    # none  - 不额外确认，DATA 的 250 响应已表示服务器接受了邮件
+    # every - 每发送 verify_interval 封邮件后发送一次 NOOP
+    # idle  - 连接空闲超过 verify_interval 秒后，下一封邮件发送前先确认连接
+    VERIFY_POLICIES = ('none', 'every', 'idle')
+    # 各确认策略的默认间隔（封数或秒数）
+    DEFAULT_VERIFY_INTERVALS = {'every': 100, 'idle': 5}
+    
+    # 各发件人身份信息的版本号 {邮箱: 版本}，发件人被修改后加一，连接中缓存的身份随之失效
+    _identity_versions = {}
+    _identity_lock = threading.Lock()
+    # 网络操作超时时间（秒）
+    SMTP_TIMEOUT = 60
+    # 表示服务器将关闭连接的响应码
+    DISCONNECT_CODES = (421,)
+    # 群发时一封邮件默认最多的收件人数（RCPT TO 数量），服务器配置中的 max_recipients 可覆盖
+    MAX_RECIPIENTS = 50
+    # 群发邮件的收件人头部，不向收件人公开其他收件人的地址
+    GROUP_TO_HEADER = 'undisclosed-recipients:;'
+    # 一封邮件的 DATA 阶段进度：内容尚未完整发出 / 内容已发出（等待确认）/ 服务器已接受
+    DATA_PENDING = 'pending'
+    DATA_SENT = 'sent'
+    DATA_ACCEPTED = 'accepted'
     
     def __init__(self, email, password, server_type=None):
         from database import Database
@@ -29,6 +60,21 @@ class EmailServer:
             
         self.server_type = server_type
         self.server = None
+        self._server_config = None
+        # 当前连接已发送的邮件数和最后一次收发时间
+        self.messages_in_session = 0
+        self.last_activity = 0
+        # 最近一次发送的SMTP响应码，无法确定时为 None
+        self.last_code = None
+        # 最近一次发送失败是否为临时性错误（可稍后重试）
+        self.last_transient = False
+        # 最近一次发送成功时服务器对 DATA 的响应（通常包含 queued as 队列号）
+        self.last_response = ''
+        # 最近一次发送的 DATA 阶段进度，内容已发出后失败不能自动重发
+        self.data_state = self.DATA_PENDING
+        # 缓存的发件人身份（发件人头部、Message-ID 域名）及其版本号
+        self._identity = None
+        self._identity_version = None
 
     def _detect_server_type(self, email):
         """根据邮箱地址自动识别服务器类型"""
@@ -55,130 +101,401 @@ class EmailServer:
         # 从映射中获取服务器类型，如果不存在则返回默认值
         return server_map.get(domain, 'QQ企业邮箱')
 
+    def _get_server_config(self):
+        """获取当前邮箱类型的SMTP服务器配置"""
+        if self._server_config is None:
+            # 从数据库获取服务器配置
+            smtp_servers = self.db.get_smtp_servers()
+            
+            if self.server_type not in smtp_servers:
+                raise ValueError(f'不支持的邮箱类型: {self.server_type}')
+                
+            self._server_config = smtp_servers[self.server_type]
+        return self._server_config
+
+    def _get_session_limit(self):
+        """获取单个连接最多发送的邮件数，0 表示不限制"""
+        return int(self._get_server_config().get('max_messages_per_session', self.MAX_MESSAGES_PER_SESSION) or 0)
+
+    def _get_verify_policy(self):
+        """获取发送后确认策略
+
+        Returns:
+            tuple: (策略, 间隔)，策略见 VERIFY_POLICIES
+        """
+        config = self._get_server_config()
+        policy = config.get('verify_policy') or 'none'
+        if policy not in self.VERIFY_POLICIES:
+            policy = 'none'
+        interval = int(config.get('verify_interval') or self.DEFAULT_VERIFY_INTERVALS.get(policy, 0))
+        return policy, max(1, interval)
+
+    def _get_idle_check(self):
+        """获取发送前需要检查连接的空闲秒数"""
+        policy, interval = self._get_verify_policy()
+        if policy == 'idle':
+            return min(interval, self.SESSION_IDLE_CHECK)
+        return self.SESSION_IDLE_CHECK
+
+    def _verify_after_send(self):
+        """按确认策略判断本次发送后是否需要发送 NOOP"""
+        policy, interval = self._get_verify_policy()
+        return policy == 'every' and self.messages_in_session % interval == 0
+
+    def get_recipient_limit(self):
+        """获取群发时一封邮件最多的收件人数"""
+        return max(1, int(self._get_server_config().get('max_recipients') or self.MAX_RECIPIENTS))
+
     def connect(self):
         """连接到邮件服务器"""
-        # 从数据库获取服务器配置
-        smtp_servers = self.db.get_smtp_servers()
-        
-        if self.server_type not in smtp_servers:
-            raise ValueError(f'不支持的邮箱类型: {self.server_type}')
-            
-        server_config = smtp_servers[self.server_type]
+        server_config = self._get_server_config()
         host = server_config['smtp_server']
         port = server_config['smtp_port']
         use_ssl = server_config['use_ssl']
         
         if not use_ssl:
-            self.server = smtplib.SMTP(host, port)
+            self.server = smtplib.SMTP(host, port, timeout=self.SMTP_TIMEOUT)
             self.server.starttls()  # 使用TLS
         else:
-            self.server = smtplib.SMTP_SSL(host, port)
+            self.server = smtplib.SMTP_SSL(host, port, timeout=self.SMTP_TIMEOUT)
             
         try:
             self.server.login(self.email, self.password)
         except smtplib.SMTPAuthenticationError:
+            self._drop_connection()
             raise ValueError('邮箱或授权码错误')
         except Exception as e:
+            self._drop_connection()
             raise ValueError(f'连接服务器失败: {str(e)}')
+        
+        self.messages_in_session = 0
+        self.last_activity = time.time()
+
+    def reconnect(self):
+        """断开当前连接并重新连接、登录"""
+        self._drop_connection()
+        self.connect()
+
+    def _drop_connection(self):
+        """丢弃当前连接，连接已失效时忽略错误"""
+        if self.server:
+            try:
+                self.server.quit()
+            except Exception:
+                try:
+                    self.server.close()
+                except Exception:
+                    pass
+        self.server = None
 
-    def send_email(self, to_email, subject, content, attachments=None):
-        """发送邮件"""
+    def _ensure_session(self):
+        """确保有可用的连接
+        
+        未连接时建立连接；达到单连接邮件数上限时重新连接；
+        空闲较久时先发送 RSET 检查连接，失效则重新连接。
+        """
         if not self.server:
             self.connect()
+            return
+        
+        limit = self._get_session_limit()
+        if limit and self.messages_in_session >= limit:
+            self.reconnect()
+            return
+        
+        if time.time() - self.last_activity > self._get_idle_check():
+            try:
+                self.server.rset()
+                self.last_activity = time.time()
+            except Exception:
+                self.reconnect()
+
+    def _reset_session(self):
+        """发送失败后用 RSET 清理会话状态，保留连接供下一封邮件使用"""
+        if not self.server:
+            return
+        try:
+            self.server.rset()
+        except Exception:
+            self._drop_connection()
+
+    def _is_disconnect_error(self, error):
+        """判断异常是否表示连接已断开（需要重新连接）"""
+        if isinstance(error, smtplib.SMTPServerDisconnected):
+            return True
+        if isinstance(error, smtplib.SMTPResponseException):
+            return error.smtp_code in self.DISCONNECT_CODES
+        if isinstance(error, smtplib.SMTPException):
+            return False
+        return isinstance(error, OSError)
+
+    def _error_code(self, error):
+        """从发送异常中提取SMTP响应码"""
+        if isinstance(error, smtplib.SMTPResponseException):
+            return error.smtp_code
+        if isinstance(error, smtplib.SMTPRecipientsRefused) and error.recipients:
+            return next(iter(error.recipients.values()))[0]
+        return None
+
+    def _record_failure(self, error):
+        """记录失败的响应码，以及是否属于可稍后重试的临时性错误（4xx、连接断开）"""
+        self.last_code = self._error_code(error)
+        if self.last_code is not None:
+            self.last_transient = 400 <= self.last_code < 500
+        else:
+            self.last_transient = self._is_disconnect_error(error)
+
+    def _transmit(self, msg, to_addrs):
+        """在当前连接上发送一封邮件
+        
+        Args:
+            msg: 邮件内容，见 MessageStream
+            to_addrs: 信封收件人列表
             
-        # 创建一个带附件的邮件实例
-        msg = MIMEMultipart()  # 使用默认的 mixed 类型
+        Returns:
+            dict: 被拒绝的收件人 {邮箱: (响应码, 响应内容)}
+        """
+        self.data_state = self.DATA_PENDING
+        self.messages_in_session += 1
+        refused = self._send_data(msg, to_addrs)
+        self.last_activity = time.time()
+        if self._verify_after_send():
+            try:
+                self.server.noop()
+            except Exception:
+                # 邮件已被服务器接受，确认失败只说明连接不可用，丢弃连接，邮件不重发
+                self._drop_connection()
+        return refused
+
+    def _send_data(self, msg, to_addrs):
+        """按 smtplib.SMTP.sendmail 的流程发送邮件，DATA 部分由 MessageStream 逐块写入连接
+        
+        sendmail 需要先把整封邮件（包括 base64 编码的附件）拼接成一个字节串，
+        这里直接写入批次共用的附件编码结果，每封邮件只额外占用邮件头和正文的内存。
+        
+        Returns:
+            dict: 被拒绝的收件人 {邮箱: (响应码, 响应内容)}
+        """
+        server = self.server
+        server.ehlo_or_helo_if_needed()
+        options = []
+        if server.does_esmtp and server.has_extn('size'):
+            options.append(f'size={msg.size}')
+        
+        code, response = server.mail(self.email, options)
+        if code != 250:
+            if code == 421:
+                server.close()
+            else:
+                server.rset()
+            raise smtplib.SMTPSenderRefused(code, response, self.email)
+        
+        refused = {}
+        for address in to_addrs:
+            code, response = server.rcpt(address)
+            if code not in (250, 251):
+                refused[address] = (code, response)
+            if code == 421:
+                server.close()
+                raise smtplib.SMTPRecipientsRefused(refused)
+        if len(refused) == len(to_addrs):
+            # 全部收件人都被拒绝
+            server.rset()
+            raise smtplib.SMTPRecipientsRefused(refused)
         
-        # 获取发件人昵称
-        senders = self.db.get_sender_list()
-        sender_info = None
-        for sender in senders:
-            if sender['email'] == self.email:
-                sender_info = sender
-                break
+        server.putcmd('data')
+        code, response = server.getreply()
+        if code != 354:
+            raise smtplib.SMTPDataError(code, response)
+        msg.write_to(server.sock)
+        # 结束标记已发出，此后服务器可能已经接受了邮件
+        self.data_state = self.DATA_SENT
+        code, response = server.getreply()
+        if code != 250:
+            if code == 421:
+                server.close()
+            raise smtplib.SMTPDataError(code, response)
+        self.data_state = self.DATA_ACCEPTED
+        self.last_response = f"{code} {response.decode('utf-8', 'replace')}"
+        return refused
+
+    def _refused_results(self, refused):
+        """将被拒绝的收件人转换为 {邮箱: (响应码, 错误信息)}"""
+        results = {}
+        for address, (code, response) in refused.items():
+            if isinstance(response, bytes):
+                response = response.decode('utf-8', 'replace')
+            results[address] = (code, f'{code} {response}')
+        return results
+
+    def _data_failure(self, error):
+        """邮件内容已完整发出后失败的处理
+
+        服务器可能已经接受了邮件，不自动重新发送。服务器明确拒绝时按响应码记录；
+        没有收到确认就断开时无法确定是否已送达，记为非临时性错误，不加入重试队列。
+
+        Returns:
+            str: 错误信息
+        """
+        if self._error_code(error) is not None:
+            self._reset_session()
+            return str(error)
+        self._drop_connection()
+        self.last_transient = False
+        return f'邮件内容已发出，但服务器确认前连接断开，无法确定是否已送达: {str(error)}'
+
+    def send_email(self, to_email, subject, content, attachments=None, skeleton=None):
+        """发送邮件
+        
+        邮件内容发出之前连接断开（服务器超时关闭、421 等）时自动重新连接并重试一次；
+        内容已发出后失败不重试，避免重复发送。
+        批量发送时传入 skeleton，附件只在批次开始时编码一次。
+        
+        Returns:
+            tuple: (是否成功, 消息)
+        """
+        msg = self.build_stream(to_email, subject, content, attachments, skeleton)
+        self.last_response = ''
+        self.data_state = self.DATA_PENDING
+
+        for attempt in range(2):
+            try:
+                if attempt:
+                    # 连接已断开：重新连接后重试一次
+                    self.reconnect()
+                else:
+                    self._ensure_session()
+                self._transmit(msg, [to_email])
+                self.last_code = 250
+                self.last_transient = False
+                return True, "发送成功"
+            except Exception as e:
+                self._record_failure(e)
+                if self.data_state != self.DATA_PENDING:
+                    return False, self._data_failure(e)
+                if not self._is_disconnect_error(e):
+                    self._reset_session()
+                    return False, str(e)
+                if attempt:
+                    self._drop_connection()
+                    return False, str(e)
+
+    def send_group(self, to_emails, subject, content, skeleton=None):
+        """群发邮件：一次 DATA 传输，信封中包含多个收件人（多个 RCPT TO）
+        
+        只用于不含变量的模板，所有收件人收到的邮件内容完全相同。
+        服务器可能只拒绝其中一部分收件人，被拒绝的收件人单独返回。
+        邮件内容发出之前连接断开时自动重新连接并重试一次；内容已发出后失败不重试，
+        避免所有收件人重复收到。
+        
+        Args:
+            to_emails: 收件人邮箱列表，不超过 get_recipient_limit()
+            subject: 邮件主题
+            content: HTML 邮件内容
+            skeleton: 批次共用的邮件骨架
             
+        Returns:
+            tuple: (邮件是否被服务器接受, 消息, 被拒绝的收件人 {邮箱: (响应码, 错误信息)})
+        """
+        msg = self.build_stream(self.GROUP_TO_HEADER, subject, content, skeleton=skeleton)
+        self.last_response = ''
+        self.data_state = self.DATA_PENDING
+
+        for attempt in range(2):
+            try:
+                if attempt:
+                    # 连接已断开：重新连接后重试一次
+                    self.reconnect()
+                else:
+                    self._ensure_session()
+                refused = self._transmit(msg, to_emails)
+                self.last_code = 250
+                self.last_transient = False
+                return True, "发送成功", self._refused_results(refused)
+            except smtplib.SMTPRecipientsRefused as e:
+                # 全部收件人都被拒绝，会话已重置
+                self._record_failure(e)
+                return False, '全部收件人被拒绝', self._refused_results(e.recipients)
+            except Exception as e:
+                self._record_failure(e)
+                if self.data_state != self.DATA_PENDING:
+                    return False, self._data_failure(e), {}
+                if not self._is_disconnect_error(e):
+                    self._reset_session()
+                    return False, str(e), {}
+                if attempt:
+                    self._drop_connection()
+                    return False, str(e), {}
+
+    def build_message(self, to_email, subject, content, attachments=None, skeleton=None):
+        """构建邮件
+        
+        Args:
+            to_email: 收件人邮箱
+            subject: 邮件主题
+            content: HTML 邮件内容
+            attachments: 附件路径列表，未提供 skeleton 时使用
+            skeleton: 批次共用的邮件骨架，附件已编码好，见 MessageSkeleton
+            
+        Returns:
+            MIMEMultipart: 邮件对象
+        """
+        if skeleton is None:
+            skeleton = MessageSkeleton(attachments)
+        identity = self._sender_identity()
+        return skeleton.build(identity['from_addr'], to_email, subject, content, identity['domain'])
+
+    def build_stream(self, to_email, subject, content, attachments=None, skeleton=None):
+        """构建逐块发送的邮件，参数见 build_message
+        
+        Returns:
+            MessageStream: 邮件内容
+        """
+        if skeleton is None:
+            skeleton = MessageSkeleton(attachments)
+        identity = self._sender_identity()
+        return skeleton.stream(identity['from_addr'], to_email, subject, content, identity['domain'])
+
+    @classmethod
+    def invalidate_sender_identity(cls, email):
+        """发件人信息被修改或删除后调用，使所有连接重新读取该发件人的昵称
+
+        Args:
+            email: 发件人邮箱
+        """
+        with cls._identity_lock:
+            cls._identity_versions[email] = cls._identity_versions.get(email, 0) + 1
+
+    def _sender_identity(self):
+        """获取发件人身份：发件人头部（包含编码后的昵称）和 Message-ID 域名
+
+        每个连接只读取一次，发件人被修改（invalidate_sender_identity）后重新读取。
+
+        Returns:
+            dict: 包含 from_addr、domain
+        """
+        version = self._identity_versions.get(self.email, 0)
+        if self._identity is not None and self._identity_version == version:
+            return self._identity
+
+        # 只读取昵称，不需要读取和解密授权码
+        nickname = self.db.get_sender_nickname(self.email)
+        
         # 设置发件人显示格式，确保符合 RFC 标准
-        if sender_info and sender_info.get('nickname'):
+        if nickname:
             # 对昵称进行 RFC 2047 编码，并处理特殊字符
-            nickname = sender_info['nickname'].replace('"', '')  # 移除引号
+            nickname = nickname.replace('"', '')  # 移除引号
             encoded_nickname = Header(nickname, 'utf-8').encode()
             from_addr = f"{encoded_nickname} <{self.email}>"
         else:
             from_addr = f"<{self.email}>"
         
-        # 设置邮件头部，确保所有必需的头部都符合标准
-        msg['From'] = from_addr
-        # 对收件人地址进行格式化
-        msg['To'] = email.utils.formataddr(('', to_email))
-        msg['Subject'] = Header(subject, 'utf-8').encode()
-        msg['Date'] = email.utils.formatdate(localtime=True)
-        msg['Message-ID'] = email.utils.make_msgid(domain=self.email.split('@')[1])
-        # 添加必要的头部
-        msg['MIME-Version'] = '1.0'
-        msg['Content-Type'] = 'multipart/mixed; boundary="{}"'.format(msg.get_boundary())
-        
-        # 创建alternative部分来包含纯文本和HTML内容
-        alt_part = MIMEMultipart('alternative')
-        
-        # 添加纯文本和HTML两种格式
-        text_part = MIMEText(self._html_to_text(content), 'plain', 'utf-8')
-        html_part = MIMEText(content, 'html', 'utf-8')
-        
-        alt_part.attach(text_part)
-        alt_part.attach(html_part)
-        
-        # 将alternative部分添加到邮件主体
-        msg.attach(alt_part)
-
-        # 如果有附件，添加到邮件中
-        if attachments:
-            total_size = 0
-            for file_path in attachments:
-                try:
-                    # 检查文件大小
-                    file_size = os.path.getsize(file_path)
-                    total_size += file_size
-                    
-                    if file_size > self.MAX_ATTACHMENT_SIZE:
-                        raise ValueError(f"单个附件大小超过限制(25MB): {os.path.basename(file_path)}")
-                        
-                    if total_size > self.MAX_ATTACHMENT_SIZE:
-                        raise ValueError(f"附件总大小超过限制(25MB)")
-                        
-                    # 获取文件名和扩展名
-                    filename = os.path.basename(file_path)
-                    file_ext = os.path.splitext(filename)[1].lower()
-                    
-                    # 读取文件内容
-                    with open(file_path, 'rb') as f:
-                        attachment = f.read()
-                    
-                    # 根据文件扩展名设置正确的 MIME 类型
-                    mime_type = self._get_mime_type(file_ext)
-                    
-                    # 创建附件部分
-                    part = MIMEApplication(attachment)
-                    
-                    # 设置附件头部信息
-                    part.add_header('Content-Disposition', 'attachment', 
-                                  filename=('utf-8', '', filename))
-                    part.add_header('Content-Type', f'application/octet-stream; name="{filename}"')
-                    
-                    msg.attach(part)
-                    
-                except OSError as e:
-                    raise ValueError(f"读取附件失败: {file_path} - {str(e)}")
-                except Exception as e:
-                    raise ValueError(f"添加附件失败: {file_path} - {str(e)}")
-
-        try:
-            self.server.send_message(msg)
-            self.server.noop()  # 确保邮件发送完成
-            return True, "发送成功"
-        except Exception as e:
-            return False, str(e)
+        self._identity = {'from_addr': from_addr, 'domain': self.email.split('@')[1]}
+        self._identity_version = version
+        return self._identity
 
-    def _html_to_text(self, html):
+    @staticmethod
+    def _html_to_text(html):
         """将 HTML 转换为纯文本（简单实现）"""
         # 移除 HTML 标签
         text = re.sub(r'<[^>]+>', '', html)
@@ -193,7 +510,7 @@ class EmailServer:
         """关闭连接"""
         if self.server:
             self.server.quit()
-    #         self.close()
+            self.server = None
 
     def _get_mime_type(self, file_ext):
         """根据文件扩展名获取 MIME 类型"""
@@ -214,4 +531,408 @@ class EmailServer:
             '.7z': 'x-7z-compressed',
             '.txt': 'plain',
         }
-        return mime_types.get(file_ext, 'octet-stream')
\ No newline at end of file
+        return mime_types.get(file_ext, 'octet-stream')
+
+
+class MessageSkeleton:
+    """批次共用的邮件骨架
+
+    附件在创建时读取并完成 base64 编码，之后每封邮件直接引用同一组附件部分，
+    只为每个收件人生成邮件头和正文（纯文本、HTML）部分。
+    附件部分创建后不再修改，可以被多个发送线程同时使用。
+    附件同时保存一份生成好的字节内容，逐块发送（stream）时直接写入连接，
+    不再为每封邮件重新生成和拼接。
+    """
+
+    def __init__(self, attachments=None):
+        """读取并编码附件
+
+        Args:
+            attachments: 附件路径列表
+
+        Raises:
+            ValueError: 附件超过大小限制或读取失败
+        """
+        self.attachments = list(attachments or [])
+        self.parts = []
+        # 各附件部分生成好的字节内容（CRLF 换行）
+        self.encoded_parts = []
+        total_size = 0
+        for file_path in self.attachments:
+            try:
+                # 检查文件大小
+                file_size = os.path.getsize(file_path)
+                total_size += file_size
+                
+                if file_size > EmailServer.MAX_ATTACHMENT_SIZE:
+                    raise ValueError(f"单个附件大小超过限制(25MB): {os.path.basename(file_path)}")
+                    
+                if total_size > EmailServer.MAX_ATTACHMENT_SIZE:
+                    raise ValueError(f"附件总大小超过限制(25MB)")
+                    
+                part = self._encode_attachment(file_path)
+                self.parts.append(part)
+                self.encoded_parts.append(self._flatten(part))
+                
+            except OSError as e:
+                raise ValueError(f"读取附件失败: {file_path} - {str(e)}")
+            except Exception as e:
+                raise ValueError(f"添加附件失败: {file_path} - {str(e)}")
+
+    def _encode_attachment(self, file_path):
+        """读取附件并编码为邮件附件部分"""
+        # 获取文件名
+        filename = os.path.basename(file_path)
+        
+        # 读取文件内容
+        with open(file_path, 'rb') as f:
+            attachment = f.read()
+        
+        # 创建附件部分（创建时完成 base64 编码）
+        part = MIMEApplication(attachment)
+        
+        # 设置附件头部信息
+        part.add_header('Content-Disposition', 'attachment', 
+                      filename=('utf-8', '', filename))
+        part.add_header('Content-Type', f'application/octet-stream; name="{filename}"')
+        return part
+
+    @staticmethod
+    def _flatten(msg):
+        """生成邮件（或邮件部分）的字节内容，与 smtplib 发送时一致使用 CRLF 换行"""
+        buffer = io.BytesIO()
+        BytesGenerator(buffer).flatten(msg, linesep='\r\n')
+        return buffer.getvalue()
+
+    def build(self, from_addr, to_email, subject, content, domain):
+        """生成一封邮件
+
+        Args:
+            from_addr: 发件人头部
+            to_email: 收件人邮箱
+            subject: 邮件主题
+            content: HTML 邮件内容
+            domain: 生成 Message-ID 使用的域名
+
+        Returns:
+            MIMEMultipart: 邮件对象
+        """
+        return self._build(from_addr, to_email, subject, content, domain, self.parts)
+
+    def stream(self, from_addr, to_email, subject, content, domain):
+        """生成逐块发送的邮件，参数见 build
+
+        只生成邮件头和正文部分，附件直接引用已生成的字节内容，
+        内容与 build 生成的邮件相同。
+
+        Returns:
+            MessageStream: 邮件内容
+        """
+        msg = self._build(from_addr, to_email, subject, content, domain, [])
+        head = self._flatten(msg)
+        if not self.encoded_parts:
+            return MessageStream([head])
+
+        # 在结束分隔行之前插入附件，每个附件前加一行分隔行
+        boundary = msg.get_boundary().encode('ascii')
+        end = head.rindex(b'--' + boundary + b'--')
+        chunks = [head[:end]]
+        for part in self.encoded_parts:
+            chunks.extend((b'--' + boundary + b'\r\n', part, b'\r\n'))
+        chunks.append(head[end:])
+        return MessageStream(chunks)
+
+    def _build(self, from_addr, to_email, subject, content, domain, parts):
+        """生成邮件对象，parts 为附件部分列表"""
+        # 创建一个带附件的邮件实例
+        msg = MIMEMultipart()  # 使用默认的 mixed 类型
+        
+        # 设置邮件头部，确保所有必需的头部都符合标准
+        msg['From'] = from_addr
+        # 对收件人地址进行格式化
+        msg['To'] = email.utils.formataddr(('', to_email))
+        msg['Subject'] = Header(subject, 'utf-8').encode()
+        msg['Date'] = email.utils.formatdate(localtime=True)
+        msg['Message-ID'] = email.utils.make_msgid(domain=domain)
+        # 添加必要的头部
+        msg['MIME-Version'] = '1.0'
+        msg['Content-Type'] = 'multipart/mixed; boundary="{}"'.format(msg.get_boundary())
+        
+        # 创建alternative部分来包含纯文本和HTML内容
+        alt_part = MIMEMultipart('alternative')
+        
+        # 添加纯文本和HTML两种格式
+        text_part = MIMEText(EmailServer._html_to_text(content), 'plain', 'utf-8')
+        html_part = MIMEText(content, 'html', 'utf-8')
+        
+        alt_part.attach(text_part)
+        alt_part.attach(html_part)
+        
+        # 将alternative部分添加到邮件主体
+        msg.attach(alt_part)
+
+        # 附件部分已编码，直接引用
+        for part in parts:
+            msg.attach(part)
+
+        return msg
+
+
+class MessageStream:
+    """逐块发送的邮件内容
+
+    由若干字节块组成（CRLF 换行，每块从行首开始），附件块引用 MessageSkeleton 中
+    批次共用的字节内容，发送时逐块写入连接，不拼接成完整的邮件。
+    """
+    # 行首的点（SMTP DATA 中需要加倍）
+    DOT_PATTERN = re.compile(br'(?m)^\.')
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.size = sum(len(chunk) for chunk in chunks)
+
+    def as_bytes(self):
+        """拼接为完整的邮件内容"""
+        return b''.join(self.chunks)
+
+    def write_to(self, sock):
+        """按 SMTP DATA 的格式写入连接：行首的点加倍，以 CRLF.CRLF 结束
+
+        Args:
+            sock: 已进入 DATA 阶段的连接
+        """
+        last = b''
+        for chunk in self.chunks:
+            if chunk.startswith(b'.') or b'\n.' in chunk:
+                chunk = self.DOT_PATTERN.sub(b'..', chunk)
+            if chunk:
+                sock.sendall(chunk)
+                last = chunk
+        if not last.endswith(b'\r\n'):
+            sock.sendall(b'\r\n')
+        sock.sendall(b'.\r\n')
+
+
+class AsyncEmailServer(EmailServer):
+    """基于 asyncio 的邮件服务器连接
+
+    与 EmailServer 接口一致，但 connect/send_email/close 均为协程，
+    多个连接可以在同一个事件循环中并发收发，不必为每个连接占用一个线程。
+    依赖 aiosmtplib，只有选择异步传输时才需要安装。
+    """
+
+    async def connect(self):
+        """连接到邮件服务器"""
+        import aiosmtplib
+
+        server_config = self._get_server_config()
+        host = server_config['smtp_server']
+        port = server_config['smtp_port']
+        use_ssl = server_config['use_ssl']
+
+        if not use_ssl:
+            self.server = aiosmtplib.SMTP(hostname=host, port=port, start_tls=True, timeout=self.SMTP_TIMEOUT)
+        else:
+            self.server = aiosmtplib.SMTP(hostname=host, port=port, use_tls=True, timeout=self.SMTP_TIMEOUT)
+
+        try:
+            await self.server.connect()
+            await self.server.login(self.email, self.password)
+        except aiosmtplib.SMTPAuthenticationError:
+            await self._drop_connection()
+            raise ValueError('邮箱或授权码错误')
+        except Exception as e:
+            await self._drop_connection()
+            raise ValueError(f'连接服务器失败: {str(e)}')
+
+        self.messages_in_session = 0
+        self.last_activity = time.time()
+
+    async def reconnect(self):
+        """断开当前连接并重新连接、登录"""
+        await self._drop_connection()
+        await self.connect()
+
+    async def _drop_connection(self):
+        """丢弃当前连接，连接已失效时忽略错误"""
+        if self.server:
+            try:
+                await self.server.quit()
+            except Exception:
+                self.server.close()
+        self.server = None
+
+    async def _ensure_session(self):
+        """确保有可用的连接，规则与 EmailServer._ensure_session 相同"""
+        if not self.server or not self.server.is_connected:
+            await self.reconnect()
+            return
+
+        limit = self._get_session_limit()
+        if limit and self.messages_in_session >= limit:
+            await self.reconnect()
+            return
+
+        if time.time() - self.last_activity > self._get_idle_check():
+            try:
+                await self.server.rset()
+                self.last_activity = time.time()
+            except Exception:
+                await self.reconnect()
+
+    async def _reset_session(self):
+        """发送失败后用 RSET 清理会话状态，保留连接供下一封邮件使用"""
+        if not self.server:
+            return
+        try:
+            await self.server.rset()
+        except Exception:
+            await self._drop_connection()
+
+    def _is_disconnect_error(self, error):
+        """判断异常是否表示连接已断开（需要重新连接）"""
+        import aiosmtplib
+
+        if isinstance(error, aiosmtplib.SMTPServerDisconnected):
+            return True
+        if isinstance(error, aiosmtplib.SMTPResponseException):
+            return error.code in self.DISCONNECT_CODES
+        if isinstance(error, aiosmtplib.SMTPException):
+            return False
+        return isinstance(error, OSError)
+
+    def _error_code(self, error):
+        """从发送异常中提取SMTP响应码"""
+        import aiosmtplib
+
+        if isinstance(error, aiosmtplib.SMTPResponseException):
+            return error.code
+        if isinstance(error, aiosmtplib.SMTPRecipientsRefused) and error.recipients:
+            return error.recipients[0].code
+        return None
+
+    async def _transmit(self, msg, to_addrs):
+        """在当前连接上发送一封邮件，返回值见 EmailServer._transmit
+
+        aiosmtplib 没有逐块写入 DATA 的接口，邮件内容拼接后发送；
+        附件仍直接使用批次共用的字节内容，不需要为每封邮件重新生成。
+        按 MAIL/RCPT/DATA 分步发送，以便区分失败发生在邮件内容发出之前还是之后。
+        """
+        import aiosmtplib
+
+        self.data_state = self.DATA_PENDING
+        self.messages_in_session += 1
+        await self.server.mail(self.email)
+        refused = {}
+        for address in to_addrs:
+            try:
+                await self.server.rcpt(address)
+            except aiosmtplib.SMTPRecipientRefused as e:
+                refused[address] = e
+        if len(refused) == len(to_addrs):
+            # 全部收件人都被拒绝
+            await self.server.rset()
+            raise aiosmtplib.SMTPRecipientsRefused(list(refused.values()))
+
+        # aiosmtplib 的 DATA 命令和邮件内容在一次调用中发出，从这里开始视为内容可能已送达
+        self.data_state = self.DATA_SENT
+        response = await self.server.data(msg.as_bytes())
+        self.data_state = self.DATA_ACCEPTED
+        self.last_response = f'{response.code} {response.message}'
+        self.last_activity = time.time()
+        if self._verify_after_send():
+            try:
+                await self.server.noop()
+            except Exception:
+                # 邮件已被服务器接受，确认失败只说明连接不可用，丢弃连接，邮件不重发
+                await self._drop_connection()
+        return refused
+
+    def _refused_results(self, refused):
+        """将被拒绝的收件人转换为 {邮箱: (响应码, 错误信息)}
+
+        aiosmtplib 以 {邮箱: SMTPResponse} 返回部分拒绝，全部拒绝时为
+        SMTPRecipientRefused 列表。
+        """
+        if isinstance(refused, dict):
+            items = [(address, response.code, response.message) for address, response in refused.items()]
+        else:
+            items = [(error.recipient, error.code, error.message) for error in refused]
+        return {address: (code, f'{code} {message}') for address, code, message in items}
+
+    async def _data_failure(self, error):
+        """邮件内容已发出后失败的处理，见 EmailServer._data_failure"""
+        if self._error_code(error) is not None:
+            await self._reset_session()
+            return str(error)
+        await self._drop_connection()
+        self.last_transient = False
+        return f'邮件内容已发出，但服务器确认前连接断开，无法确定是否已送达: {str(error)}'
+
+    async def send_email(self, to_email, subject, content, attachments=None, skeleton=None):
+        """发送邮件，邮件内容发出之前连接断开时自动重新连接并重试一次"""
+        msg = self.build_stream(to_email, subject, content, attachments, skeleton)
+        self.last_response = ''
+        self.data_state = self.DATA_PENDING
+
+        for attempt in range(2):
+            try:
+                if attempt:
+                    # 连接已断开：重新连接后重试一次
+                    await self.reconnect()
+                else:
+                    await self._ensure_session()
+                await self._transmit(msg, [to_email])
+                self.last_code = 250
+                self.last_transient = False
+                return True, "发送成功"
+            except Exception as e:
+                self._record_failure(e)
+                if self.data_state != self.DATA_PENDING:
+                    return False, await self._data_failure(e)
+                if not self._is_disconnect_error(e):
+                    await self._reset_session()
+                    return False, str(e)
+                if attempt:
+                    await self._drop_connection()
+                    return False, str(e)
+
+    async def send_group(self, to_emails, subject, content, skeleton=None):
+        """群发邮件，参数和返回值见 EmailServer.send_group"""
+        import aiosmtplib
+
+        msg = self.build_stream(self.GROUP_TO_HEADER, subject, content, skeleton=skeleton)
+        self.last_response = ''
+        self.data_state = self.DATA_PENDING
+
+        for attempt in range(2):
+            try:
+                if attempt:
+                    # 连接已断开：重新连接后重试一次
+                    await self.reconnect()
+                else:
+                    await self._ensure_session()
+                refused = await self._transmit(msg, to_emails)
+                self.last_code = 250
+                self.last_transient = False
+                return True, "发送成功", self._refused_results(refused)
+            except aiosmtplib.SMTPRecipientsRefused as e:
+                self._record_failure(e)
+                await self._reset_session()
+                return False, '全部收件人被拒绝', self._refused_results(e.recipients)
+            except Exception as e:
+                self._record_failure(e)
+                if self.data_state != self.DATA_PENDING:
+                    return False, await self._data_failure(e), {}
+                if not self._is_disconnect_error(e):
+                    await self._reset_session()
+                    return False, str(e), {}
+                if attempt:
+                    await self._drop_connection()
+                    return False, str(e), {}
+
+    async def close(self):
+        """关闭连接"""
+        if self.server:
+            await self.server.quit()
+            self.server = None
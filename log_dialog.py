@@ -1,6 +1,6 @@
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
                             QPushButton, QTableWidget, QTableWidgetItem,
-                            QDateEdit, QComboBox, QHeaderView, QWidget)
+                            QDateEdit, QComboBox, QHeaderView, QWidget, QSplitter)
 from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtGui import QColor, QBrush
 import pandas as pd
@@ -9,6 +9,14 @@ from config import Config
 from message_box import MessageBox
 
 class LogDialog(QDialog):
+    # 批次状态显示文字
+    BATCH_STATUS_TEXT = {
+        'running': '发送中',
+        'stopped': '已停止',
+        'completed': '已完成',
+        'abandoned': '已放弃',
+    }
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.config = Config()
@@ -53,12 +61,19 @@ class LogDialog(QDialog):
         search_btn.setFixedWidth(80)
         search_btn.clicked.connect(self.search_logs)
         
+        # 显示日期范围内全部批次的发送记录
+        all_logs_btn = QPushButton('全部记录')
+        all_logs_btn.setFixedWidth(80)
+        all_logs_btn.clicked.connect(self.load_all_logs)
+        
         export_btn = QPushButton('导出')
         export_btn.setFixedWidth(80)
         export_btn.clicked.connect(self.export_logs)
         
         button_layout.addWidget(search_btn)
         button_layout.addSpacing(10)
+        button_layout.addWidget(all_logs_btn)
+        button_layout.addSpacing(10)
         button_layout.addWidget(export_btn)
         
         # 将各部分添加到主工具栏布局
@@ -96,12 +111,30 @@ class LogDialog(QDialog):
             }
         """)
         
+        # 批次列表（来自批次汇总表），选中批次后在下方显示该批次的发送记录
+        self.batch_table = QTableWidget()
+        self.batch_table.setColumnCount(10)
+        self.batch_table.setHorizontalHeaderLabels([
+            '开始时间', '批次', '模板', '发件人', '收件人数',
+            '成功', '失败', '跳过', '重试', '状态 / 速度'
+        ])
+        batch_header = self.batch_table.horizontalHeader()
+        for col in range(10):
+            batch_header.setSectionResizeMode(col, QHeaderView.ResizeToContents)
+        batch_header.setSectionResizeMode(3, QHeaderView.Stretch)  # 发件人
+        self.batch_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.batch_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.batch_table.setSelectionMode(QTableWidget.SingleSelection)
+        self.batch_table.setAlternatingRowColors(True)
+        self.batch_table.verticalHeader().setVisible(False)
+        self.batch_table.itemSelectionChanged.connect(self.on_batch_selected)
+        
         # 日志表格
         self.log_table = QTableWidget()
-        self.log_table.setColumnCount(7)
+        self.log_table.setColumnCount(8)
         self.log_table.setHorizontalHeaderLabels([
             '发送时间', '发件人', '收件人', '收件人姓名', 
-            '邮件主题', '发送状态', '错误信息'
+            '邮件主题', '发送状态', '错误信息', '服务器响应'
         ])
         
         # 设置表格列宽
@@ -113,9 +146,10 @@ class LogDialog(QDialog):
         header.setSectionResizeMode(4, QHeaderView.Stretch)           # 邮件主题
         header.setSectionResizeMode(5, QHeaderView.ResizeToContents)  # 发送状态
         header.setSectionResizeMode(6, QHeaderView.Stretch)           # 错误信息
+        header.setSectionResizeMode(7, QHeaderView.ResizeToContents)  # 服务器响应
         
         # 设置表格样式
-        self.log_table.setStyleSheet("""
+        table_style = """
             QTableWidget {
                 background-color: white;
                 alternate-background-color: #fafafa;
@@ -128,7 +162,9 @@ class LogDialog(QDialog):
                 padding: 5px;
                 text-align: center;
             }
-        """)
+        """
+        self.batch_table.setStyleSheet(table_style)
+        self.log_table.setStyleSheet(table_style)
         
         # 设置表格属性
         self.log_table.setEditTriggers(QTableWidget.NoEditTriggers)
@@ -136,21 +172,104 @@ class LogDialog(QDialog):
         self.log_table.setAlternatingRowColors(True)
         self.log_table.verticalHeader().setVisible(False)
         
+        splitter = QSplitter(Qt.Vertical)
+        splitter.addWidget(self.batch_table)
+        splitter.addWidget(self.log_table)
+        splitter.setSizes([250, 350])
+        
         # 添加到主布局
         layout.addWidget(toolbar_widget)
-        layout.addWidget(self.log_table)
+        layout.addWidget(splitter)
         self.setLayout(layout)
         
         # 初始加载数据
         self.search_logs()
+    
+    def _date_range(self):
+        """获取查询的日期范围"""
+        return (self.start_date.date().toString('yyyy-MM-dd'),
+                self.end_date.date().toString('yyyy-MM-dd'))
         
     def search_logs(self):
-        """查询日志"""
+        """查询日期范围内的批次，并显示最近一个批次的发送记录"""
         try:
-            start_date = self.start_date.date().toString('yyyy-MM-dd')
-            end_date = self.end_date.date().toString('yyyy-MM-dd')
+            start_date, end_date = self._date_range()
+            batches = self.db.get_batches(start_date=start_date, end_date=end_date)
+            
+            self.batch_table.blockSignals(True)
+            self.batch_table.setRowCount(0)
+            for batch in batches:
+                row = self.batch_table.rowCount()
+                self.batch_table.insertRow(row)
+                
+                status = self.BATCH_STATUS_TEXT.get(batch['status'], batch['status'] or '')
+                if batch['throughput'] is not None:
+                    speed = f"{batch['throughput']:.1f} 封/分钟"
+                    status = f'{status} / {speed}' if status else speed
+                items = [
+                    QTableWidgetItem(str(batch['start_time'] or '')),
+                    QTableWidgetItem(batch['batch_id']),
+                    QTableWidgetItem(batch['template_name'] or ''),
+                    QTableWidgetItem(batch['senders'] or ''),
+                    QTableWidgetItem(str(batch['total_rows'] or '')),
+                    QTableWidgetItem(str(batch['success_count'])),
+                    QTableWidgetItem(str(batch['failure_count'])),
+                    QTableWidgetItem(str(batch['skipped_count'])),
+                    QTableWidgetItem(str(batch['retry_count'])),
+                    QTableWidgetItem(status)
+                ]
+                items[5].setForeground(QBrush(QColor('#28a745')))
+                if batch['failure_count']:
+                    items[6].setForeground(QBrush(QColor('#dc3545')))
+                
+                for col, item in enumerate(items):
+                    if col == 3:  # 发件人左对齐
+                        item.setTextAlignment(Qt.AlignLeft | Qt.AlignVCenter)
+                    else:
+                        item.setTextAlignment(Qt.AlignCenter)
+                    self.batch_table.setItem(row, col, item)
+            self.batch_table.blockSignals(False)
+            
+            if batches:
+                # 选中最近的批次，触发加载该批次的发送记录
+                self.batch_table.selectRow(0)
+            else:
+                self.show_logs([], '发送历史记录 - 没有批次')
             
+        except Exception as e:
+            self.batch_table.blockSignals(False)
+            MessageBox.show('错误', f'查询日志失败: {str(e)}', 'error', parent=self)
+    
+    def on_batch_selected(self):
+        """显示选中批次的发送记录"""
+        rows = self.batch_table.selectionModel().selectedRows()
+        if not rows:
+            return
+        batch_id = self.batch_table.item(rows[0].row(), 1).text()
+        try:
+            logs = self.db.get_send_logs(batch_id=batch_id)
+            self.show_logs(logs, f'发送历史记录 - 批次 {batch_id} 共 {len(logs)} 条记录')
+        except Exception as e:
+            MessageBox.show('错误', f'查询日志失败: {str(e)}', 'error', parent=self)
+    
+    def load_all_logs(self):
+        """显示日期范围内全部批次的发送记录"""
+        try:
+            start_date, end_date = self._date_range()
+            self.batch_table.clearSelection()
             logs = self.db.get_send_logs(start_date=start_date, end_date=end_date)
+            self.show_logs(logs, f'发送历史记录 - 共 {len(logs)} 条记录')
+        except Exception as e:
+            MessageBox.show('错误', f'查询日志失败: {str(e)}', 'error', parent=self)
+    
+    def show_logs(self, logs, title):
+        """在日志表格中显示发送记录
+        
+        Args:
+            logs: get_send_logs 的返回值
+            title: 窗口标题
+        """
+        try:
             self.log_table.setRowCount(0)
             
             for log in logs:
@@ -165,7 +284,8 @@ class LogDialog(QDialog):
                     QTableWidgetItem(str(log[4])),  # recipient_name
                     QTableWidgetItem(str(log[5])),  # subject
                     QTableWidgetItem(str(log[6])),  # status
-                    QTableWidgetItem(str(log[7] or ''))  # error_message
+                    QTableWidgetItem(str(log[7] or '')),  # error_message
+                    QTableWidgetItem(str(log[9] or ''))  # server_response
                 ]
                 
                 # 设置状态列的颜色
@@ -174,14 +294,14 @@ class LogDialog(QDialog):
                 
                 # 设置单元格对齐方式
                 for col, item in enumerate(items):
-                    if col in [4, 6]:  # 邮件主题和错误信息左对齐
+                    if col in [4, 6, 7]:  # 邮件主题、错误信息和服务器响应左对齐
                         item.setTextAlignment(Qt.AlignLeft | Qt.AlignVCenter)
                     else:  # 其他列居中对齐
                         item.setTextAlignment(Qt.AlignCenter)
                     self.log_table.setItem(row, col, item)
             
             # 更新窗口标题显示记录数
-            self.setWindowTitle(f'发送历史记录 - 共 {len(logs)} 条记录')
+            self.setWindowTitle(title)
             
         except Exception as e:
             MessageBox.show('错误', f'查询日志失败: {str(e)}', 'error', parent=self)
@@ -204,7 +324,7 @@ class LogDialog(QDialog):
             # 创建DataFrame
             df = pd.DataFrame(data, columns=[
                 '发送时间', '发件人', '收件人', '收件人姓名',
-                '邮件主题', '发送状态', '错误信息'
+                '邮件主题', '发送状态', '错误信息', '服务器响应'
             ])
             
             # 导出到Excel
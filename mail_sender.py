@@ -3,15 +3,20 @@ import os
 import time
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QLabel, QLineEdit, QPushButton, 
-                            QTextEdit, QFileDialog, QProgressBar, QComboBox, QDialog, QSplitter, QTextBrowser, QTableWidget, QTableWidgetItem, QHeaderView, QListWidget, QMessageBox, QListWidgetItem, QInputDialog)
+                            QTextEdit, QFileDialog, QProgressBar, QComboBox, QDialog, QSplitter, QTextBrowser, QTableWidget, QTableWidgetItem, QHeaderView, QListWidget, QMessageBox, QListWidgetItem, QInputDialog, QSpinBox, QCheckBox)
 from PyQt5.QtCore import Qt, pyqtSignal, QTimer, QThread
 from PyQt5.QtGui import QColor, QBrush, QIcon
 import pandas as pd
-from email_utils import EmailServer
+from email_utils import EmailServer, AsyncEmailServer, MessageSkeleton
+from template_renderer import TemplateRenderer, BatchRenderer
+from recipient_source import open_source, DataFrameSource, ArrowSource, FILE_FILTER
+from recipient_cache import RecipientCache
+from recipient_validator import RecipientValidator, validate_source
 from template_dialog import TemplateDialog
 from sender_dialog import SenderDialog
 from styles import MODERN_STYLE
 from database import Database
+from crypto_utils import CryptoUtils
 from server_dialog import ServerDialog
 from config import Config
 from single_instance import SingleInstance
@@ -25,8 +30,16 @@ from email import message_from_file
 from email.header import Header
 from bs4 import BeautifulSoup
 from about_dialog import AboutDialog
-from queue import Queue, Empty
+from sender_pool import SenderPool
+from rate_limiter import RateLimiter, AdaptiveThrottle
+from retry_policy import RetryPolicy
+from batch_checkpoint import (BATCH_RUNNING, BATCH_STOPPED, BATCH_COMPLETED, BATCH_ABANDONED,
+                              ROW_SENDING, ROW_RETRY, ROW_SENT, ROW_FAILED, ROW_UNKNOWN, DONE_STATES)
+from queue import Queue, Empty, Full
 import threading
+import asyncio
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 import chardet
 
 def get_resource_path(relative_path):
@@ -46,6 +59,9 @@ def get_resource_path(relative_path):
 class EmailSender(QMainWindow):
     activate_window_signal = pyqtSignal()
     
+    # 发送列表最多显示的收件人行数，超出部分只在发送时读取
+    TABLE_ROW_LIMIT = 5000
+    
     def __init__(self):
         super().__init__()
         # 连接激活窗口信号
@@ -67,6 +83,7 @@ class EmailSender(QMainWindow):
         self.logger = Logger()
         Logger.init_db(self.db)  # 设置数据库连接
         self.logger.info("邮件发送程序启动")
+        self.logger.info(f"启动耗时统计: 密钥派生 {CryptoUtils.key_derive_time * 1000:.0f} ms")
         
         # 设置窗口基本属性
         icon_path = get_resource_path('imgs/logo.ico')
@@ -86,6 +103,15 @@ class EmailSender(QMainWindow):
 
         self.send_thread = None
         self.test_thread = None  # 添加测试邮件线程
+        self.validate_thread = None  # 收件人检查线程
+        # 当前收件人文件及其摘要，用于中断后继续发送
+        self.source_file = None
+        self.source_hash = None
+        # 收件人数据源和总行数；self.df 只保存发送列表中显示的前几行
+        self.recipient_source = None
+        self.recipient_count = 0
+        # 已解析收件人文件的缓存
+        self.recipient_cache = RecipientCache()
 
         # 添加状态标签计时器
         self.status_timer = QTimer()
@@ -96,6 +122,7 @@ class EmailSender(QMainWindow):
         """延迟加载数据"""
         self.load_templates()
         self.load_last_sender()
+        self.check_unfinished_batch()
         
     def initUI(self):
         """初始化UI"""
@@ -150,7 +177,7 @@ class EmailSender(QMainWindow):
         
         # 文件菜单
         file_menu = menubar.addMenu('文件')
-        import_excel_action = file_menu.addAction('导入Excel')
+        import_excel_action = file_menu.addAction('导入收件人')
         import_excel_action.triggered.connect(self.import_excel)
         file_menu.addSeparator()
         exit_action = file_menu.addAction('退出')
@@ -178,33 +205,61 @@ class EmailSender(QMainWindow):
         about_action.triggered.connect(self.show_about)
 
     def import_excel(self):
-        """导入Excel文件"""
-        self.logger.info("开始导入Excel文件")
+        """导入收件人文件（Excel、CSV/TSV、Parquet/Feather）"""
+        self.logger.info("开始导入收件人文件")
         file_name, _ = QFileDialog.getOpenFileName(
             self,
-            "选择Excel文件",
+            "选择收件人文件",
             "",
-            "Excel Files (*.xlsx *.xls)"
+            FILE_FILTER
         )
         
         if not file_name:
-            self.set_status("用户取消导入Excel")
-            self.logger.info("用户取消导入Excel")
+            self.set_status("用户取消导入收件人文件")
+            self.logger.info("用户取消导入收件人文件")
             return
         
+        self.load_recipient_file(file_name)
+
+    def load_recipient_file(self, file_name):
+        """读取收件人文件并刷新发送列表
+        
+        只读取表头和前 TABLE_ROW_LIMIT 行用于显示和预览，其余行在发送时
+        由发送线程边读取边发送，内存占用与文件大小无关。
+        
+        Args:
+            file_name: 收件人文件路径（Excel、CSV/TSV、Parquet/Feather）
+            
+        Returns:
+            bool: 是否读取成功
+        """
         try:
-            self.df = pd.read_excel(file_name)
-            self.logger.info(f"成功导入Excel文件: {file_name}")
-            required_columns = ['姓名', '收件人邮箱']
+            # 同一文件再次导入时直接读取已解析的缓存
+            source_hash = self.recipient_cache.file_hash(file_name)
+            cache_path = self.recipient_cache.get(source_hash)
+            source = ArrowSource(cache_path) if cache_path else open_source(file_name)
             
             # 检查必需列
-            if not all(col in self.df.columns for col in required_columns):
-                MessageBox.show('错误', 'Excel文件必须包含：姓名、收件人邮箱', 'critical', parent=self)
+            if source.missing_columns():
+                MessageBox.show('错误', '收件人文件必须包含：姓名、收件人邮箱', 'critical', parent=self)
                 self.df = None
-                return
-            
-            # 将Excel表头添加到变量列表中
-            for column in self.df.columns:
+                return False
+            
+            self.df = source.head(self.TABLE_ROW_LIMIT)
+            self.recipient_source = source
+            # 行数来自文件信息，读取的行数少于显示上限时即为准确值
+            count = source.count()
+            if count is None or len(self.df) < self.TABLE_ROW_LIMIT:
+                count = len(self.df)
+            self.recipient_count = max(count, len(self.df))
+            self.source_file = file_name
+            self.source_hash = source_hash
+            if not cache_path:
+                self.recipient_cache.build_async(open_source(file_name), source_hash)
+            self.logger.info(f"成功导入收件人文件: {file_name}")
+            
+            # 将表头添加到变量列表中
+            for column in source.columns:
                 try:
                     # 检查变量是否已存在
                     variables = self.db.get_variables()
@@ -241,14 +296,20 @@ class EmailSender(QMainWindow):
             # 发出变量更新信号，更新所有相关UI
             self.on_variable_updated()
             
-            self.set_status(f'已导入 {len(self.df)} 条数据，并更新变量列表')
+            if self.recipient_count > len(self.df):
+                self.set_status(f'已导入 {self.recipient_count} 条数据（列表显示前 {len(self.df)} 条），并更新变量列表')
+            else:
+                self.set_status(f'已导入 {len(self.df)} 条数据，并更新变量列表')
+            return True
             
         except pd.errors.ParserError:
-            MessageBox.show('错误', 'Excel文件格式错误', 'critical', parent=self)
+            MessageBox.show('错误', '收件人文件格式错误', 'critical', parent=self)
             self.df = None
         except Exception as e:
             MessageBox.show('错误', f'导入失败：{str(e)}', 'critical', parent=self)
             self.df = None
+        self.recipient_source = None
+        return False
 
     def import_template(self):
         """导入模板"""
@@ -576,7 +637,7 @@ class EmailSender(QMainWindow):
 
     def preview_email(self):
         if not hasattr(self, 'df') or self.df is None or len(self.df.index) == 0:
-            MessageBox.show('提示', '请先到文件菜单导入Excel文件', 'warning', parent=self)
+            MessageBox.show('提示', '请先到文件菜单导入收件人文件', 'warning', parent=self)
             return
             
         try:
@@ -602,7 +663,8 @@ class EmailSender(QMainWindow):
             
             # 预览标题
             try:
-                preview_title = template['title'].format(**self.df.iloc[0])
+                data_dict = self.df.iloc[0].to_dict()
+                preview_title, content_html = TemplateRenderer.render(template, data_dict, template_name)
                 title_label = QLabel(f"邮件标题: {preview_title}")
                 preview_layout.addWidget(title_label)
             except Exception as e:
@@ -612,14 +674,6 @@ class EmailSender(QMainWindow):
                 
             # 预览正文
             try:
-                # 获取HTML内容并进行变量替换
-                content_html = template['content']
-                # 先处理变量替换
-                data_dict = self.df.iloc[0].to_dict()
-                for key, value in data_dict.items():
-                    placeholder = '{' + key + '}'
-                    content_html = content_html.replace(placeholder, str(value))
-                
                 # 创建预览文本框并设置HTML内容
                 preview_text = QTextEdit()
                 preview_text.setHtml(content_html)
@@ -750,17 +804,128 @@ class EmailSender(QMainWindow):
             template_name = self.template_combo.currentText()
             templates = self.db.get_templates()
             template = templates.get(template_name)
+            senders = self.get_rotation_senders() if self.rotation_check.isChecked() else [self.current_sender]
+            
+            # 批次定义，程序中断后按此继续发送
+            checkpoint = {
+                'source_file': self.source_file,
+                'source_hash': self.source_hash,
+                'template_name': template_name,
+                'template': {'title': template['title'], 'content': template['content']},
+                'senders': [sender['email'] for sender in senders],
+                'attachments': list(self.attachments)
+            }
+            
+            # 发送前检查收件人地址，问题地址不再占用SMTP连接
+            self.check_recipients(template, senders, checkpoint)
+        except Exception as e:
+            self.send_btn.setEnabled(True)
+            MessageBox.show('错误', f'发送失败：{str(e)}', 'critical', parent=self)
+
+    def check_recipients(self, template, senders, checkpoint):
+        """在后台线程中检查全部收件人地址，检查完成后开始发送
+        
+        离线检查格式、重复地址、临时邮箱和域名拼写错误，检查期间进度条显示已检查的行数。
+        
+        Args:
+            template: 模板，包含 title、content
+            senders: 发件人列表
+            checkpoint: 新批次的定义
+        """
+        self.send_btn.setEnabled(False)
+        self.progress_bar.setMaximum(self.recipient_count)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setFormat('正在检查收件人地址 - %p% (%v/%m)')
+        self.set_status('正在检查收件人地址...')
+        
+        self.validate_thread = ValidateRecipientsThread(self.recipient_source)
+        self.validate_thread.progress.connect(self.progress_bar.setValue)
+        self.validate_thread.finished.connect(
+            lambda report, error: self.on_recipients_checked(report, error, template, senders, checkpoint))
+        self.validate_thread.start()
+
+    def on_recipients_checked(self, report, error, template, senders, checkpoint):
+        """收件人检查完成处理
+        
+        发现问题时列出检查结果，由用户选择跳过哪些地址，然后开始发送。
+        
+        Args:
+            report: 检查报告，检查失败时为 None
+            error: 检查失败的原因
+            template: 模板，包含 title、content
+            senders: 发件人列表
+            checkpoint: 新批次的定义
+        """
+        self.send_btn.setEnabled(True)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setFormat('等待发送 - %p% (%v/%m)')
+        if report is None:
+            self.logger.error(f"收件人地址检查失败: {error}")
+            self.set_status('收件人地址检查失败')
+            MessageBox.show('错误', f'收件人地址检查失败：{error}', 'critical', parent=self)
+            return
+        
+        excluded_rows = self._confirm_skipped_rows(report)
+        if excluded_rows is None:
+            self.set_status('已取消发送')
+            return
+        # 跳过的行保存在检查点中，继续发送时同样跳过
+        checkpoint['excluded_rows'] = excluded_rows
+        self._start_batch(template, senders, checkpoint=checkpoint, excluded_rows=excluded_rows)
+
+    def _confirm_skipped_rows(self, report):
+        """列出收件人检查结果，由用户选择跳过哪些地址
+        
+        Args:
+            report: 检查报告
             
+        Returns:
+            dict: 需要跳过的行 {行号: 原因}；用户取消发送时返回 None
+        """
+        self.logger.info(f"收件人地址检查完成: 共 {report.total} 个，"
+                         f"问题地址 {report.blocking} 个，需要注意 {report.warnings} 个")
+        if not report.issues:
+            return {}
+        
+        if report.warnings:
+            buttons = [('跳过全部问题地址', QMessageBox.AcceptRole),
+                       ('只跳过无效和重复地址', QMessageBox.AcceptRole),
+                       ('取消发送', QMessageBox.RejectRole)]
+        else:
+            buttons = [('跳过问题地址并发送', QMessageBox.AcceptRole),
+                       ('取消发送', QMessageBox.RejectRole)]
+        reply = MessageBox.show('收件人检查', report.summary(), 'question', buttons, parent=self)
+        if reply == len(buttons) - 1:
+            return None
+        return report.skipped_rows(skip_warnings=(reply == 0))
+
+    def _start_batch(self, template, senders, checkpoint=None, batch_id=None, resume_states=None, completed=0,
+                     excluded_rows=None):
+        """创建发送线程并开始发送
+        
+        Args:
+            template: 模板，包含 title、content
+            senders: 发件人列表，多于一个时按轮换策略分配
+            checkpoint: 新批次的定义
+            batch_id: 继续发送时的原批次ID
+            resume_states: 继续发送时已开始发送的行
+            completed: 继续发送时已处理的邮件数
+            excluded_rows: 发送前检查决定跳过的行 {行号: 原因}
+        """
+        try:
             # 先更新UI状态，确保界面响应
-            self.progress_bar.setMaximum(len(self.df))
-            self.progress_bar.setValue(0)
+            self.progress_bar.setMaximum(self.recipient_count)
+            self.progress_bar.setValue(completed)
             self.progress_bar.setFormat('准备发送...')
             self.set_status('正在准备发送...')
             
             # 禁用相关控件
             self.sender_combo.setEnabled(False)
+            self.rotation_check.setEnabled(False)
+            self.rotation_btn.setEnabled(False)
             self.template_combo.setEnabled(False)
             self.test_btn.setEnabled(False)
+            self.worker_spin.setEnabled(False)
             
             # 更新发送按钮状态
             self.send_btn.setText('停止发送')
@@ -773,16 +938,35 @@ class EmailSender(QMainWindow):
                 self.send_thread.stop()
                 self.send_thread.wait()
             
+            send_settings = self.config.get_send_settings()
+            
             # 创建发送线程
             self.send_thread = SendEmailThread(
-                self.current_sender,
+                senders[0],
                 template,
-                self.df,
-                self.attachments
+                self.recipient_source,
+                self.attachments,
+                worker_count=self.worker_spin.value(),
+                transport=send_settings['transport'],
+                senders=senders,
+                strategy=send_settings['rotation_strategy'],
+                weights=send_settings['sender_weights'],
+                retry_policy=RetryPolicy(
+                    send_settings['retry_max_attempts'],
+                    send_settings['retry_base_delay'],
+                    send_settings['retry_max_delay']
+                ),
+                checkpoint=checkpoint,
+                batch_id=batch_id,
+                resume_states=resume_states,
+                excluded_rows=excluded_rows,
+                group_send=send_settings['group_send']
             )
             
             # 连接信号
             self.send_thread.progress_updated.connect(self.update_send_progress)
+            self.send_thread.total_updated.connect(self.update_send_total)
+            self.send_thread.stats_updated.connect(self.update_send_stats)
             self.send_thread.finished.connect(self.on_send_finished)
             
             # 启动线程
@@ -792,11 +976,102 @@ class EmailSender(QMainWindow):
             MessageBox.show('错误', f'发送失败：{str(e)}', 'critical', parent=self)
             self._reset_ui_state()
 
+    def check_unfinished_batch(self):
+        """启动时检查上次没有完成的批量发送，询问是否继续"""
+        try:
+            batches = self.db.get_unfinished_batches()
+            if not batches:
+                return
+            
+            batch = batches[0]
+            states = self.db.get_batch_row_states(batch['batch_id'])
+            reply = MessageBox.show(
+                '继续发送',
+                f"上次的批量发送没有完成（批次 {batch['batch_id']}，"
+                f"已处理 {len(states)}/{batch['total_rows']} 封）。\n"
+                f"收件人文件：{batch['source_file']}\n\n是否继续发送剩余的邮件？",
+                'question',
+                [('继续发送', QMessageBox.AcceptRole),
+                 ('以后再说', QMessageBox.RejectRole),
+                 ('放弃该批次', QMessageBox.DestructiveRole)],
+                parent=self
+            )
+            if reply == 0:
+                self.resume_batch(batch, states)
+            elif reply == 2:
+                self.db.update_batch_status(batch['batch_id'], BATCH_ABANDONED)
+                self.set_status(f"已放弃批次 {batch['batch_id']}")
+        except Exception as e:
+            self.logger.error(f"检查未完成批次失败: {str(e)}")
+
+    def resume_batch(self, batch, states):
+        """按批次检查点继续发送
+        
+        源文件必须与中断前完全一致，才能按行号跳过已发送的收件人。
+        
+        Args:
+            batch: 批次信息，见 Database.get_unfinished_batches
+            states: 已开始发送的行 {行号: (收件人邮箱, 状态)}
+        """
+        definition = batch['definition']
+        source_file = batch['source_file']
+        if not source_file or not os.path.exists(source_file):
+            MessageBox.show('提示', f'找不到收件人文件：{source_file}，无法继续发送', 'warning', parent=self)
+            return
+        if self.recipient_cache.file_hash(source_file) != batch['source_hash']:
+            MessageBox.show('提示', '收件人文件在中断后已被修改，无法按原来的进度继续发送', 'warning', parent=self)
+            return
+        
+        all_senders = {sender['email']: sender for sender in self.config.get_sender_list()}
+        senders = [all_senders[email] for email in definition['senders'] if email in all_senders]
+        if not senders:
+            MessageBox.show('提示', '该批次使用的发件人已被删除，无法继续发送', 'warning', parent=self)
+            return
+        
+        missing = [path for path in definition['attachments'] if not os.path.exists(path)]
+        if missing:
+            MessageBox.show('提示', '以下附件不存在，无法继续发送：\n' + '\n'.join(missing), 'warning', parent=self)
+            return
+        
+        if not self.load_recipient_file(source_file):
+            return
+        self.attachments = list(definition['attachments'])
+        
+        # 界面显示该批次的模板和发件人
+        index = self.template_combo.findText(definition.get('template_name', ''))
+        if index >= 0:
+            self.template_combo.setCurrentIndex(index)
+        index = self.sender_combo.findText(senders[0]['email'])
+        if index >= 0:
+            self.sender_combo.setCurrentIndex(index)
+        
+        # 显示已处理行的状态
+        state_text = {
+            ROW_SENT: '发送成功',
+            ROW_FAILED: '发送失败',
+            ROW_RETRY: '等待重试',
+            ROW_SENDING: '发送状态未知',
+            ROW_UNKNOWN: '发送状态未知'
+        }
+        for row, (email, state) in states.items():
+            self._set_row_status(row, state_text.get(state, state))
+        
+        completed = sum(1 for email, state in states.values() if state != ROW_RETRY)
+        self.logger.info(f"继续发送批次 {batch['batch_id']}，已处理 {completed} 封")
+        # 检查点中的行号保存为字符串
+        excluded_rows = {int(row): reason for row, reason in definition.get('excluded_rows', {}).items()}
+        self._start_batch(definition['template'], senders, batch_id=batch['batch_id'],
+                          resume_states=states, completed=completed, excluded_rows=excluded_rows)
+
     def _reset_ui_state(self):
         """重置UI状态"""
         self.sender_combo.setEnabled(True)
+        self.rotation_check.setEnabled(True)
+        self.rotation_btn.setEnabled(True)
         self.template_combo.setEnabled(True)
         self.test_btn.setEnabled(True)
+        self.worker_spin.setEnabled(True)
+        self.send_btn.setEnabled(True)
         self.send_btn.setText('开始发送')
         if self.send_btn.receivers(self.send_btn.clicked) > 0:
             self.send_btn.clicked.disconnect()
@@ -809,27 +1084,24 @@ class EmailSender(QMainWindow):
             self.send_btn.setEnabled(False)
             self.send_thread.stop()
 
-    def update_send_progress(self, current, status, error):
-        """更新发送进度"""
+    def update_send_progress(self, row_number, completed, status, error):
+        """更新发送进度
+        
+        Args:
+            row_number: 收件人所在行号（从1开始）
+            completed: 已完成的邮件数
+            status: 发送状态
+            error: 错误信息
+        """
         try:
             # 使用 QTimer 延迟更新UI
             def _update():
                 try:
-                    self.progress_bar.setValue(current)
-                    self.progress_bar.setFormat(f'正在发送 - %p% ({current}/{self.progress_bar.maximum()})')
+                    self.progress_bar.setValue(completed)
+                    self.progress_bar.setFormat(f'正在发送 - %p% ({completed}/{self.progress_bar.maximum()})')
                     
                     # 更新日志表格
-                    row = current - 1
-                    if 0 <= row < self.log_table.rowCount():
-                        status_item = self.log_table.item(row, 2)
-                        if status_item:
-                            status_item.setText(status)
-                            # 修改这里的颜色判断逻辑
-                            if status == '发送成功':  # 精确匹配"发送成功"
-                                status_item.setForeground(QBrush(QColor('#52c41a')))  # 绿色
-                            else:
-                                status_item.setForeground(QBrush(QColor('#ff4d4f')))  # 红色
-                                status_item.setToolTip(error)  # 设置错误提示
+                    self._set_row_status(row_number - 1, status, error)
                 except Exception as e:
                     self.logger.error(f"更新UI失败: {str(e)}")
             
@@ -838,6 +1110,52 @@ class EmailSender(QMainWindow):
         except Exception as e:
             self.logger.error(f"更新进度失败: {str(e)}")
 
+    def _set_row_status(self, row, status, error=''):
+        """更新发送列表中一行的状态
+        
+        Args:
+            row: 行号（从0开始）
+            status: 发送状态
+            error: 错误信息
+        """
+        if 0 <= row < self.log_table.rowCount():
+            status_item = self.log_table.item(row, 2)
+            if status_item:
+                status_item.setText(status)
+                # 修改这里的颜色判断逻辑
+                if status == '发送成功':  # 精确匹配"发送成功"
+                    status_item.setForeground(QBrush(QColor('#52c41a')))  # 绿色
+                elif status.startswith('等待重试'):
+                    status_item.setForeground(QBrush(QColor('#faad14')))  # 橙色
+                    status_item.setToolTip(error)
+                elif status.startswith('已跳过'):
+                    status_item.setForeground(QBrush(QColor('#999999')))  # 浅灰色
+                    status_item.setToolTip(error)
+                else:
+                    status_item.setForeground(QBrush(QColor('#ff4d4f')))  # 红色
+                    status_item.setToolTip(error)  # 设置错误提示
+
+    def update_send_total(self, total):
+        """发送线程读完收件人文件后，用实际行数更新进度条"""
+        self.recipient_count = total
+        self.progress_bar.setMaximum(total)
+
+    def update_send_stats(self, stats):
+        """更新实时发送统计
+        
+        Args:
+            stats: 节流状态，见 AdaptiveThrottle.stats
+        """
+        try:
+            self.stats_label.setText(
+                f"并发 {stats['concurrency']}/{stats['max_concurrency']} | "
+                f"速率 {stats['rate_factor']:.0%} | "
+                f"成功 {stats['sent']} 失败 {stats['failed']} 延迟 {stats['deferred']} | "
+                f"{stats['throughput']:.1f} 封/秒"
+            )
+        except Exception as e:
+            self.logger.error(f"更新发送统计失败: {str(e)}")
+
     def on_send_finished(self, success, message):
         """发送完成处理"""
         try:
@@ -890,15 +1208,8 @@ class EmailSender(QMainWindow):
                 else:
                     test_data = self.config.get_test_data()
                 
-                # 替换标题中的变量
-                title = template['title']
-                for var, value in test_data.items():
-                    title = title.replace(f'{{{var}}}', str(value))
-                    
-                # 替换内容中的变量
-                content = template['content']
-                for var, value in test_data.items():
-                    content = content.replace(f'{{{var}}}', str(value))
+                # 替换标题和内容中的变量
+                title, content = TemplateRenderer.render(template, test_data or {}, template_name)
                     
                 # 更新预览
                 self.preview_title.setText(title)
@@ -942,17 +1253,8 @@ class EmailSender(QMainWindow):
                         test_data = {var: f'测试{var}' for var in variables}
                         self.config.save_test_data(test_data)
                 
-                # 替换标题中的变量
-                title = template['title']
-                for key, value in test_data.items():
-                    placeholder = '{' + key + '}'
-                    title = title.replace(placeholder, str(value))
-                
-                # 替换内容中的变量
-                content = template['content']
-                for key, value in test_data.items():
-                    placeholder = '{' + key + '}'
-                    content = content.replace(placeholder, str(value))
+                # 替换标题和内容中的变量
+                title, content = TemplateRenderer.render(template, test_data, template_name)
                 
                 # 更新预览
                 self.preview_title.setText(title)
@@ -974,6 +1276,28 @@ class EmailSender(QMainWindow):
         if self.current_sender:
             self.config.save_last_sender(self.current_sender['email'])
 
+    def on_rotation_toggled(self, checked):
+        """切换多发件人轮换模式"""
+        self.config.save_send_settings(rotation_enabled=checked)
+        if checked and not self.get_rotation_senders():
+            self.manage_rotation()
+
+    def manage_rotation(self):
+        """打开多发件人轮换设置对话框"""
+        dialog = SenderRotationDialog(self, self.config)
+        if dialog.exec_() == QDialog.Accepted:
+            count = len(self.get_rotation_senders())
+            self.set_status(f'已设置 {count} 个轮换发件人')
+
+    def get_rotation_senders(self):
+        """获取参与轮换的发件人列表"""
+        selected = self.config.get_send_settings()['rotation_senders']
+        return [sender for sender in self.config.get_sender_list() if sender['email'] in selected]
+
+    def on_worker_count_changed(self, value):
+        """保存并发连接数"""
+        self.config.save_send_settings(workers=value)
+
     def load_last_sender(self):
         """加载发件人列表并选择最后一个"""
         self.update_sender_list()
@@ -1054,13 +1378,17 @@ class EmailSender(QMainWindow):
     def check_send_conditions(self):
         """检查发送条件"""
         if not hasattr(self, 'df') or self.df is None or len(self.df.index) == 0:
-            MessageBox.show('提示', '请在文件菜单 - 导入Excel文件', 'warning', parent=self)
+            MessageBox.show('提示', '请在文件菜单 - 导入收件人', 'warning', parent=self)
             return False
         
         if not self.current_sender:
             MessageBox.show('提示', '请在工具菜单 - 发件人管理中添加发件人', 'warning', parent=self)
             return False
 
+        if self.rotation_check.isChecked() and not self.get_rotation_senders():
+            MessageBox.show('提示', '请点击发件人旁的设置按钮选择轮换发件人', 'warning', parent=self)
+            return False
+
         if not self.template_combo.currentText():
             MessageBox.show('提示', '请在工具菜单 - 模板管理中添加邮件模板', 'warning', parent=self)
             return False
@@ -1161,8 +1489,18 @@ class EmailSender(QMainWindow):
         self.sender_combo.setMinimumWidth(200)
         self.sender_combo.currentIndexChanged.connect(self.on_sender_changed)
         
+        # 多发件人轮换
+        self.rotation_check = QCheckBox('轮换')
+        self.rotation_check.setToolTip('批量发送时将收件人分配给多个发件人')
+        self.rotation_check.setChecked(self.config.get_send_settings()['rotation_enabled'])
+        self.rotation_check.toggled.connect(self.on_rotation_toggled)
+        self.rotation_btn = QPushButton('设置')
+        self.rotation_btn.clicked.connect(self.manage_rotation)
+        
         sender_layout.addWidget(QLabel('发件人:'))
         sender_layout.addWidget(self.sender_combo, 1)
+        sender_layout.addWidget(self.rotation_check)
+        sender_layout.addWidget(self.rotation_btn)
 
         # 模板选择组
         template_group = QWidget()
@@ -1188,6 +1526,18 @@ class EmailSender(QMainWindow):
         self.send_btn = QPushButton('开始发送')
         self.send_btn.clicked.connect(self.start_sending)
         
+        # 并发连接数
+        self.worker_spin = QSpinBox()
+        if self.config.get_send_settings()['transport'] == 'asyncio':
+            self.worker_spin.setRange(1, SendEmailThread.MAX_ASYNC_SESSIONS)
+        else:
+            self.worker_spin.setRange(1, SendEmailThread.MAX_WORKERS)
+        self.worker_spin.setValue(self.config.get_send_settings()['workers'])
+        self.worker_spin.setToolTip('同时发送的连接数，每个连接独立登录发件邮箱')
+        self.worker_spin.valueChanged.connect(self.on_worker_count_changed)
+        
+        button_layout.addWidget(QLabel('并发:'))
+        button_layout.addWidget(self.worker_spin)
         button_layout.addWidget(self.test_btn)
         button_layout.addWidget(self.send_btn)
 
@@ -1203,8 +1553,13 @@ class EmailSender(QMainWindow):
         self.progress_bar.setMinimumHeight(25)
         self.progress_bar.setFormat('等待发送 - %p% (%v/%m)')
         
+        # 实时发送统计（并发数、速率、成功/失败/延迟数量）
+        self.stats_label = QLabel('')
+        self.stats_label.setStyleSheet('color: #666666;')
+        
         progress_layout.addWidget(progress_label)
         progress_layout.addWidget(self.progress_bar)
+        progress_layout.addWidget(self.stats_label)
 
         # 发送日志区域
         log_group = QWidget()
@@ -1453,7 +1808,8 @@ class EmailSender(QMainWindow):
                 'subject',
                 'status',
                 'error_message',
-                'send_time'
+                'send_time',
+                'server_response'
             ])
             
             # 重新组织要导出的列
@@ -1464,7 +1820,8 @@ class EmailSender(QMainWindow):
                 'recipient_name',
                 'subject',
                 'status',
-                'error_message'
+                'error_message',
+                'server_response'
             ]]
             
             # 重命名列
@@ -1475,7 +1832,8 @@ class EmailSender(QMainWindow):
                 '收件人姓名',
                 '邮件主题',
                 '发送状态',
-                '错误信息'
+                '错误信息',
+                '服务器响应'
             ]
             
             file_name = f'发送结果_{batch_id}.xlsx'
@@ -1525,6 +1883,22 @@ class EmailSender(QMainWindow):
         self.status_timer.stop()
         self.status_timer.start(10000)  # 10秒后自动隐藏
 
+class ValidateRecipientsThread(QThread):
+    """收件人地址检查线程"""
+    progress = pyqtSignal(int)  # 已检查的行数
+    finished = pyqtSignal(object, str)  # 检查报告（失败时为 None）, 错误信息
+    
+    def __init__(self, source):
+        super().__init__()
+        self.source = source
+        
+    def run(self):
+        try:
+            report = validate_source(self.source, progress=self.progress.emit)
+            self.finished.emit(report, '')
+        except Exception as e:
+            self.finished.emit(None, str(e))
+
 class TestEmailThread(QThread):
     """测试邮件发送线程"""
     finished = pyqtSignal(bool, str)  # 成功标志, 消息
@@ -1542,13 +1916,7 @@ class TestEmailThread(QThread):
             self.test_data['收件人邮箱'] = self.sender['email']
             
             # 替换模板中的变量
-            content = self.template['content']
-            title = self.template['title']
-            
-            for key, value in self.test_data.items():
-                placeholder = '{' + key + '}'
-                title = title.replace(placeholder, str(value))
-                content = content.replace(placeholder, str(value))
+            title, content = TemplateRenderer.render(self.template, self.test_data)
             
             # 创建邮件服务器连接
             server = EmailServer(
@@ -1572,151 +1940,1083 @@ class TestEmailThread(QThread):
             self.finished.emit(False, str(e))
 
 class SendEmailThread(QThread):
-    """邮件发送线程"""
-    progress_updated = pyqtSignal(int, str, str)  # 进度, 状态, 错误信息
+    """邮件发送线程
+
+    由一个生产线程渲染邮件任务，多个发送线程（各自持有独立的 SMTP 连接）
+    并行消费任务队列；发送结果统一回到本线程，按行顺序发出进度信号并写入日志。
+    使用异步传输时，所有连接在同一个事件循环线程中并发运行。
+    临时性失败的邮件写入数据库重试队列，到期后由本线程重新放入任务队列，
+    与尚未发送的邮件一起继续发送。
+    模板不含变量时使用群发模式：一封邮件的信封中包含多个收件人，每个收件人的
+    接受或拒绝结果分别记录。
+    每行交给SMTP服务器前先记录检查点，程序中断后可以从未发送的行继续，
+    已发送或可能已送达的行不会再次发送。
+    """
+    progress_updated = pyqtSignal(int, int, str, str)  # 行号, 已完成数, 状态, 错误信息
+    total_updated = pyqtSignal(int)  # 收件人文件读完后的实际行数
+    stats_updated = pyqtSignal(dict)  # 自适应节流状态，见 AdaptiveThrottle.stats
     finished = pyqtSignal(bool, str)  # 是否成功, 消息
     
-    def __init__(self, sender, template, df, attachments=None):
+    # 最大并发连接数
+    MAX_WORKERS = 20
+    # 异步传输下的最大并发连接数
+    MAX_ASYNC_SESSIONS = 50
+    # 发送统计刷新间隔（秒）
+    STATS_INTERVAL = 1
+    # 检查到期重试任务的间隔（秒）
+    RETRY_CHECK_INTERVAL = 1
+    # 每次批量渲染的收件人行数
+    RENDER_CHUNK_SIZE = 1000
+    # 群发时等待凑齐一封邮件收件人的最长时间（秒）
+    GROUP_WAIT = 0.2
+    
+    def __init__(self, sender, template, source, attachments=None, worker_count=1, transport='smtplib',
+                 senders=None, strategy='round_robin', weights=None, retry_policy=None,
+                 checkpoint=None, batch_id=None, resume_states=None, excluded_rows=None, group_send=False):
+        """初始化发送线程
+        
+        Args:
+            source: 收件人数据源（RecipientSource），也可以直接传入 DataFrame
+            checkpoint: 新批次的定义（源文件、模板、发件人、附件），保存到批次检查点
+            batch_id: 继续发送时的原批次ID，新批次为 None
+            resume_states: 继续发送时已开始发送的行 {行号: (收件人邮箱, 状态)}
+            excluded_rows: 发送前检查决定跳过的行 {行号: 原因}，不发送、记为已跳过
+            group_send: 模板不含变量时是否使用群发模式
+        """
         super().__init__()
-        self.sender = sender
+        # 多发件人轮换时，邮件按策略分配给各发件人；否则全部使用 sender
+        self.senders = senders or [sender]
+        self.sender = self.senders[0]
+        self.sender_pool = SenderPool(self.senders, strategy, weights)
+        self.rate_limiter = None
+        self.skeleton = None
         self.template = template
-        self.df = df
+        # 收件人由生产线程按批读取，边读取边发送
+        self.source = DataFrameSource(source) if isinstance(source, pd.DataFrame) else source
+        # 标题和内容都不引用收件人列时，所有收件人的邮件完全相同，可以一封邮件发给多个收件人。
+        # 没有对应列的占位符（如导入模板中样式表的大括号）渲染时原样保留，不影响群发
+        variables = (TemplateRenderer.compile('batch.title', template['title']).variables
+                     + TemplateRenderer.compile('batch.content', template['content']).variables)
+        self.grouped = group_send and not set(variables) & set(self.source.columns)
         self.attachments = attachments or []
+        self.transport = transport
+        max_workers = self.MAX_ASYNC_SESSIONS if transport == 'asyncio' else self.MAX_WORKERS
+        self.worker_count = min(max(1, int(worker_count)), max_workers)
+        # 服务器返回临时性错误时自动降低并发数和速率，之后逐步恢复
+        self.throttle = AdaptiveThrottle(self.worker_count)
+        self.retry_policy = retry_policy or RetryPolicy()
         self.is_running = True
-        self.server = None
-        self.task_queue = Queue()
+        # 任务队列限制长度，避免提前渲染整批邮件占用内存
+        self.task_queue = Queue(maxsize=self.worker_count * 10)
         self.result_queue = Queue()
-        self.batch_id = f"BATCH_{datetime.now().strftime('%Y%m%d%H%M%S')}"  # 添加批次ID
-        self.db = Database()  # 添加数据库实例
+        self.completed = 0
+        self.produced = 0
+        # 本次运行已得到结果的行数，以及应处理的行数（生产线程读完全部收件人后确定）
+        self.handled_rows = 0
+        self.expected_rows = None
+        self.producer_error = ''
+        # 所有发件人都达到每日发送上限时的提示，批次因此暂停
+        self.quota_error = ''
+        self.retry_waiting = 0
+        self.first_error = ''
+        # 批次ID：时间加随机后缀，同一秒内开始的批次也不会重复
+        self.batch_id = batch_id or f"BATCH_{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self.checkpoint = checkpoint
+        self.resume_states = resume_states or {}
+        # 继续发送时跳过的行：已有结果、可能已送达，或已在重试队列中
+        self.skip_rows = {row for row, (email, state) in self.resume_states.items()
+                          if state in DONE_STATES or state == ROW_RETRY}
+        self.excluded_rows = excluded_rows or {}
+        self.db = Database()  # 共享的数据库实例，每个线程使用自己的连接
         
     def run(self):
         """运行发送任务"""
         try:
-            # 创建工作线程
-            worker_thread = threading.Thread(target=self._send_worker)
-            worker_thread.daemon = True
-            worker_thread.start()
+            # 按服务器类型和发件人限速，今天已发送的数量计入每日上限
+            self.rate_limiter = RateLimiter(
+                self.db.get_smtp_servers(),
+                self.db.get_sent_counts_today()
+            )
             
-            # 添加任务到队列
-            total = len(self.df)
-            for index, row in self.df.iterrows():
-                if not self.is_running:
-                    break
-                self.task_queue.put((index, row))
+            # 附件在批次开始时读取并编码一次，所有邮件共用
+            self.skeleton = MessageSkeleton(self.attachments)
             
-            # 等待所有任务完成或停止
-            while self.is_running:
-                if self.task_queue.empty() and not worker_thread.is_alive():
-                    break
-                QThread.msleep(100)
-            
-            # 处理结果
-            success = True
-            error_msg = ""
-            while not self.result_queue.empty():
-                result = self.result_queue.get()
-                if not result[0]:  # 如果有任何失败
-                    success = False
-                    error_msg = result[1]
-                    break
+            self._init_checkpoint()
             
-            if self.is_running:
-                self.finished.emit(success, error_msg or '发送完成')
+            workers = []
+            if self.transport == 'asyncio':
+                # 所有连接在同一个事件循环线程中运行
+                worker = threading.Thread(target=self._async_send_loop)
+                worker.daemon = True
+                worker.start()
+                workers.append(worker)
             else:
+                # 启动发送线程，每个线程持有一个独立的邮件服务器连接
+                for worker_id in range(self.worker_count):
+                    worker = threading.Thread(target=self._send_worker, args=(worker_id,))
+                    worker.daemon = True
+                    worker.start()
+                    workers.append(worker)
+            
+            # 启动任务生产线程
+            producer = threading.Thread(target=self._produce_tasks)
+            producer.daemon = True
+            producer.start()
+            
+            # 收集发送结果并调度重试，直到全部邮件处理完毕
+            self._collect_results(producer, workers)
+            # 批次结束前写入全部发送日志
+            self._flush_send_logs()
+            
+            if self.producer_error:
+                # 收件人没有全部读取，批次记为已停止，之后可以继续发送
+                self._set_batch_status(BATCH_STOPPED)
+                self.finished.emit(False, self.producer_error)
+            elif self.quota_error:
+                # 剩余的行没有发送，额度恢复后可以继续发送
+                self._set_batch_status(BATCH_STOPPED)
+                self.finished.emit(False, self.quota_error)
+            elif self.is_running and not self._all_rows_handled():
+                # 发送线程异常退出，部分行没有发送，批次记为已停止，之后可以继续发送
+                self.is_running = False
+                message = '发送线程异常退出，部分收件人没有发送，可以继续发送剩余收件人'
+                Logger().error(f"{message}（已处理 {self.handled_rows}/{self.expected_rows or '未知'} 行）")
+                self._set_batch_status(BATCH_STOPPED)
+                self.finished.emit(False, message)
+            elif self.is_running:
+                self._set_batch_status(BATCH_COMPLETED)
+                self.finished.emit(not self.first_error, self.first_error or '发送完成')
+            else:
+                self._set_batch_status(BATCH_STOPPED)
                 self.finished.emit(False, '用户停止发送')
                 
         except Exception as e:
+            self._flush_send_logs()
+            self._set_batch_status(BATCH_STOPPED)
             self.finished.emit(False, str(e))
     
-    def _send_worker(self):
-        """邮件发送工作线程"""
+    def _all_rows_handled(self):
+        """本次运行应处理的行是否都已得到最终结果（没有等待重试的行）"""
+        return (self.expected_rows is not None and self.handled_rows >= self.expected_rows
+                and not self.retry_waiting)
+    
+    def _flush_send_logs(self):
+        """等待发送日志写入数据库，失败时只记录日志"""
         try:
-            # 创建邮件服务器连接
-            self.server = EmailServer(
-                self.sender['email'],
-                self.sender['password'],
-                self.sender.get('server_type')
+            if not self.db.flush_send_logs():
+                Logger().warning("部分发送日志未能写入（等待超时或写入失败）")
+        except Exception as e:
+            Logger().error(f"写入发送日志失败: {str(e)}")
+    
+    def _init_checkpoint(self):
+        """新批次保存检查点；继续发送时处理上次中断时正在发送的行
+        
+        上次中断时状态仍为“发送中”的行无法确定是否已送达，为避免重复发送，
+        记为状态未知并跳过，同时移除这些行的重试任务。
+        """
+        if self.checkpoint is not None:
+            self.db.create_batch_checkpoint(
+                self.batch_id,
+                self.checkpoint.get('source_file'),
+                self.checkpoint.get('source_hash'),
+                self.source.count() or 0,
+                self.checkpoint
             )
+            return
+        
+        self.db.update_batch_status(self.batch_id, BATCH_RUNNING)
+        for row, (email, state) in sorted(self.resume_states.items()):
+            if state == ROW_RETRY:
+                continue
+            if state == ROW_SENDING:
+                self.db.remove_retry_jobs_for_row(self.batch_id, row)
+                self.db.set_batch_row_state(self.batch_id, row, email, ROW_UNKNOWN)
+                self.db.add_send_log(
+                    batch_id=self.batch_id,
+                    sender_email=self.sender['email'],
+                    recipient_email=email,
+                    recipient_name='',
+                    subject='',
+                    status='发送状态未知',
+                    error_message='上次发送中断，无法确定是否已送达，已跳过'
+                )
+            self.completed += 1
+    
+    def _set_batch_status(self, status):
+        """更新批次状态，失败时只记录日志"""
+        try:
+            self.db.update_batch_status(self.batch_id, status)
+        except Exception as e:
+            Logger().error(f"更新批次状态失败: {str(e)}")
+    
+    def _mark_sending(self, db, task):
+        """在邮件交给SMTP服务器之前记录检查点
+        
+        Args:
+            db: 当前发送线程自己的数据库实例
+            task: 邮件任务
+        """
+        try:
+            db.set_batch_row_state(self.batch_id, task['row'], task['email'], ROW_SENDING)
+        except Exception as e:
+            Logger().error(f"记录发送检查点失败: {str(e)}")
+    
+    def stop(self):
+        """停止发送"""
+        self.is_running = False
+    
+    def _put_task(self, task):
+        """向任务队列添加任务，队列已满时等待，停止发送时放弃
+        
+        Returns:
+            bool: 是否添加成功
+        """
+        while self.is_running:
+            try:
+                self.task_queue.put(task, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+    
+    def _next_task(self):
+        """从任务队列获取下一个任务
+        
+        Returns:
+            dict: 邮件任务，队列结束或停止发送时返回 None
+        """
+        while self.is_running:
+            try:
+                return self.task_queue.get(timeout=0.1)
+            except Empty:
+                continue
+        return None
+    
+    def _wait(self, seconds):
+        """等待指定秒数，停止发送时提前返回"""
+        deadline = time.time() + seconds
+        while self.is_running:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            QThread.msleep(max(1, int(min(remaining, 0.1) * 1000)))
+    
+    async def _async_wait(self, seconds):
+        """异步等待指定秒数，停止发送时提前返回"""
+        deadline = time.time() + seconds
+        while self.is_running:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(remaining, 0.1))
+    
+    def _stop_for_quota(self):
+        """所有发件人都已达到每日发送上限：停止发送，剩余的行保持未发送
+        
+        批次记为已停止，额度恢复后（如第二天）可以继续发送剩余的收件人。
+        """
+        if not self.quota_error:
+            self.quota_error = '所有发件人都已达到每日发送上限，批次已暂停，额度恢复后可继续发送剩余收件人'
+            Logger().warning(self.quota_error)
+        self.is_running = False
+    
+    def _refund_quota(self, sender, server, success, count=1):
+        """邮件内容没有交给服务器时退还预约的每日额度
+        
+        Args:
+            sender: 发件人信息
+            server: 邮件服务器连接，创建连接失败时为 None
+            success: 是否发送成功
+            count: 退还的收件人数
+        """
+        if count and not success and (server is None or server.data_state == server.DATA_PENDING):
+            self.rate_limiter.refund(sender, count)
+    
+    def _reserve_sender(self, task):
+        """为任务选择发件人并预约发送额度
+        
+        所有发件人都没有额度时停止发送（见 _stop_for_quota）。
+        
+        Returns:
+            tuple: (发件人信息, 需要等待的秒数)，没有可用额度时发件人为 None
+        """
+        while True:
+            sender = self.sender_pool.acquire(self.rate_limiter.has_quota)
+            if sender is None:
+                self._stop_for_quota()
+                return None, 0
+            
+            delay = self.rate_limiter.reserve(sender, self.throttle.rate_factor)
+            if delay is not None:
+                break
+            # 其他线程刚用完该发件人的额度，换一个发件人
+            self.sender_pool.release(sender)
+        
+        task['sender_email'] = sender['email']
+        return sender, delay
+    
+    def _take_group_tasks(self, count):
+        """从任务队列中再取出最多 count 个任务，与当前任务合并为一封群发邮件
+        
+        最多等待 GROUP_WAIT 秒，让生产线程补充任务；取到结束标记时放回队列。
+        
+        Returns:
+            list: 邮件任务列表
+        """
+        tasks = []
+        deadline = time.time() + self.GROUP_WAIT
+        while len(tasks) < count and self.is_running:
+            remaining = deadline - time.time()
+            try:
+                if remaining > 0:
+                    task = self.task_queue.get(timeout=remaining)
+                else:
+                    task = self.task_queue.get_nowait()
+            except Empty:
+                break
+            if task is None:
+                self.task_queue.put(None)
+                break
+            tasks.append(task)
+        return tasks
+    
+    async def _async_take_group_tasks(self, count):
+        """异步取出同组任务，不阻塞事件循环，见 _take_group_tasks"""
+        tasks = []
+        deadline = time.time() + self.GROUP_WAIT
+        while len(tasks) < count and self.is_running:
+            try:
+                task = self.task_queue.get_nowait()
+            except Empty:
+                if time.time() >= deadline:
+                    break
+                await asyncio.sleep(0.01)
+                continue
+            if task is None:
+                self.task_queue.put(None)
+                break
+            tasks.append(task)
+        return tasks
+    
+    def _acquire_group_sender(self, servers, server_class):
+        """为群发选择发件人和连接，并确定一封邮件最多的收件人数
+        
+        Args:
+            servers: 当前发送线程（协程）的连接 {发件人邮箱: 连接}
+            server_class: 连接类型，EmailServer 或 AsyncEmailServer
             
+        Returns:
+            tuple: (发件人信息, 连接, 收件人数上限, 错误信息)，没有可用发件人时发件人为 None；
+                所有发件人都没有额度时停止发送（见 _stop_for_quota）
+        """
+        sender = self.sender_pool.acquire(self.rate_limiter.has_quota)
+        if sender is None:
+            self._stop_for_quota()
+            return None, None, 0, ''
+        
+        try:
+            server = servers.get(sender['email'])
+            if server is None:
+                server = server_class(sender['email'], sender['password'], sender.get('server_type'))
+                servers[sender['email']] = server
+            size = server.get_recipient_limit()
+        except Exception as e:
+            self.sender_pool.release(sender)
+            return None, None, 0, str(e)
+        
+        # 每日上限按收件人数计算
+        remaining = self.rate_limiter.remaining(sender)
+        if remaining is not None:
+            size = max(1, min(size, remaining))
+        return sender, server, size, ''
+    
+    def _reserve_group(self, sender, tasks):
+        """为一组收件人预约发送额度
+        
+        Returns:
+            float: 需要等待的秒数，额度不足时为 None（此时停止发送，见 _stop_for_quota）
+        """
+        delay = self.rate_limiter.reserve(sender, self.throttle.rate_factor, len(tasks))
+        if delay is None:
+            self.sender_pool.release(sender)
+            self._stop_for_quota()
+            return None
+        
+        for task in tasks:
+            task['sender_email'] = sender['email']
+        return delay
+    
+    def _put_group_results(self, tasks, success, message, refused, code, transient):
+        """将群发结果拆分为每个收件人的结果
+        
+        Args:
+            tasks: 同一封邮件的任务列表
+            success: 邮件是否被服务器接受
+            message: 发送结果消息
+            refused: 被拒绝的收件人 {邮箱: (响应码, 错误信息)}
+            code: 整封邮件的SMTP响应码
+            transient: 整封邮件失败时是否为临时性错误
+        """
+        for task in tasks:
+            if task['email'] in refused:
+                refused_code, refused_message = refused[task['email']]
+                self.throttle.record(False, refused_code)
+                self.result_queue.put((task, False, refused_message, 400 <= refused_code < 500))
+            else:
+                self.throttle.record(success, code)
+                self.result_queue.put((task, success, message, transient if not success else False))
+    
+    def _send_group(self, task, servers, db):
+        """群发模式：一封邮件发给一组收件人（调用前已占用并发名额）
+        
+        Args:
+            task: 第一个邮件任务
+            servers: 当前发送线程的连接 {发件人邮箱: 连接}
+            db: 当前发送线程自己的数据库实例
+            
+        Returns:
+            bool: 是否继续发送
+        """
+        tasks = [task]
+        sender, server, size, error = self._acquire_group_sender(servers, EmailServer)
+        if sender is not None:
+            tasks += self._take_group_tasks(size - 1)
+            delay = self._reserve_group(sender, tasks)
+            if delay is None:
+                sender = None
+        if sender is None:
+            self.throttle.release()
+            if self.quota_error:
+                # 额度已用完，这些行保持未发送
+                return False
+            for item in tasks:
+                self.result_queue.put((item, False, error, False))
+            return True
+        
+        # 按限速要求等待
+        self._wait(delay)
+        if not self.is_running:
+            self.rate_limiter.refund(sender, len(tasks))
+            self.sender_pool.release(sender)
+            self.throttle.release()
+            return False
+        
+        for item in tasks:
+            self._mark_sending(db, item)
+        start_time = time.time()
+        refused, code, transient = {}, None, False
+        try:
+            success, message, refused = server.send_group(
+                [item['email'] for item in tasks],
+                task['subject'],
+                task['content'],
+                skeleton=self.skeleton
+            )
+            code, transient = server.last_code, server.last_transient
+            for item in tasks:
+                item['server_response'] = server.last_response
+        except Exception as e:
+            success, message = False, str(e)
+        finally:
+            self.sender_pool.release(sender, time.time() - start_time)
+            self.throttle.release()
+        
+        # 没有交给服务器的邮件、被拒绝的收件人不占用每日额度
+        self._refund_quota(sender, server, success, len(tasks))
+        if success and refused:
+            self.rate_limiter.refund(sender, len(refused))
+        self._put_group_results(tasks, success, message, refused, code, transient)
+        return True
+    
+    async def _async_send_group(self, task, servers, executor):
+        """异步群发，见 _send_group（db 参数换为写入检查点的线程池 executor）"""
+        tasks = [task]
+        sender, server, size, error = self._acquire_group_sender(servers, AsyncEmailServer)
+        if sender is not None:
+            tasks += await self._async_take_group_tasks(size - 1)
+            delay = self._reserve_group(sender, tasks)
+            if delay is None:
+                sender = None
+        if sender is None:
+            self.throttle.release()
+            if self.quota_error:
+                # 额度已用完，这些行保持未发送
+                return False
+            for item in tasks:
+                self.result_queue.put((item, False, error, False))
+            return True
+        
+        # 按限速要求等待
+        await self._async_wait(delay)
+        if not self.is_running:
+            self.rate_limiter.refund(sender, len(tasks))
+            self.sender_pool.release(sender)
+            self.throttle.release()
+            return False
+        
+        await self._async_mark_sending(executor, tasks)
+        start_time = time.time()
+        refused, code, transient = {}, None, False
+        try:
+            success, message, refused = await server.send_group(
+                [item['email'] for item in tasks],
+                task['subject'],
+                task['content'],
+                skeleton=self.skeleton
+            )
+            code, transient = server.last_code, server.last_transient
+            for item in tasks:
+                item['server_response'] = server.last_response
+        except Exception as e:
+            success, message = False, str(e)
+        finally:
+            self.sender_pool.release(sender, time.time() - start_time)
+            self.throttle.release()
+        
+        # 没有交给服务器的邮件、被拒绝的收件人不占用每日额度
+        self._refund_quota(sender, server, success, len(tasks))
+        if success and refused:
+            self.rate_limiter.refund(sender, len(refused))
+        self._put_group_results(tasks, success, message, refused, code, transient)
+        return True
+    
+    def _produce_tasks(self):
+        """任务生产线程：按批读取收件人、渲染邮件并逐个放入任务队列
+        
+        收件人邮箱去除空白并统一为小写后发送。邮箱为空的行不发送，直接记为失败；
+        发送前检查决定跳过的行直接记为已跳过。
+        """
+        try:
+            # 模板只编译一次，每批收件人按列渲染
+            renderer = BatchRenderer(self.template, 'batch')
+            
+            start = 0
+            for frame in self.source.iter_chunks(self.RENDER_CHUNK_SIZE):
+                chunk_start = start
+                start += len(frame)
+                # 继续发送时整批都已处理过的行不再渲染
+                if self.skip_rows and all(position in self.skip_rows
+                                          for position in range(chunk_start, start)):
+                    continue
+                
+                titles, contents = renderer.render_chunk(frame)
+                emails = RecipientValidator.normalize(frame['收件人邮箱']).tolist()
+                names = frame['姓名'].tolist()
+                
+                for offset, (title, content) in enumerate(zip(titles, contents)):
+                    position = chunk_start + offset
+                    if position in self.skip_rows:
+                        continue
+                    
+                    task = {
+                        'row': position,
+                        'email': emails[offset],
+                        'name': names[offset],
+                        'subject': title,
+                        'content': content
+                    }
+                    if position in self.excluded_rows:
+                        task['skipped'] = True
+                        self.produced += 1
+                        self.result_queue.put((task, False, self.excluded_rows[position], False))
+                        continue
+                    if not task['email']:
+                        self.produced += 1
+                        self.result_queue.put((task, False, '收件人邮箱为空', False))
+                        continue
+                    
+                    if not self._put_task(task):
+                        return
+                    self.produced += 1
+            
+            self.expected_rows = start - sum(1 for row in self.skip_rows if row < start)
+            self.total_updated.emit(start)
+        except Exception as e:
+            self.producer_error = f"读取收件人失败: {str(e)}"
+            Logger().error(self.producer_error)
+    
+    def _send_worker(self, worker_id):
+        """邮件发送工作线程
+        
+        Args:
+            worker_id: 工作线程编号
+        """
+        # 本线程独占的邮件服务器连接，每个发件人一个
+        servers = {}
+        # 检查点通过本线程自己的数据库连接写入
+        db = Database()
+        try:
             while self.is_running:
-                try:
-                    index, row = self.task_queue.get_nowait()
-                except Empty:
+                task = self._next_task()
+                if task is None:
+                    break
+                
+                # 等待节流器分配并发名额
+                if not self.throttle.acquire(lambda: self.is_running):
+                    break
+                
+                if self.grouped:
+                    if not self._send_group(task, servers, db):
+                        break
+                    continue
+                
+                sender, delay = self._reserve_sender(task)
+                if sender is None:
+                    # 所有发件人都没有额度，批次暂停，该行保持未发送
+                    self.throttle.release()
+                    break
+                
+                # 按限速要求等待
+                self._wait(delay)
+                if not self.is_running:
+                    self.rate_limiter.refund(sender)
+                    self.sender_pool.release(sender)
+                    self.throttle.release()
                     break
                 
+                self._mark_sending(db, task)
+                start_time = time.time()
+                code, transient = None, False
+                server = None
                 try:
-                    # 替换变量
-                    content = self.template['content']
-                    title = self.template['title']
-                    data_dict = row.to_dict()
-                    
-                    for key, value in data_dict.items():
-                        placeholder = '{' + key + '}'
-                        title = title.replace(placeholder, str(value))
-                        content = content.replace(placeholder, str(value))
-                    
-                    # 发送邮件
-                    success, message = self.server.send_email(
-                        row['收件人邮箱'],
-                        title,
-                        content,
-                        self.attachments
-                    )
-                    
-                    # 发送进度信号
-                    status = '发送成功' if success else f'发送失败: {message}'
-                    self.progress_updated.emit(index + 1, status, message if not success else '')
+                    server = servers.get(sender['email'])
+                    if server is None:
+                        server = EmailServer(
+                            sender['email'],
+                            sender['password'],
+                            sender.get('server_type')
+                        )
+                        servers[sender['email']] = server
                     
-                    # 记录发送日志到数据库
-                    self.db.add_send_log(
-                        batch_id=self.batch_id,
-                        sender_email=self.sender['email'],
-                        recipient_email=row['收件人邮箱'],
-                        recipient_name=row['姓名'],
-                        subject=title,
-                        status=status,
-                        error_message=message if not success else None
+                    success, message = server.send_email(
+                        task['email'],
+                        task['subject'],
+                        task['content'],
+                        skeleton=self.skeleton
                     )
-                    
-                    # 记录结果
-                    self.result_queue.put((success, message))
-                    
-                    # 标记任务完成
-                    self.task_queue.task_done()
-                    
-                    # 添加短暂延时
-                    QThread.msleep(100)
-                    
+                    code, transient = server.last_code, server.last_transient
+                    task['server_response'] = server.last_response
                 except Exception as e:
-                    error_msg = str(e)
-                    self.progress_updated.emit(index + 1, f'发送失败: {error_msg}', error_msg)
+                    success, message = False, str(e)
+                finally:
+                    self.sender_pool.release(sender, time.time() - start_time)
+                    self.throttle.release()
+                
+                self._refund_quota(sender, server, success)
+                self.throttle.record(success, code)
+                self.result_queue.put((task, success, message, transient))
+                
+        except Exception as e:
+            Logger().error(f"发送线程 {worker_id} 异常: {str(e)}")
+        finally:
+            for server in servers.values():
+                try:
+                    server.close()
+                except:
+                    pass
+    
+    def _async_send_loop(self):
+        """异步发送线程：在独立的事件循环中运行所有异步连接"""
+        try:
+            asyncio.run(self._async_send_main())
+        except Exception as e:
+            Logger().error(f"异步发送线程异常: {str(e)}")
+    
+    async def _async_send_main(self):
+        """并发运行全部异步发送协程"""
+        # 检查点由单独的线程写入，数据库提交不阻塞事件循环中的其他连接；
+        # 发送结果经结果队列交给收集线程处理，与同步发送相同
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='checkpoint')
+        try:
+            await asyncio.gather(
+                *(self._async_send_worker(worker_id, executor) for worker_id in range(self.worker_count)),
+                return_exceptions=True
+            )
+        finally:
+            executor.shutdown(wait=True)
+    
+    async def _async_mark_sending(self, executor, tasks):
+        """在检查点线程中记录检查点，写入完成后才把邮件交给SMTP服务器
+        
+        Args:
+            executor: 写入检查点的线程池
+            tasks: 邮件任务列表
+        """
+        def mark():
+            for task in tasks:
+                self._mark_sending(self.db, task)
+        
+        await asyncio.get_running_loop().run_in_executor(executor, mark)
+    
+    async def _async_next_task(self):
+        """异步获取下一个任务，不阻塞事件循环
+        
+        Returns:
+            dict: 邮件任务，队列结束或停止发送时返回 None
+        """
+        while self.is_running:
+            try:
+                return self.task_queue.get_nowait()
+            except Empty:
+                await asyncio.sleep(0.05)
+        return None
+    
+    async def _async_send_worker(self, worker_id, executor):
+        """异步发送协程，持有一个独立的异步邮件服务器连接
+        
+        Args:
+            worker_id: 协程编号
+            executor: 写入检查点的线程池
+        """
+        # 本协程独占的异步连接，每个发件人一个
+        servers = {}
+        try:
+            while self.is_running:
+                task = await self._async_next_task()
+                if task is None:
+                    break
+                
+                # 等待节流器分配并发名额，不阻塞事件循环
+                while self.is_running and not self.throttle.try_acquire():
+                    await asyncio.sleep(0.05)
+                if not self.is_running:
+                    break
+                
+                if self.grouped:
+                    if not await self._async_send_group(task, servers, executor):
+                        break
+                    continue
+                
+                sender, delay = self._reserve_sender(task)
+                if sender is None:
+                    # 所有发件人都没有额度，批次暂停，该行保持未发送
+                    self.throttle.release()
+                    break
+                
+                # 按限速要求等待
+                await self._async_wait(delay)
+                if not self.is_running:
+                    self.rate_limiter.refund(sender)
+                    self.sender_pool.release(sender)
+                    self.throttle.release()
+                    break
+                
+                await self._async_mark_sending(executor, [task])
+                start_time = time.time()
+                code, transient = None, False
+                server = None
+                try:
+                    server = servers.get(sender['email'])
+                    if server is None:
+                        server = AsyncEmailServer(
+                            sender['email'],
+                            sender['password'],
+                            sender.get('server_type')
+                        )
+                        servers[sender['email']] = server
                     
-                    # 记录错误到数据库
-                    self.db.add_send_log(
-                        batch_id=self.batch_id,
-                        sender_email=self.sender['email'],
-                        recipient_email=row['收件人邮箱'],
-                        recipient_name=row['姓名'],
-                        subject=title,
-                        status='发送失败',
-                        error_message=error_msg
+                    success, message = await server.send_email(
+                        task['email'],
+                        task['subject'],
+                        task['content'],
+                        skeleton=self.skeleton
                     )
-                    
-                    self.result_queue.put((False, error_msg))
-                    self.task_queue.task_done()
-                    QThread.msleep(200)
-            
+                    code, transient = server.last_code, server.last_transient
+                    task['server_response'] = server.last_response
+                except Exception as e:
+                    success, message = False, str(e)
+                finally:
+                    self.sender_pool.release(sender, time.time() - start_time)
+                    self.throttle.release()
+                
+                self._refund_quota(sender, server, success)
+                self.throttle.record(success, code)
+                self.result_queue.put((task, success, message, transient))
+                
+        except Exception as e:
+            Logger().error(f"异步发送协程 {worker_id} 异常: {str(e)}")
         finally:
-            if self.server:
+            for server in servers.values():
                 try:
-                    self.server.close()
+                    await server.close()
                 except:
                     pass
     
+    def _collect_results(self, producer, workers):
+        """收集发送结果，按行顺序发出进度信号并记录日志
+        
+        发送线程并行完成的结果先缓存，等前面的行都完成后再依次处理，
+        保证进度信号和发送日志的顺序与收件人列表一致。重试结果不参与排序。
+        所有邮件都已生成、发送完毕且没有等待重试的任务后，通知发送线程结束。
+        
+        Args:
+            producer: 任务生产线程
+            workers: 发送线程列表
+        """
+        # 本批次中上次运行遗留、尚未完成的重试任务
+        try:
+            self.retry_waiting = self.db.count_retry_jobs(self.batch_id)
+        except Exception as e:
+            Logger().error(f"读取重试队列失败: {str(e)}")
+        
+        pending = {}
+        # 继续发送时跳过的行没有结果，排序时直接越过
+        next_row = self._next_result_row(0)
+        received = 0
+        dispatched = 0
+        retry_inflight = set()
+        last_stats = 0
+        last_retry_check = 0
+        while True:
+            # 定期发出节流状态，供主窗口显示实时发送速度
+            now = time.time()
+            if now - last_stats >= self.STATS_INTERVAL:
+                last_stats = now
+                self.stats_updated.emit(self.throttle.stats())
+            
+            # 将到期的重试任务放回任务队列
+            if self.is_running and now - last_retry_check >= self.RETRY_CHECK_INTERVAL:
+                last_retry_check = now
+                dispatched += self._dispatch_retries(retry_inflight)
+            
+            try:
+                task, success, message, transient = self.result_queue.get(timeout=0.1)
+            except Empty:
+                if not any(worker.is_alive() for worker in workers):
+                    break
+                if (self.is_running and not producer.is_alive() and received == self.produced + dispatched
+                        and not self.retry_waiting):
+                    break
+                continue
+            
+            received += 1
+            if 'retry_id' in task:
+                retry_inflight.discard(task['retry_id'])
+                self._handle_result(task, success, message, transient)
+                continue
+            
+            self.handled_rows += 1
+            pending[task['row']] = (task, success, message, transient)
+            while next_row in pending:
+                self._handle_result(*pending.pop(next_row))
+                next_row = self._next_result_row(next_row + 1)
+        
+        # 停止发送时可能存在空缺的行，剩余结果按行号顺序处理
+        for row in sorted(pending):
+            self._handle_result(*pending[row])
+        
+        # 通知发送线程结束，等待连接关闭
+        for _ in range(self.worker_count):
+            if not self._put_task(None):
+                break
+        for worker in workers:
+            worker.join(timeout=5)
+        self.stats_updated.emit(self.throttle.stats())
+    
+    def _next_result_row(self, row):
+        """从 row 开始第一个会产生发送结果的行（继续发送时跳过的行不产生结果）
+        
+        Args:
+            row: 起始行号
+            
+        Returns:
+            int: 行号
+        """
+        while row in self.skip_rows:
+            row += 1
+        return row
+    
+    def _dispatch_retries(self, inflight):
+        """将已到重试时间的任务放入任务队列
+        
+        Args:
+            inflight: 已放入队列、尚未返回结果的重试任务ID集合
+            
+        Returns:
+            int: 本次放入的任务数
+        """
+        if not self.retry_waiting:
+            return 0
+        
+        free = self.task_queue.maxsize - self.task_queue.qsize()
+        if free <= 0:
+            return 0
+        
+        try:
+            jobs = self.db.get_due_retry_jobs(self.batch_id, time.time(), inflight, free)
+        except Exception as e:
+            Logger().error(f"读取重试队列失败: {str(e)}")
+            return 0
+        
+        count = 0
+        for job in jobs:
+            job['attempts'] += 1
+            try:
+                self.task_queue.put_nowait(job)
+            except Full:
+                break
+            inflight.add(job['retry_id'])
+            count += 1
+        return count
+    
+    def _handle_result(self, task, success, message, transient):
+        """处理一次发送结果：临时性失败加入重试队列，其余记为最终结果
+        
+        Args:
+            task: 邮件任务
+            success: 是否发送成功
+            message: 发送结果消息
+            transient: 是否为临时性错误
+        """
+        attempts = task.get('attempts', 1)
+        if not success and self.retry_policy.should_retry(attempts, transient):
+            next_attempt = time.time() + self.retry_policy.delay(attempts)
+            try:
+                if 'retry_id' in task:
+                    self.db.update_retry_job(task['retry_id'], attempts, next_attempt, message)
+                else:
+                    self.db.add_retry_job(self.batch_id, task, self.attachments, attempts, next_attempt, message)
+                    self.retry_waiting += 1
+                self.db.set_batch_row_state(self.batch_id, task['row'], task['email'], ROW_RETRY)
+                status = f'等待重试（已尝试{attempts}次）: {message}'
+                self.progress_updated.emit(task['row'] + 1, self.completed, status, message)
+                return
+            except Exception as e:
+                Logger().error(f"加入重试队列失败: {str(e)}")
+        
+        if 'retry_id' in task:
+            try:
+                self.db.remove_retry_job(task['retry_id'])
+            except Exception as e:
+                Logger().error(f"删除重试任务失败: {str(e)}")
+            self.retry_waiting -= 1
+            if not success:
+                message = f'重试{attempts}次后仍失败: {message}'
+        
+        self._record_result(task, success, message)
+    
+    def _record_result(self, task, success, message):
+        """发出进度信号并记录发送日志"""
+        self.completed += 1
+        if task.get('skipped'):
+            status = f'已跳过: {message}'
+        else:
+            status = '发送成功' if success else f'发送失败: {message}'
+        self.progress_updated.emit(task['row'] + 1, self.completed, status, message if not success else '')
+        
+        if not success and not task.get('skipped') and not self.first_error:
+            self.first_error = message
+        
+        # 先更新检查点再记录发送日志到数据库
+        try:
+            self.db.set_batch_row_state(self.batch_id, task['row'], task['email'],
+                                        ROW_SENT if success else ROW_FAILED)
+            self.db.add_send_log(
+                batch_id=self.batch_id,
+                sender_email=task.get('sender_email', self.sender['email']),
+                recipient_email=task['email'],
+                recipient_name=task['name'],
+                subject=task['subject'],
+                status=status,
+                error_message=message if not success else None,
+                server_response=task.get('server_response') if success else None
+            )
+        except Exception as e:
+            Logger().error(f"记录发送日志失败: {str(e)}")
+    
     def get_batch_id(self):
         """获取当前批次ID"""
         return self.batch_id
 
+class SenderRotationDialog(QDialog):
+    """多发件人轮换设置对话框"""
+    def __init__(self, parent=None, config=None):
+        super().__init__(parent)
+        self.config = config or Config()
+        self.setWindowTitle('多发件人轮换')
+        self.setMinimumWidth(450)
+        self.initUI()
+        
+    def initUI(self):
+        layout = QVBoxLayout()
+        send_settings = self.config.get_send_settings()
+        selected = send_settings['rotation_senders']
+        weights = send_settings['sender_weights']
+        
+        # 发件人列表：勾选参与轮换的发件人并设置权重
+        self.sender_table = QTableWidget()
+        self.sender_table.setColumnCount(2)
+        self.sender_table.setHorizontalHeaderLabels(['发件人', '权重'])
+        self.sender_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.sender_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeToContents)
+        self.sender_table.verticalHeader().setVisible(False)
+        self.sender_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        
+        for sender in self.config.get_sender_list():
+            row = self.sender_table.rowCount()
+            self.sender_table.insertRow(row)
+            
+            email_item = QTableWidgetItem(sender['email'])
+            email_item.setFlags(Qt.ItemIsUserCheckable | Qt.ItemIsEnabled)
+            email_item.setCheckState(Qt.Checked if sender['email'] in selected else Qt.Unchecked)
+            self.sender_table.setItem(row, 0, email_item)
+            
+            weight_spin = QSpinBox()
+            weight_spin.setRange(1, 100)
+            weight_spin.setValue(int(weights.get(sender['email'], 1)))
+            self.sender_table.setCellWidget(row, 1, weight_spin)
+        
+        # 分配策略
+        strategy_layout = QHBoxLayout()
+        self.strategy_combo = QComboBox()
+        for key, label in SenderPool.STRATEGIES.items():
+            self.strategy_combo.addItem(label, key)
+        index = self.strategy_combo.findData(send_settings['rotation_strategy'])
+        if index >= 0:
+            self.strategy_combo.setCurrentIndex(index)
+        strategy_layout.addWidget(QLabel('分配策略:'))
+        strategy_layout.addWidget(self.strategy_combo, 1)
+        
+        tip_label = QLabel('提示: 权重仅在"按权重分配"策略下生效')
+        tip_label.setStyleSheet('color: #666666; font-size: 12px;')
+        
+        # 确认和取消按钮
+        dialog_buttons = QHBoxLayout()
+        confirm_btn = QPushButton('确定')
+        confirm_btn.clicked.connect(self.save_and_accept)
+        cancel_btn = QPushButton('取消')
+        cancel_btn.clicked.connect(self.reject)
+        dialog_buttons.addStretch()
+        dialog_buttons.addWidget(confirm_btn)
+        dialog_buttons.addWidget(cancel_btn)
+        
+        layout.addWidget(self.sender_table)
+        layout.addLayout(strategy_layout)
+        layout.addWidget(tip_label)
+        layout.addLayout(dialog_buttons)
+        self.setLayout(layout)
+        
+    def save_and_accept(self):
+        """保存轮换设置"""
+        selected = []
+        weights = {}
+        for row in range(self.sender_table.rowCount()):
+            email = self.sender_table.item(row, 0).text()
+            weights[email] = self.sender_table.cellWidget(row, 1).value()
+            if self.sender_table.item(row, 0).checkState() == Qt.Checked:
+                selected.append(email)
+        
+        if not selected:
+            MessageBox.show('提示', '请至少选择一个发件人', 'warning', parent=self)
+            return
+        
+        self.config.save_send_settings(
+            rotation_senders=selected,
+            rotation_strategy=self.strategy_combo.currentData(),
+            sender_weights=weights
+        )
+        self.accept()
+
 class AttachmentDialog(QDialog):
     """附件管理对话框"""
     def __init__(self, parent=None, attachments=None):
@@ -0,0 +1,274 @@
+import threading
+import time
+from datetime import date
+
+
+class TokenBucket:
+    """令牌桶
+
+    平均每秒产生 rate 个令牌，最多累积 burst 个。采用预约方式：
+    取令牌时立即扣减（可以为负），返回调用方需要等待的秒数，
+    因此线程和协程都可以用各自的方式等待。
+    """
+
+    def __init__(self, rate, burst):
+        """初始化令牌桶
+
+        Args:
+            rate: 每秒发送数量，0 表示不限速
+            burst: 允许的突发数量
+        """
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, factor=1.0):
+        """预约一个令牌
+
+        Args:
+            factor: 速率系数，自适应节流降速时小于 1
+
+        Returns:
+            float: 需要等待的秒数，0 表示可以立即发送
+        """
+        with self._lock:
+            if self.rate <= 0:
+                return 0.0
+            rate = self.rate * factor
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / rate
+
+
+class RateLimiter:
+    """按发件人限速
+
+    限速参数按 smtp_servers.server_type 配置（服务器配置 JSON 中的
+    rate_per_second、burst、daily_limit），每个发件人账号各自一个令牌桶
+    和每日计数。
+    """
+    # 各服务商的默认限制（保守取值，可在服务器管理中修改）
+    DEFAULT_LIMITS = {
+        'QQ邮箱': {'rate_per_second': 0.5, 'burst': 5, 'daily_limit': 500},
+        '163邮箱': {'rate_per_second': 0.5, 'burst': 5, 'daily_limit': 200},
+        '126邮箱': {'rate_per_second': 0.5, 'burst': 5, 'daily_limit': 200},
+    }
+    # 未配置的服务器默认每秒 10 封，不限每日数量
+    FALLBACK_LIMITS = {'rate_per_second': 10, 'burst': 10, 'daily_limit': 0}
+
+    def __init__(self, smtp_servers, sent_today=None):
+        """初始化限速器
+
+        Args:
+            smtp_servers: SMTP服务器配置 {server_type: config}
+            sent_today: 各发件人今天已发送的数量 {email: count}
+        """
+        self.smtp_servers = smtp_servers or {}
+        self._sent_today = dict(sent_today or {})
+        self._day = date.today()
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def get_limits(self, server_type):
+        """获取服务器类型的限速参数
+
+        Returns:
+            dict: 包含 rate_per_second、burst、daily_limit
+        """
+        limits = dict(self.DEFAULT_LIMITS.get(server_type, self.FALLBACK_LIMITS))
+        config = self.smtp_servers.get(server_type, {})
+        for key in limits:
+            if config.get(key) is not None:
+                limits[key] = config[key]
+        return limits
+
+    def _roll_day(self):
+        """跨天后清零每日计数（调用方需持有锁）"""
+        today = date.today()
+        if today != self._day:
+            self._day = today
+            self._sent_today = {}
+
+    def has_quota(self, sender):
+        """发件人今天是否还有发送额度"""
+        with self._lock:
+            self._roll_day()
+            daily_limit = self.get_limits(sender.get('server_type'))['daily_limit']
+            return not daily_limit or self._sent_today.get(sender['email'], 0) < daily_limit
+
+    def remaining(self, sender):
+        """发件人今天剩余的发送额度
+
+        Returns:
+            int: 剩余数量，不限制每日数量时返回 None
+        """
+        with self._lock:
+            self._roll_day()
+            daily_limit = self.get_limits(sender.get('server_type'))['daily_limit']
+            if not daily_limit:
+                return None
+            return max(0, daily_limit - self._sent_today.get(sender['email'], 0))
+
+    def reserve(self, sender, factor=1.0, count=1):
+        """为发件人预约一次发送
+
+        Args:
+            sender: 发件人信息
+            factor: 速率系数，见 TokenBucket.reserve
+            count: 本次发送的收件人数，群发时一封邮件按收件人数计入每日上限
+
+        Returns:
+            float: 需要等待的秒数；超过每日上限时返回 None
+        """
+        with self._lock:
+            self._roll_day()
+            limits = self.get_limits(sender.get('server_type'))
+            email = sender['email']
+            if limits['daily_limit'] and self._sent_today.get(email, 0) + count > limits['daily_limit']:
+                return None
+            self._sent_today[email] = self._sent_today.get(email, 0) + count
+
+            bucket = self._buckets.get(email)
+            if bucket is None:
+                bucket = TokenBucket(limits['rate_per_second'], limits['burst'])
+                self._buckets[email] = bucket
+        return bucket.reserve(factor)
+
+    def refund(self, sender, count=1):
+        """退还预约的每日额度（邮件没有交给服务器，如停止发送或连接失败）
+
+        Args:
+            sender: 发件人信息
+            count: 退还的收件人数
+        """
+        with self._lock:
+            self._roll_day()
+            email = sender['email']
+            self._sent_today[email] = max(0, self._sent_today.get(email, 0) - count)
+
+
+class AdaptiveThrottle:
+    """AIMD 自适应节流
+
+    服务器返回临时性错误（421/450/451/452）时，并发数和速率系数减半（乘性减少）；
+    连续成功一定次数后，并发数加一、速率系数增加一档（加性增加），
+    直到恢复为配置的上限。这样发送速度会稳定在服务器能接受的最大值附近。
+    """
+    # 表示服务器暂时拒绝、需要降速的响应码
+    TRANSIENT_CODES = (421, 450, 451, 452)
+    # 乘性减少系数
+    DECREASE_FACTOR = 0.5
+    # 每次恢复增加的速率系数
+    RATE_STEP = 0.1
+    # 速率系数下限
+    MIN_RATE_FACTOR = 0.05
+    # 连续成功多少次后恢复一档
+    RAMP_UP_SUCCESSES = 20
+    # 两次降速之间的最短间隔（秒），避免同一时刻的多个失败被重复计算
+    DECREASE_COOLDOWN = 2
+
+    def __init__(self, max_concurrency):
+        """初始化节流器
+
+        Args:
+            max_concurrency: 最大并发连接数
+        """
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.concurrency = self.max_concurrency
+        self.rate_factor = 1.0
+        self.active = 0
+        self.sent = 0
+        self.failed = 0
+        self.deferred = 0
+        self.start_time = time.time()
+        self._successes = 0
+        self._last_decrease = 0
+        self._cond = threading.Condition()
+
+    def try_acquire(self):
+        """尝试占用一个并发名额
+
+        Returns:
+            bool: 是否占用成功
+        """
+        with self._cond:
+            if self.active < self.concurrency:
+                self.active += 1
+                return True
+            return False
+
+    def acquire(self, is_running):
+        """等待并占用一个并发名额
+
+        Args:
+            is_running: 返回是否仍在发送的函数，停止发送时放弃等待
+
+        Returns:
+            bool: 是否占用成功
+        """
+        with self._cond:
+            while self.active >= self.concurrency:
+                if not is_running():
+                    return False
+                self._cond.wait(0.1)
+            self.active += 1
+            return True
+
+    def release(self):
+        """释放并发名额"""
+        with self._cond:
+            self.active = max(0, self.active - 1)
+            self._cond.notify_all()
+
+    def record(self, success, code=None):
+        """根据发送结果调整并发数和速率
+
+        Args:
+            success: 是否发送成功
+            code: SMTP响应码
+        """
+        with self._cond:
+            if success:
+                self.sent += 1
+            else:
+                self.failed += 1
+
+            if not success and code in self.TRANSIENT_CODES:
+                self.deferred += 1
+                self._successes = 0
+                now = time.time()
+                if now - self._last_decrease >= self.DECREASE_COOLDOWN:
+                    self._last_decrease = now
+                    self.concurrency = max(1, int(self.concurrency * self.DECREASE_FACTOR))
+                    self.rate_factor = max(self.MIN_RATE_FACTOR, self.rate_factor * self.DECREASE_FACTOR)
+            elif success:
+                self._successes += 1
+                if self._successes >= self.RAMP_UP_SUCCESSES:
+                    self._successes = 0
+                    self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+                    self.rate_factor = min(1.0, self.rate_factor + self.RATE_STEP)
+            self._cond.notify_all()
+
+    def stats(self):
+        """获取当前节流状态
+
+        Returns:
+            dict: 并发数、速率系数、成功/失败/延迟数量和平均速度（封/秒）
+        """
+        with self._cond:
+            elapsed = max(time.time() - self.start_time, 0.001)
+            return {
+                'concurrency': self.concurrency,
+                'max_concurrency': self.max_concurrency,
+                'rate_factor': self.rate_factor,
+                'sent': self.sent,
+                'failed': self.failed,
+                'deferred': self.deferred,
+                'throughput': (self.sent + self.failed) / elapsed
+            }
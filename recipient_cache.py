@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from batch_checkpoint import file_sha256
+from logger import Logger
+
+
+class RecipientCache:
+    """已解析收件人文件的缓存
+
+    收件人文件解析后按列式格式（Parquet）保存在 ~/.email_sender/recipient_cache/，
+    以文件内容的 SHA-256 为键。文件路径、大小和修改时间不变时直接使用记录的摘要，
+    不需要重新读取文件。缓存总大小超过上限时，删除最久未使用的文件。
+    缓存中所有值都已转换为文本（空值除外），渲染结果与直接读取原文件一致。
+    """
+    # 缓存总大小上限
+    MAX_CACHE_SIZE = 500 * 1024 * 1024
+
+    _lock = threading.Lock()
+
+    def __init__(self, cache_dir=None):
+        """初始化缓存目录
+
+        Args:
+            cache_dir: 缓存目录，默认 ~/.email_sender/recipient_cache
+        """
+        if cache_dir is None:
+            cache_dir = os.path.join(str(Path.home()), '.email_sender', 'recipient_cache')
+        self.cache_dir = cache_dir
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        self.index_file = os.path.join(self.cache_dir, 'index.json')
+
+    def _load_index(self):
+        """读取索引（调用方需持有锁）
+
+        Returns:
+            dict: {'files': {路径: {mtime, size, hash}}, 'entries': {摘要: {size, last_used}}}
+        """
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        index.setdefault('files', {})
+        index.setdefault('entries', {})
+        return index
+
+    def _save_index(self, index):
+        """写入索引（调用方需持有锁），先写临时文件再替换，避免写入中断损坏索引"""
+        temp_file = self.index_file + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(temp_file, self.index_file)
+
+    def _cache_path(self, file_hash):
+        return os.path.join(self.cache_dir, f'{file_hash}.parquet')
+
+    def file_hash(self, path):
+        """获取文件内容的 SHA-256
+
+        路径、大小和修改时间与上次记录一致时直接返回记录的摘要。
+
+        Args:
+            path: 文件路径
+
+        Returns:
+            str: 十六进制摘要
+        """
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        with self._lock:
+            record = self._load_index()['files'].get(key)
+        if record and record['mtime'] == stat.st_mtime_ns and record['size'] == stat.st_size:
+            return record['hash']
+
+        file_hash = file_sha256(path)
+        with self._lock:
+            index = self._load_index()
+            index['files'][key] = {'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'hash': file_hash}
+            self._save_index(index)
+        return file_hash
+
+    def get(self, file_hash):
+        """查找缓存
+
+        Args:
+            file_hash: 文件内容摘要
+
+        Returns:
+            str: 缓存文件路径，没有缓存时返回 None
+        """
+        cache_path = self._cache_path(file_hash)
+        with self._lock:
+            index = self._load_index()
+            entry = index['entries'].get(file_hash)
+            if entry is None or not os.path.exists(cache_path):
+                return None
+            entry['last_used'] = time.time()
+            self._save_index(index)
+        return cache_path
+
+    def build(self, source, file_hash):
+        """读取收件人数据源并写入缓存
+
+        Args:
+            source: 收件人数据源
+            file_hash: 原文件内容摘要
+
+        Returns:
+            str: 缓存文件路径，失败时返回 None
+        """
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            return None
+
+        cache_path = self._cache_path(file_hash)
+        temp_path = f'{cache_path}.{threading.get_ident()}.tmp'
+        columns = [str(column) for column in source.columns]
+        schema = pyarrow.schema([(column, pyarrow.string()) for column in columns])
+        try:
+            with pyarrow.parquet.ParquetWriter(temp_path, schema) as writer:
+                for frame in source.iter_chunks():
+                    frame = self._normalize(frame, columns)
+                    writer.write_table(pyarrow.Table.from_pandas(frame, schema=schema, preserve_index=False))
+            os.replace(temp_path, cache_path)
+        except Exception as e:
+            Logger().error(f"写入收件人缓存失败: {str(e)}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
+
+        with self._lock:
+            index = self._load_index()
+            index['entries'][file_hash] = {'size': os.path.getsize(cache_path), 'last_used': time.time()}
+            self._evict(index)
+            self._save_index(index)
+        return cache_path
+
+    def build_async(self, source, file_hash):
+        """在后台线程中写入缓存，不影响导入和发送"""
+        thread = threading.Thread(target=self.build, args=(source, file_hash))
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def _normalize(self, frame, columns):
+        """将一批收件人转换为文本列，空值保持为空"""
+        frame = frame.copy()
+        frame.columns = columns
+        for column in columns:
+            values = frame[column]
+            frame[column] = values.map(str).where(values.notna(), None)
+        return frame
+
+    def _evict(self, index):
+        """按最近使用时间删除缓存，直到总大小不超过上限（调用方需持有锁）"""
+        entries = index['entries']
+        total = sum(entry['size'] for entry in entries.values())
+        for file_hash in sorted(entries, key=lambda key: entries[key]['last_used']):
+            if total <= self.MAX_CACHE_SIZE:
+                break
+            total -= entries.pop(file_hash)['size']
+            try:
+                os.remove(self._cache_path(file_hash))
+            except OSError:
+                pass
@@ -0,0 +1,446 @@
+import os
+import codecs
+import chardet
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+# 收件人文件必须包含的列
+REQUIRED_COLUMNS = ('姓名', '收件人邮箱')
+
+
+class RecipientSource:
+    """收件人数据源
+
+    按批读取收件人表格，每批是一个 DataFrame。发送线程边读取边发送，
+    不需要一次性把整个文件读入内存。
+    """
+    # 每批读取的行数
+    CHUNK_SIZE = 1000
+
+    def __init__(self, path):
+        """初始化数据源
+
+        Args:
+            path: 文件路径
+        """
+        self.path = path
+        self._columns = None
+
+    @property
+    def columns(self):
+        """表头列名列表"""
+        if self._columns is None:
+            self._columns = self.read_columns()
+        return self._columns
+
+    def read_columns(self):
+        """读取表头
+
+        Returns:
+            list: 列名列表
+        """
+        raise NotImplementedError
+
+    def iter_chunks(self, chunk_size=None):
+        """按批读取收件人
+
+        Args:
+            chunk_size: 每批行数，默认 CHUNK_SIZE
+
+        Yields:
+            DataFrame: 一批收件人
+        """
+        raise NotImplementedError
+
+    def count(self):
+        """收件人行数（可能是根据文件信息得到的估计值）
+
+        Returns:
+            int: 行数，无法快速得到时返回 None
+        """
+        return None
+
+    def head(self, rows):
+        """读取前若干行，用于界面显示和模板预览
+
+        Args:
+            rows: 最多读取的行数
+
+        Returns:
+            DataFrame: 收件人
+        """
+        frames = []
+        remaining = rows
+        for frame in self.iter_chunks(min(rows, self.CHUNK_SIZE)):
+            frames.append(frame.iloc[:remaining])
+            remaining -= len(frames[-1])
+            if remaining <= 0:
+                break
+        if not frames:
+            return pd.DataFrame(columns=self.columns)
+        return pd.concat(frames, ignore_index=True)
+
+    def missing_columns(self):
+        """检查必需列
+
+        Returns:
+            list: 缺少的必需列
+        """
+        return [column for column in REQUIRED_COLUMNS if column not in self.columns]
+
+
+class DataFrameSource(RecipientSource):
+    """内存中的收件人表格"""
+
+    def __init__(self, df, path=None):
+        super().__init__(path)
+        self.df = df
+
+    def read_columns(self):
+        return list(self.df.columns)
+
+    def iter_chunks(self, chunk_size=None):
+        chunk_size = chunk_size or self.CHUNK_SIZE
+        for start in range(0, len(self.df), chunk_size):
+            yield self.df.iloc[start:start + chunk_size]
+
+    def count(self):
+        return len(self.df)
+
+
+class ExcelSource(RecipientSource):
+    """Excel 收件人文件
+
+    .xlsx 使用 openpyxl 只读模式逐行读取，内存占用与文件大小无关；
+    旧版 .xls 不支持流式读取，第一次读取时整体载入并缓存。
+    与 pd.read_excel 一致：读取第一个工作表，首行为表头，跳过全空的行。
+    pd.read_excel 按整列推断类型（如整数列中有空单元格时整列为浮点数，渲染为 1.0），
+    分批读取前先扫描一遍工作表确定各列类型，每批都按该类型转换，渲染结果与整体读取一致。
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._df = None
+        # 整个工作表各列的类型 {列位置: dtype}，object 表示不做类型转换
+        self._dtypes = None
+
+    def _load(self):
+        """整体读取（仅 .xls）"""
+        if self._df is None:
+            self._df = pd.read_excel(self.path)
+        return self._df
+
+    def _is_streaming(self):
+        return os.path.splitext(self.path)[1].lower() != '.xls'
+
+    def _open_sheet(self):
+        """以只读模式打开第一个工作表
+
+        Returns:
+            tuple: (工作簿, 工作表)
+        """
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(self.path, read_only=True, data_only=True)
+        return workbook, workbook.worksheets[0]
+
+    def _header(self, values):
+        """将表头单元格转换为列名，空表头与 pandas 一致命名为 Unnamed: n"""
+        return [f'Unnamed: {i}' if value is None else value for i, value in enumerate(values)]
+
+    def read_columns(self):
+        if not self._is_streaming():
+            return list(self._load().columns)
+
+        workbook, sheet = self._open_sheet()
+        try:
+            for values in sheet.iter_rows(values_only=True):
+                return self._header(values)
+            return []
+        finally:
+            workbook.close()
+
+    def iter_chunks(self, chunk_size=None):
+        chunk_size = chunk_size or self.CHUNK_SIZE
+        if not self._is_streaming():
+            yield from DataFrameSource(self._load()).iter_chunks(chunk_size)
+            return
+
+        dtypes = self._column_dtypes()
+        for header, chunk in self._iter_rows(chunk_size):
+            yield self._to_frame(chunk, header, dtypes)
+
+    def _iter_rows(self, chunk_size):
+        """按批读取工作表的原始单元格值
+
+        单元格值按 pd.read_excel 的方式转换：空单元格为空字符串，整数值的浮点数转换为整数。
+
+        Yields:
+            tuple: (列名列表, 行列表)
+        """
+        workbook, sheet = self._open_sheet()
+        try:
+            rows = sheet.iter_rows(values_only=True)
+            header = None
+            for values in rows:
+                header = self._header(values)
+                break
+            if header is None:
+                return
+
+            chunk = []
+            for values in rows:
+                # 跳过全空的行
+                if all(value is None for value in values):
+                    continue
+                values = [self._convert_cell(value) for value in values[:len(header)]]
+                values.extend([''] * (len(header) - len(values)))
+                chunk.append(values)
+                if len(chunk) >= chunk_size:
+                    yield header, chunk
+                    chunk = []
+            if chunk:
+                yield header, chunk
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _convert_cell(value):
+        """与 pd.read_excel 相同的单元格转换"""
+        if value is None:
+            return ''
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        return value
+
+    @staticmethod
+    def _parse(rows, dtype=None):
+        """用 pd.read_excel 使用的解析器把一批行转换为 DataFrame（列名为列位置）
+
+        Args:
+            rows: 行列表
+            dtype: 指定类型的列 {列位置: dtype}，其余列自动推断
+
+        Returns:
+            DataFrame: 空单元格为 NaN
+        """
+        names = list(range(len(rows[0])))
+        return TextParser(rows, names=names, header=None, dtype=dtype, skip_blank_lines=False).read()
+
+    def _column_dtypes(self):
+        """扫描整个工作表，得到与 pd.read_excel 整体读取相同的各列类型
+
+        每批单独推断后合并：数值列（布尔、整数、浮点数）取共同类型，有空单元格的整数、
+        布尔列为浮点数；日期列保持日期类型；其余情况不做类型转换，保留单元格原值。
+
+        Returns:
+            dict: {列位置: dtype}
+        """
+        if self._dtypes is not None:
+            return self._dtypes
+
+        # 各列在非全空批次中的类型，以及是否有空单元格
+        kinds = {}
+        missing = set()
+        for _, chunk in self._iter_rows(self.CHUNK_SIZE):
+            frame = self._parse(chunk)
+            for position in frame.columns:
+                column = frame[position]
+                if column.isna().any():
+                    missing.add(position)
+                if column.notna().any():
+                    kinds.setdefault(position, []).append(column.dtype)
+
+        dtypes = {}
+        for position, found in kinds.items():
+            if all(isinstance(dtype, np.dtype) and dtype.kind in 'biuf' for dtype in found):
+                dtype = np.result_type(*found)
+                if position in missing and dtype.kind in 'biu':
+                    dtype = np.dtype('float64')
+                dtypes[position] = dtype
+            elif all(isinstance(dtype, np.dtype) and dtype.kind == 'M' for dtype in found):
+                dtypes[position] = found[0]
+            else:
+                dtypes[position] = object
+        self._dtypes = dtypes
+        return dtypes
+
+    def _to_frame(self, rows, header, dtypes):
+        """将一批行转换为 DataFrame，各列按整个工作表的类型转换
+
+        Args:
+            rows: 行列表
+            header: 列名列表
+            dtypes: 各列类型，见 _column_dtypes
+        """
+        frame = self._parse(rows, {position: object for position, dtype in dtypes.items() if dtype is object})
+        for position, dtype in dtypes.items():
+            if dtype is not object and frame[position].dtype != dtype:
+                frame[position] = frame[position].astype(dtype)
+        frame.columns = header
+        return frame
+
+    def count(self):
+        if not self._is_streaming():
+            return len(self._load())
+        try:
+            workbook, sheet = self._open_sheet()
+            try:
+                # 只读模式下根据工作表的尺寸信息得到，不需要遍历整个文件
+                max_row = sheet.max_row
+            finally:
+                workbook.close()
+            return max(0, max_row - 1) if max_row else None
+        except Exception:
+            return None
+
+
+class CsvSource(RecipientSource):
+    """CSV/TSV 收件人文件
+
+    使用 pd.read_csv 分批读取，文件编码由 chardet 根据文件开头检测。
+    所有列按文本读取，变量值与文件中的内容完全一致（如保留手机号的前导 0）。
+    """
+    # 用于检测编码的字节数
+    DETECT_SIZE = 64 * 1024
+
+    def __init__(self, path, sep=None):
+        """初始化数据源
+
+        Args:
+            path: 文件路径
+            sep: 分隔符，默认 .tsv/.tab 为制表符，其余为逗号
+        """
+        super().__init__(path)
+        if sep is None:
+            sep = '\t' if os.path.splitext(path)[1].lower() in ('.tsv', '.tab') else ','
+        self.sep = sep
+        self._encoding = None
+
+    @property
+    def encoding(self):
+        """文件编码"""
+        if self._encoding is None:
+            self._encoding = self._detect_encoding()
+        return self._encoding
+
+    def _detect_encoding(self):
+        """检测文件编码"""
+        with open(self.path, 'rb') as f:
+            raw = f.read(self.DETECT_SIZE)
+        if raw.startswith(codecs.BOM_UTF8):
+            return 'utf-8-sig'
+        encoding = (chardet.detect(raw)['encoding'] or 'utf-8').lower()
+        if encoding == 'ascii':
+            # 开头都是 ASCII 时后面仍可能有中文，按 UTF-8 读取
+            return 'utf-8'
+        if encoding in ('gb2312', 'gbk'):
+            # GB18030 兼容 GB2312/GBK，避免生僻字解码失败
+            return 'gb18030'
+        return encoding
+
+    def _read_csv(self, **kwargs):
+        return pd.read_csv(self.path, sep=self.sep, encoding=self.encoding,
+                           encoding_errors='replace', dtype=str, **kwargs)
+
+    def read_columns(self):
+        return list(self._read_csv(nrows=0).columns)
+
+    def iter_chunks(self, chunk_size=None):
+        reader = self._read_csv(chunksize=chunk_size or self.CHUNK_SIZE)
+        with reader:
+            for frame in reader:
+                yield frame
+
+    def count(self):
+        # 按换行符估算行数（字段内换行会使结果偏大），发送结束后以实际行数为准
+        try:
+            lines = 0
+            last = b''
+            with open(self.path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    lines += block.count(b'\n')
+                    last = block
+            if last and not last.endswith(b'\n'):
+                lines += 1
+            return max(0, lines - 1)
+        except OSError:
+            return None
+
+
+class ArrowSource(RecipientSource):
+    """Parquet/Feather 收件人文件（需要安装 pyarrow）
+
+    按文件中的记录批次读取，每批再切分为 chunk_size 行，不需要整体载入内存。
+    """
+
+    def _pyarrow(self):
+        try:
+            import pyarrow
+            import pyarrow.ipc
+            import pyarrow.parquet
+            return pyarrow
+        except ImportError:
+            raise ValueError('读取 Parquet/Feather 文件需要安装 pyarrow')
+
+    def _is_parquet(self):
+        return os.path.splitext(self.path)[1].lower() in ('.parquet', '.pq')
+
+    def _record_batches(self):
+        """逐个读取记录批次"""
+        pa = self._pyarrow()
+        if self._is_parquet():
+            yield from pa.parquet.ParquetFile(self.path).iter_batches()
+            return
+        with pa.memory_map(self.path) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i)
+
+    def read_columns(self):
+        pa = self._pyarrow()
+        if self._is_parquet():
+            return list(pa.parquet.ParquetFile(self.path).schema_arrow.names)
+        with pa.memory_map(self.path) as source:
+            return list(pa.ipc.open_file(source).schema.names)
+
+    def iter_chunks(self, chunk_size=None):
+        chunk_size = chunk_size or self.CHUNK_SIZE
+        for batch in self._record_batches():
+            for start in range(0, batch.num_rows, chunk_size):
+                frame = batch.slice(start, chunk_size).to_pandas()
+                # 空值统一为 NaN，与读取 Excel/CSV 时一致
+                yield frame.where(frame.notna())
+
+    def count(self):
+        pa = self._pyarrow()
+        if self._is_parquet():
+            return pa.parquet.ParquetFile(self.path).metadata.num_rows
+        return sum(batch.num_rows for batch in self._record_batches())
+
+
+# 支持的收件人文件类型，用于文件选择对话框
+FILE_FILTER = '收件人文件 (*.xlsx *.xls *.csv *.tsv *.parquet *.feather);;所有文件 (*)'
+
+
+def open_source(path):
+    """根据文件扩展名创建收件人数据源
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        RecipientSource: 数据源
+
+    Raises:
+        ValueError: 不支持的文件类型
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.xlsx', '.xlsm', '.xls'):
+        return ExcelSource(path)
+    if ext in ('.csv', '.tsv', '.tab'):
+        return CsvSource(path)
+    if ext in ('.parquet', '.pq', '.feather', '.arrow'):
+        return ArrowSource(path)
+    raise ValueError(f'不支持的文件类型: {ext}')
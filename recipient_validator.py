@@ -0,0 +1,263 @@
+import difflib
+import numpy as np
+import pandas as pd
+
+# 检查结果（问题原因）
+ISSUE_BLANK = '收件人邮箱为空'
+ISSUE_INVALID = '邮箱格式错误'
+ISSUE_DUPLICATE = '重复的收件人'
+ISSUE_DISPOSABLE = '临时邮箱'
+ISSUE_TYPO = '域名可能拼写错误'
+
+# 发送前直接跳过的问题；临时邮箱和疑似拼写错误只提示，由用户决定是否跳过
+BLOCKING_ISSUES = (ISSUE_BLANK, ISSUE_INVALID, ISSUE_DUPLICATE)
+WARNING_ISSUES = (ISSUE_DISPOSABLE, ISSUE_TYPO)
+
+
+class RecipientValidator:
+    """收件人地址发送前检查
+
+    按列（向量化的 pandas 字符串操作）检查整批收件人：去除首尾空白并统一为小写、
+    检查邮箱格式、去除重复地址（跨批次保持已出现的地址），并离线识别临时邮箱域名
+    和常见邮箱域名的拼写错误。不连接任何服务器，每个问题地址都能少一次 SMTP 往返。
+    """
+    # 整个数据源检查时每批读取的行数
+    CHUNK_SIZE = 10000
+    # 邮箱格式（已转换为小写）：常用的本地部分字符，域名至少两段且顶级域名为字母
+    EMAIL_PATTERN = (r"^[a-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[a-z0-9!#$%&'*+/=?^_`{|}~-]+)*"
+                     r"@(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,63}$")
+    # 需要去除的空白字符：全角空格、不换行空格和零宽字符常见于从网页或文档中复制的地址
+    WHITESPACE_PATTERN = '[\\s\u00a0\u3000\u200b\u200c\u200d\ufeff]+'
+
+    # 常见邮箱服务商域名，用于识别拼写错误；这些域名本身不会被认为拼写错误
+    KNOWN_DOMAINS = frozenset((
+        'qq.com', 'vip.qq.com', 'foxmail.com', 'exmail.qq.com',
+        '163.com', '126.com', 'yeah.net', 'vip.163.com', 'vip.126.com', '188.com',
+        'sina.com', 'sina.cn', 'vip.sina.com', 'sohu.com', '139.com', '189.cn', 'wo.cn',
+        'aliyun.com', 'mxhichina.com',
+        'gmail.com', 'googlemail.com', 'outlook.com', 'hotmail.com', 'live.com', 'msn.com',
+        'yahoo.com', 'ymail.com', 'icloud.com', 'me.com', 'mac.com', 'aol.com',
+        'mail.com', 'email.com', 'gmx.com', 'gmx.net', 'proton.me', 'protonmail.com',
+        'zoho.com', 'yandex.com', 'yandex.ru', 'mail.ru',
+    ))
+    # 常见的顶级域名拼写错误
+    TLD_TYPOS = {
+        'con': 'com', 'cmo': 'com', 'ocm': 'com', 'vom': 'com', 'xom': 'com',
+        'comm': 'com', 'coom': 'com', 'cpm': 'com', 'cn.com': 'com', 'nte': 'net', 'ent': 'net',
+    }
+    # 与常见域名的相似度达到该值时认为是拼写错误；只与后缀（第一段之后的部分）完全相同的
+    # 常见域名比较，yahoo.com.tw、yandex.ua 等不同后缀的真实域名不会被认为拼写错误
+    TYPO_SIMILARITY = 0.85
+
+    # 常见临时邮箱（一次性邮箱）域名
+    DISPOSABLE_DOMAINS = frozenset((
+        'mailinator.com', 'guerrillamail.com', 'guerrillamail.net', 'guerrillamail.org',
+        'sharklasers.com', 'grr.la', '10minutemail.com', '10minutemail.net', '20minutemail.com',
+        'temp-mail.org', 'temp-mail.io', 'tempmail.com', 'tempmail.net', 'tempail.com',
+        'tempmailo.com', 'tempr.email', 'mytemp.email', 'throwawaymail.com', 'yopmail.com',
+        'yopmail.net', 'yopmail.fr', 'trashmail.com', 'trashmail.net', 'getnada.com',
+        'nada.email', 'dispostable.com', 'maildrop.cc', 'fakeinbox.com', 'mintemail.com',
+        'mohmal.com', 'emailondeck.com', 'spamgourmet.com', 'burnermail.io', 'moakt.com',
+        'mailnesia.com', 'mailcatch.com', 'discard.email', 'getairmail.com', 'inboxkitten.com',
+        'spambox.us', 'spam4.me', 'mailpoof.com', 'emailfake.com', 'fakemail.net',
+        'linshiyouxiang.net', 'bccto.me', 'chacuo.net', '027168.com', 'snapmail.cc',
+    ))
+
+    def __init__(self, disposable_domains=None):
+        """初始化检查器
+
+        Args:
+            disposable_domains: 额外的临时邮箱域名
+        """
+        self.disposable_domains = self.DISPOSABLE_DOMAINS | frozenset(
+            domain.strip().lower() for domain in (disposable_domains or ()))
+        # 已出现的地址，用于跨批次去重
+        self._seen = set()
+        # 各域名的拼写检查结果 {域名: 建议的域名或 None}
+        self._suggestions = {}
+        # 常见域名按后缀分组 {后缀: [域名]}
+        self._known_by_suffix = {}
+        for domain in self.KNOWN_DOMAINS:
+            self._known_by_suffix.setdefault(domain.partition('.')[2], []).append(domain)
+
+    @classmethod
+    def normalize(cls, emails):
+        """规范化邮箱地址：去除所有空白字符并统一为小写，空值转换为空字符串
+
+        Args:
+            emails: 邮箱地址 Series
+
+        Returns:
+            Series: 规范化后的地址
+        """
+        return (emails.where(emails.notna(), '').astype(str)
+                .str.replace(cls.WHITESPACE_PATTERN, '', regex=True)
+                .str.lower())
+
+    def suggest_domain(self, domain):
+        """检查域名是否为常见邮箱域名的拼写错误
+
+        Args:
+            domain: 小写域名
+
+        Returns:
+            str: 建议的正确域名，不像拼写错误时返回 None
+        """
+        if domain in self._suggestions:
+            return self._suggestions[domain]
+
+        suggestion = None
+        if domain not in self.KNOWN_DOMAINS:
+            name, _, suffix = domain.partition('.')
+            if suffix in self.TLD_TYPOS:
+                fixed = f'{name}.{self.TLD_TYPOS[suffix]}'
+                if fixed in self.KNOWN_DOMAINS:
+                    suggestion = fixed
+            if suggestion is None:
+                # 只在后缀相同的常见域名中查找相近的域名
+                candidates = self._known_by_suffix.get(suffix, ())
+                matches = difflib.get_close_matches(domain, candidates, 1, self.TYPO_SIMILARITY)
+                if matches:
+                    suggestion = matches[0]
+        self._suggestions[domain] = suggestion
+        return suggestion
+
+    def check(self, emails):
+        """检查一批收件人地址
+
+        重复地址中第一次出现的保留，其余记为重复；多次调用时与之前批次中的地址一起去重。
+
+        Args:
+            emails: 收件人邮箱 Series
+
+        Returns:
+            DataFrame: 与 emails 索引相同，包含 email（规范化后的地址）、
+                issue（问题原因，没有问题为 None）、suggestion（建议的域名）
+        """
+        normalized = self.normalize(emails)
+        issue = pd.Series(None, index=normalized.index, dtype=object)
+        suggestion = pd.Series(None, index=normalized.index, dtype=object)
+
+        blank = normalized == ''
+        invalid = ~blank & ~normalized.str.match(self.EMAIL_PATTERN)
+        valid = ~blank & ~invalid
+        # 之前批次的地址用集合逐个查找，避免每批都用全部已出现的地址重建哈希表
+        seen = self._seen
+        values = normalized.to_numpy(dtype=object)
+        earlier = np.fromiter((email in seen for email in values), dtype=bool, count=len(values))
+        duplicate = valid & (normalized.duplicated() | earlier)
+        issue[blank] = ISSUE_BLANK
+        issue[invalid] = ISSUE_INVALID
+        issue[duplicate] = ISSUE_DUPLICATE
+
+        # 域名检查只针对每个不同的域名计算一次
+        unique = valid & ~duplicate
+        if unique.any():
+            domains = normalized[unique].str.replace(r'^.*@', '', regex=True)
+            disposable = domains.isin(self.disposable_domains)
+            issue[disposable[disposable].index] = ISSUE_DISPOSABLE
+            suggestions = domains[~disposable].map(
+                {domain: self.suggest_domain(domain) for domain in domains[~disposable].unique()})
+            typo = suggestions[suggestions.notna()]
+            issue[typo.index] = ISSUE_TYPO
+            suggestion[typo.index] = typo
+
+        seen.update(values[unique.to_numpy()])
+        return pd.DataFrame({'email': normalized, 'issue': issue, 'suggestion': suggestion})
+
+
+class ValidationReport:
+    """收件人检查报告：各类问题的数量和有问题的行"""
+
+    def __init__(self):
+        self.total = 0
+        self.counts = {issue: 0 for issue in BLOCKING_ISSUES + WARNING_ISSUES}
+        # 有问题的行 {行号（从0开始）: (地址, 问题原因, 建议的域名)}
+        self.issues = {}
+
+    def add(self, result, start):
+        """加入一批检查结果
+
+        Args:
+            result: RecipientValidator.check 的返回值
+            start: 该批第一行的行号
+        """
+        self.total += len(result)
+        has_issue = result['issue'].notna().to_numpy()
+        flagged = result[has_issue]
+        positions = (np.flatnonzero(has_issue) + start).tolist()
+        for position, email, issue, suggestion in zip(positions, flagged['email'], flagged['issue'],
+                                                       flagged['suggestion']):
+            self.counts[issue] += 1
+            self.issues[position] = (email, issue, suggestion if isinstance(suggestion, str) else None)
+
+    @property
+    def blocking(self):
+        """必须跳过的地址数量"""
+        return sum(self.counts[issue] for issue in BLOCKING_ISSUES)
+
+    @property
+    def warnings(self):
+        """需要提示的地址数量"""
+        return sum(self.counts[issue] for issue in WARNING_ISSUES)
+
+    def skipped_rows(self, skip_warnings=False):
+        """需要跳过的行
+
+        Args:
+            skip_warnings: 是否同时跳过临时邮箱和疑似拼写错误的地址
+
+        Returns:
+            dict: {行号: 跳过原因}
+        """
+        issues = BLOCKING_ISSUES + WARNING_ISSUES if skip_warnings else BLOCKING_ISSUES
+        rows = {}
+        for position, (email, issue, suggestion) in self.issues.items():
+            if issue in issues:
+                rows[position] = f'{issue}（建议：{suggestion}）' if suggestion else issue
+        return rows
+
+    def summary(self, limit=10):
+        """生成检查结果说明
+
+        Args:
+            limit: 最多列出的问题地址数
+
+        Returns:
+            str: 说明文本
+        """
+        lines = [f'共 {self.total} 个收件人，{self.total - self.blocking - self.warnings} 个地址没有问题。']
+        for issue, count in self.counts.items():
+            if count:
+                lines.append(f'{issue}：{count} 个')
+        if self.issues:
+            lines.append('')
+            for position in sorted(self.issues)[:limit]:
+                email, issue, suggestion = self.issues[position]
+                detail = f'，建议：{suggestion}' if suggestion else ''
+                lines.append(f'第 {position + 1} 行 {email or "（空）"}：{issue}{detail}')
+            if len(self.issues) > limit:
+                lines.append(f'…… 其余 {len(self.issues) - limit} 个未列出')
+        return '\n'.join(lines)
+
+
+def validate_source(source, validator=None, progress=None):
+    """逐批检查收件人数据源中的全部地址
+
+    Args:
+        source: 收件人数据源（RecipientSource）
+        validator: 检查器，默认新建
+        progress: 进度回调，每检查完一批以已检查的行数调用
+
+    Returns:
+        ValidationReport: 检查报告
+    """
+    validator = validator or RecipientValidator()
+    report = ValidationReport()
+    start = 0
+    for frame in source.iter_chunks(validator.CHUNK_SIZE):
+        report.add(validator.check(frame['收件人邮箱']), start)
+        start += len(frame)
+        if progress:
+            progress(start)
+    return report
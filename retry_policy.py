@@ -0,0 +1,45 @@
+import random
+
+
+class RetryPolicy:
+    """临时性失败的重试策略
+
+    第 n 次失败后等待 base_delay * 2^(n-1) 秒（不超过 max_delay），
+    并在后一半区间内随机抖动，避免大量失败的邮件在同一时刻一起重试。
+    """
+
+    def __init__(self, max_attempts=5, base_delay=10, max_delay=300):
+        """初始化重试策略
+
+        Args:
+            max_attempts: 每封邮件最多尝试次数（含首次发送）
+            base_delay: 首次重试的基础等待秒数
+            max_delay: 最长等待秒数
+        """
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = max(0.0, float(base_delay))
+        self.max_delay = max(self.base_delay, float(max_delay))
+
+    def should_retry(self, attempts, transient):
+        """判断失败的邮件是否需要重试
+
+        Args:
+            attempts: 已尝试次数
+            transient: 是否为临时性错误（4xx、连接断开），5xx 等永久性错误不重试
+
+        Returns:
+            bool: 是否加入重试队列
+        """
+        return transient and attempts < self.max_attempts
+
+    def delay(self, attempts):
+        """计算下次重试前的等待秒数
+
+        Args:
+            attempts: 已尝试次数
+
+        Returns:
+            float: 等待秒数
+        """
+        delay = min(self.max_delay, self.base_delay * (2 ** max(0, attempts - 1)))
+        return delay / 2 + random.uniform(0, delay / 2)
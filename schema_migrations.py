@@ -0,0 +1,153 @@
+import json
+import time
+from logger import Logger
+
+# 数据库结构版本记录在 PRAGMA user_version 中。
+# 新版本只需在 MIGRATIONS 末尾追加迁移（版本号递增），已发布的迁移不要修改。
+# 每个迁移都必须可以重复执行（旧版本程序可能已经手工修改过表结构）。
+
+
+def _columns(cursor, table):
+    """获取表的列名"""
+    cursor.execute(f'PRAGMA table_info({table})')
+    return [column[1] for column in cursor.fetchall()]
+
+
+def add_column(cursor, table, column, definition):
+    """表中没有该列时添加
+
+    Args:
+        cursor: 数据库游标
+        table: 表名
+        column: 列名
+        definition: 列定义，如 TEXT
+    """
+    if column not in _columns(cursor, table):
+        cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+
+def _add_server_response(cursor):
+    """发送日志增加服务器响应列"""
+    add_column(cursor, 'send_logs', 'server_response', 'TEXT')
+
+
+def _add_log_indexes(cursor):
+    """日志查询使用的索引（按批次、时间范围和状态查找，按时间排序）"""
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_send_logs_batch_id ON send_logs (batch_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_send_logs_send_time ON send_logs (send_time)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_send_logs_status_time ON send_logs (status, send_time)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_system_logs_timestamp_level ON system_logs (timestamp, level)')
+
+
+def _add_batches(cursor):
+    """批次汇总表：发送过程中逐步累加各批次的成功、失败、跳过和重试数量
+
+    已有的发送日志按批次汇总一次，批次的模板、发件人和行数从检查点读取。
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS batches (
+            batch_id TEXT PRIMARY KEY,
+            template_name TEXT,
+            senders TEXT,
+            total_rows INTEGER,
+            success_count INTEGER NOT NULL DEFAULT 0,
+            failure_count INTEGER NOT NULL DEFAULT 0,
+            skipped_count INTEGER NOT NULL DEFAULT 0,
+            retry_count INTEGER NOT NULL DEFAULT 0,
+            status TEXT,
+            start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            end_time TIMESTAMP
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_batches_start_time ON batches (start_time)')
+
+    cursor.execute('''
+        INSERT OR IGNORE INTO batches
+            (batch_id, senders, total_rows, success_count, failure_count, skipped_count, start_time, end_time)
+        SELECT batch_id,
+               GROUP_CONCAT(DISTINCT sender_email),
+               COUNT(*),
+               SUM(status = '发送成功'),
+               SUM(status <> '发送成功' AND status NOT LIKE '已跳过%'),
+               SUM(status LIKE '已跳过%'),
+               MIN(send_time),
+               MAX(send_time)
+        FROM send_logs
+        GROUP BY batch_id
+    ''')
+
+    cursor.execute('SELECT batch_id, total_rows, definition, status, created_time FROM batch_checkpoints')
+    for batch_id, total_rows, definition, status, created_time in cursor.fetchall():
+        try:
+            definition = json.loads(definition)
+        except ValueError:
+            definition = {}
+        cursor.execute('INSERT OR IGNORE INTO batches (batch_id, start_time) VALUES (?, ?)',
+                       (batch_id, created_time))
+        cursor.execute('''
+            UPDATE batches SET template_name = ?, senders = ?, total_rows = ?, status = ?, start_time = ?
+            WHERE batch_id = ?
+        ''', (definition.get('template_name'), ','.join(definition.get('senders') or []) or None,
+              total_rows, status, created_time, batch_id))
+
+
+# 迁移列表 [(版本号, 说明, 迁移函数)]，按版本号递增
+MIGRATIONS = [
+    (1, '发送日志增加服务器响应列', _add_server_response),
+    (2, '日志表索引', _add_log_indexes),
+    (3, '批次汇总表', _add_batches),
+]
+
+# 当前程序对应的数据库结构版本
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_version(conn):
+    """获取数据库结构版本"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn):
+    """执行尚未执行的迁移
+
+    所有迁移在一个事务中执行，任何一个失败时全部回滚，数据库保持原来的版本。
+
+    Args:
+        conn: 数据库连接
+
+    Returns:
+        tuple: (原版本, 新版本)
+
+    Raises:
+        sqlite3.Error: 迁移失败
+    """
+    # 立即获取写锁，避免检查版本后被其他连接抢先修改
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        current = get_version(conn)
+        pending = [migration for migration in MIGRATIONS if migration[0] > current]
+        if not pending:
+            conn.rollback()
+            return current, current
+
+        start = time.perf_counter()
+        timings = []
+        cursor = conn.cursor()
+        for version, description, func in pending:
+            step_start = time.perf_counter()
+            func(cursor)
+            timings.append((version, description, time.perf_counter() - step_start))
+        # user_version 的修改与迁移在同一个事务中提交
+        conn.execute(f'PRAGMA user_version = {pending[-1][0]}')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    # 提交后再写日志：系统日志也写入数据库，不能混入迁移事务
+    logger = Logger()
+    for version, description, elapsed in timings:
+        logger.info(f"数据库迁移 {version}（{description}）耗时 {elapsed * 1000:.0f} ms")
+    logger.info(f"数据库结构已从版本 {current} 升级到 {pending[-1][0]}，"
+                f"耗时 {(time.perf_counter() - start) * 1000:.0f} ms")
+    return current, pending[-1][0]
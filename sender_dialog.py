@@ -274,6 +274,7 @@ class SenderDialog(QDialog):
                 
                 # 保存发件人信息
                 self.config.add_sender(data['email'], data['password'], data['server_type'], data['nickname'])
+                EmailServer.invalidate_sender_identity(data['email'])
                 self.load_senders()
                 self.sender_updated.emit()
                 MessageBox.show('成功', '发件人邮箱已添加', 'info', parent=self)
@@ -320,6 +321,9 @@ class SenderDialog(QDialog):
                 # 更新发件人信息
                 self.config.remove_sender(email)
                 self.config.add_sender(data['email'], data['password'], data['server_type'], data['nickname'])
+                # 正在使用该发件人的连接重新读取昵称
+                EmailServer.invalidate_sender_identity(email)
+                EmailServer.invalidate_sender_identity(data['email'])
                 self.load_senders()
                 self.sender_updated.emit()
                 MessageBox.show('成功', '发件人信息已更新', 'info', parent=self)
@@ -344,6 +348,7 @@ class SenderDialog(QDialog):
         
         if reply == 0:
             if self.config.remove_sender(email):
+                EmailServer.invalidate_sender_identity(email)
                 self.load_senders()
                 self.sender_updated.emit()
                 MessageBox.show('成功', '发件人已删除', 'info', parent=self)
@@ -0,0 +1,105 @@
+import threading
+
+
+class SenderPool:
+    """发件人池：按策略为每封邮件选择发件人
+
+    支持的策略：
+        round_robin: 轮流使用各发件人
+        weighted: 按权重平滑轮询，权重高的发件人分到更多邮件
+        least_loaded: 选择（进行中邮件数 + 1）× 近期平均耗时最小的发件人
+    """
+    STRATEGIES = {
+        'round_robin': '轮流发送',
+        'weighted': '按权重分配',
+        'least_loaded': '优先最快发件人'
+    }
+    # 近期耗时的指数平滑系数
+    LATENCY_ALPHA = 0.3
+
+    def __init__(self, senders, strategy='round_robin', weights=None):
+        """初始化发件人池
+
+        Args:
+            senders: 发件人信息列表，每项包含 email、password、server_type
+            strategy: 分配策略，见 STRATEGIES
+            weights: 发件人权重字典 {email: weight}，仅 weighted 策略使用
+        """
+        if not senders:
+            raise ValueError('至少需要一个发件人')
+
+        self.senders = list(senders)
+        self.strategy = strategy if strategy in self.STRATEGIES else 'round_robin'
+        weights = weights or {}
+        self._index = {sender['email']: i for i, sender in enumerate(self.senders)}
+        self._weights = [max(1, int(weights.get(sender['email'], 1))) for sender in self.senders]
+        self._current_weights = [0] * len(self.senders)
+        self._inflight = [0] * len(self.senders)
+        self._latency = [None] * len(self.senders)
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, available=None):
+        """为下一封邮件选择发件人
+
+        Args:
+            available: 可选的过滤函数，返回 False 的发件人本次不参与分配
+                （例如已达到每日发送上限）
+
+        Returns:
+            dict: 发件人信息，没有可用发件人时返回 None
+        """
+        with self._lock:
+            candidates = [i for i, sender in enumerate(self.senders)
+                          if available is None or available(sender)]
+            if not candidates:
+                return None
+            i = self._choose(candidates)
+            self._inflight[i] += 1
+            return self.senders[i]
+
+    def release(self, sender, elapsed=None):
+        """邮件发送结束后归还发件人
+
+        Args:
+            sender: acquire 返回的发件人信息
+            elapsed: 本次发送耗时（秒），用于更新近期平均耗时
+        """
+        with self._lock:
+            i = self._index[sender['email']]
+            self._inflight[i] = max(0, self._inflight[i] - 1)
+            if elapsed is not None:
+                if self._latency[i] is None:
+                    self._latency[i] = elapsed
+                else:
+                    self._latency[i] += self.LATENCY_ALPHA * (elapsed - self._latency[i])
+
+    def _choose(self, candidates):
+        """按策略从候选发件人中选择一个（调用方需持有锁）
+
+        Args:
+            candidates: 候选发件人下标列表
+
+        Returns:
+            int: 选中的发件人下标
+        """
+        count = len(self.senders)
+        if self.strategy == 'weighted':
+            # 平滑加权轮询：每轮累加权重，选中者减去总权重
+            total = sum(self._weights[i] for i in candidates)
+            for i in candidates:
+                self._current_weights[i] += self._weights[i]
+            best = max(candidates, key=lambda i: self._current_weights[i])
+            self._current_weights[best] -= total
+            return best
+
+        # 从上次选中的下一个开始排列候选者，保证分数相同时轮流选择
+        order = sorted(candidates, key=lambda i: (i - self._next) % count)
+        if self.strategy == 'least_loaded':
+            # 未发送过的发件人耗时按 0 计，优先试用
+            best = min(order, key=lambda i: ((self._inflight[i] + 1) * (self._latency[i] or 0),
+                                             self._inflight[i]))
+        else:
+            best = order[0]
+        self._next = (best + 1) % count
+        return best
@@ -1,11 +1,14 @@
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
-                            QLineEdit, QPushButton, QListWidget, QMessageBox, QCheckBox)
-from PyQt5.QtCore import Qt, pyqtSignal
+                            QLineEdit, QPushButton, QListWidget, QMessageBox, QCheckBox, QComboBox)
+from PyQt5.QtCore import Qt, pyqtSignal, QLocale
+from PyQt5.QtGui import QIntValidator, QDoubleValidator
 from message_box import MessageBox
 from styles import MODERN_STYLE
 from database import Database
 from config import Config
 from logger import Logger
+from email_utils import EmailServer
+from rate_limiter import RateLimiter
 
 class ServerDialog(QDialog):
     server_updated = pyqtSignal()
@@ -203,9 +206,12 @@ class ServerDialog(QDialog):
                         return
                     # 删除旧的服务器配置
                     self.db.remove_smtp_server(server_type)
+                    saved = self.db.add_smtp_server(data['server_type'], data['config'])
+                else:
+                    saved = self.db.update_smtp_server(server_type, data['config'])
                 
                 # 添加/更新服务器配置
-                if self.db.add_smtp_server(data['server_type'], data['config']):
+                if saved:
                     self.load_server_list()
                     self.server_updated.emit()
                     MessageBox.show('成功', '服务器已更新', 'info', parent=self)
@@ -249,11 +255,32 @@ class ServerDialog(QDialog):
                 pass
 
 class ServerInputDialog(QDialog):
+    # 可选的发送控制参数：(配置键, 标签, 类型或可选值, 提示)，留空表示使用默认值
+    OPTIONAL_FIELDS = [
+        ('max_messages_per_session', '每连接邮件数:', int,
+         f'默认{EmailServer.MAX_MESSAGES_PER_SESSION}，0表示不限制，达到后自动重新连接'),
+        ('rate_per_second', '发送速率:', float,
+         f"每个发件人每秒邮件数，默认{RateLimiter.FALLBACK_LIMITS['rate_per_second']}，0表示不限速"),
+        ('burst', '突发数量:', int,
+         f"允许连续快速发送的邮件数，默认{RateLimiter.FALLBACK_LIMITS['burst']}"),
+        ('daily_limit', '每日上限:', int,
+         '每个发件人每天最多发送的邮件数，0表示不限制'),
+        ('max_recipients', '每封收件人数:', int,
+         f'模板不含变量时一封邮件最多同时发给的收件人数，默认{EmailServer.MAX_RECIPIENTS}'),
+        ('verify_policy', '发送确认:', EmailServer.VERIFY_POLICIES,
+         'none：不额外确认（默认）；every：每隔若干封发送一次NOOP；idle：连接空闲后发送前先确认'),
+        ('verify_interval', '确认间隔:', int,
+         f"every 为邮件数（默认{EmailServer.DEFAULT_VERIFY_INTERVALS['every']}），"
+         f"idle 为空闲秒数（默认{EmailServer.DEFAULT_VERIFY_INTERVALS['idle']}）"),
+    ]
+
     def __init__(self, parent=None, server_type='', config=None, readonly_type=False):
         super().__init__(parent)
         self.setWindowTitle('SMTP服务器设置')
         self.setStyleSheet(MODERN_STYLE)
         self.setMinimumWidth(400)
+        # 保留原有配置，未在表单中编辑的字段（如 domains）保存时原样写回
+        self.config = dict(config or {})
         
         layout = QVBoxLayout()
         
@@ -283,6 +310,7 @@ class ServerInputDialog(QDialog):
         port_layout = QHBoxLayout()
         self.port_input = QLineEdit()
         self.port_input.setPlaceholderText('如：465')
+        self.port_input.setValidator(QIntValidator(0, 65535, self.port_input))
         port_layout.addWidget(QLabel('端口:'))
         port_layout.addWidget(self.port_input)
         
@@ -298,6 +326,31 @@ class ServerInputDialog(QDialog):
         ssl_tls_layout.addWidget(self.ssl_checkbox)
         ssl_tls_layout.addWidget(self.tls_checkbox)
         
+        # 发送控制参数
+        self.optional_inputs = {}
+        option_layouts = []
+        for key, label, value_type, tip in self.OPTIONAL_FIELDS:
+            option_layout = QHBoxLayout()
+            if isinstance(value_type, tuple):
+                # 固定的可选值用下拉框选择，第一项表示使用默认值
+                option_input = QComboBox()
+                option_input.addItem('默认', '')
+                for choice in value_type:
+                    option_input.addItem(choice, choice)
+                if config and config.get(key) in value_type:
+                    option_input.setCurrentIndex(option_input.findData(config[key]))
+            else:
+                option_input = QLineEdit()
+                option_input.setValidator(self._create_validator(value_type, option_input))
+                option_input.setPlaceholderText(tip)
+                if config and config.get(key) is not None:
+                    option_input.setText(str(config[key]))
+            option_input.setToolTip(tip)
+            option_layout.addWidget(QLabel(label))
+            option_layout.addWidget(option_input)
+            option_layouts.append(option_layout)
+            self.optional_inputs[key] = option_input
+        
         # 按钮
         btn_layout = QHBoxLayout()
         save_btn = QPushButton('保存')
@@ -320,10 +373,63 @@ class ServerInputDialog(QDialog):
         layout.addLayout(smtp_layout)
         layout.addLayout(port_layout)
         layout.addLayout(ssl_tls_layout)
+        for option_layout in option_layouts:
+            layout.addLayout(option_layout)
         layout.addLayout(btn_layout)
         
         self.setLayout(layout)
     
+    @staticmethod
+    def _create_validator(value_type, parent):
+        """数值字段的输入限制，只允许输入非负数
+        
+        Args:
+            value_type: 字段类型
+            parent: 所属输入框
+            
+        Returns:
+            QValidator: 输入限制，非数值字段返回 None
+        """
+        if value_type is int:
+            return QIntValidator(0, 2147483647, parent)
+        if value_type is float:
+            validator = QDoubleValidator(0.0, 1000000.0, 3, parent)
+            validator.setNotation(QDoubleValidator.StandardNotation)
+            # 固定使用小数点，与 float() 的解析方式一致
+            validator.setLocale(QLocale.c())
+            return validator
+        return None
+    
+    @staticmethod
+    def _parse_number(text, value_type, label):
+        """把输入转换为数值
+        
+        Args:
+            text: 输入内容
+            value_type: int 或 float
+            label: 字段名称，用于提示
+            
+        Returns:
+            int/float: 转换后的数值
+            
+        Raises:
+            ValueError: 输入不是有效的数值
+        """
+        try:
+            return value_type(text)
+        except ValueError:
+            kind = '整数' if value_type is int else '数字'
+            raise ValueError(f"{label.rstrip(':')}必须是{kind}：{text}")
+    
+    def accept(self):
+        """保存前检查数值字段，格式不正确时提示并保留对话框"""
+        try:
+            self.get_data()
+        except ValueError as e:
+            MessageBox.show('错误', str(e), 'warning', parent=self)
+            return
+        super().accept()
+    
     def on_ssl_changed(self, state):
         """当SSL选项改变时"""
         if state == Qt.Checked:
@@ -335,13 +441,36 @@ class ServerInputDialog(QDialog):
             self.ssl_checkbox.setChecked(False)
     
     def get_data(self):
-        """获取表单数据"""
+        """获取表单数据
+        
+        Returns:
+            dict: {'server_type': 服务器类型, 'config': 服务器配置}
+            
+        Raises:
+            ValueError: 数值字段格式不正确
+        """
+        config = dict(self.config)
+        config.update({
+            'smtp_server': self.smtp_input.text().strip(),
+            'smtp_port': self._parse_number(self.port_input.text().strip() or '0', int, '端口'),
+            'use_ssl': self.ssl_checkbox.isChecked(),
+            'use_tls': self.tls_checkbox.isChecked()
+        })
+        
+        for key, label, value_type, _ in self.OPTIONAL_FIELDS:
+            option_input = self.optional_inputs[key]
+            if isinstance(value_type, tuple):
+                value = option_input.currentData()
+            else:
+                value = option_input.text().strip()
+            if value and isinstance(value_type, tuple):
+                config[key] = value
+            elif value:
+                config[key] = self._parse_number(value, value_type, label)
+            else:
+                config.pop(key, None)
+        
         return {
             'server_type': self.type_input.text().strip(),
-            'config': {
-                'smtp_server': self.smtp_input.text().strip(),
-                'smtp_port': int(self.port_input.text().strip() or 0),
-                'use_ssl': self.ssl_checkbox.isChecked(),
-                'use_tls': self.tls_checkbox.isChecked()
-            }
+            'config': config
         } 
\ No newline at end of file
@@ -9,6 +9,7 @@ from message_box import MessageBox
 from styles import MODERN_STYLE  # 添加到导入部分
 from database import Database
 from config import Config
+from template_renderer import TemplateRenderer
 from email import message_from_file
 import email.policy
 from email.header import Header
@@ -684,17 +685,8 @@ class TemplateDialog(QDialog):
                     }
                     self.config.save_test_data(test_data)
                 
-                # 替换标题中的变量
-                title = template['title']
-                for key, value in test_data.items():
-                    placeholder = '{' + key + '}'
-                    title = title.replace(placeholder, str(value))
-                
-                # 替换内容中的变量
-                content = template['content']
-                for key, value in test_data.items():
-                    placeholder = '{' + key + '}'
-                    content = content.replace(placeholder, str(value))
+                # 替换标题和内容中的变量
+                title, content = TemplateRenderer.render(template, test_data, template_name)
                 
                 # 更新预览
                 self.preview_title.setText(title)
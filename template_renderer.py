@@ -0,0 +1,163 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+class CompiledTemplate:
+    """编译后的模板
+
+    模板中的 {变量名} 在编译时拆分为文本片段和变量名，渲染时一次拼接完成，
+    不再对整段 HTML 逐个变量调用 str.replace。
+    没有对应值的占位符（包括 CSS 中的大括号）原样保留。
+    """
+    # 占位符：大括号内不含大括号和换行
+    PLACEHOLDER_PATTERN = re.compile(r'\{([^{}\n]+)\}')
+
+    def __init__(self, text):
+        """编译模板
+
+        Args:
+            text: 模板文本
+        """
+        self.text = text or ''
+        # 偶数位置是文本片段，奇数位置是变量名
+        self.parts = self.PLACEHOLDER_PATTERN.split(self.text)
+        self.variables = self.parts[1::2]
+
+    def render(self, values):
+        """渲染模板
+
+        Args:
+            values: 变量值字典 {变量名: 值}
+
+        Returns:
+            str: 渲染结果
+        """
+        if not self.variables:
+            return self.text
+        parts = list(self.parts)
+        for i in range(1, len(parts), 2):
+            name = parts[i]
+            if name in values:
+                parts[i] = str(values[name])
+            else:
+                parts[i] = '{' + name + '}'
+        return ''.join(parts)
+
+
+class TemplateRenderer:
+    """模板渲染器
+
+    按模板名称和内容摘要缓存编译结果，模板内容修改后自动重新编译。
+    """
+    # 最多缓存的编译结果数
+    MAX_CACHE_SIZE = 64
+
+    _cache = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def compile(cls, name, text):
+        """获取编译后的模板，优先使用缓存
+
+        Args:
+            name: 缓存名称（模板名称和字段，如 "通知.title"）
+            text: 模板文本
+
+        Returns:
+            CompiledTemplate: 编译后的模板
+        """
+        text = text or ''
+        key = (name, hashlib.sha1(text.encode('utf-8')).hexdigest())
+        with cls._lock:
+            compiled = cls._cache.get(key)
+            if compiled is not None:
+                cls._cache.move_to_end(key)
+                return compiled
+
+        compiled = CompiledTemplate(text)
+        with cls._lock:
+            cls._cache[key] = compiled
+            while len(cls._cache) > cls.MAX_CACHE_SIZE:
+                cls._cache.popitem(last=False)
+        return compiled
+
+    @classmethod
+    def render(cls, template, values, name=''):
+        """渲染模板的标题和内容
+
+        Args:
+            template: 模板，包含 title、content
+            values: 变量值字典 {变量名: 值}
+            name: 模板名称，用于缓存
+
+        Returns:
+            tuple: (标题, 内容)
+        """
+        title = cls.compile(f'{name}.title', template['title']).render(values)
+        content = cls.compile(f'{name}.content', template['content']).render(values)
+        return title, content
+
+
+class BatchRenderer:
+    """按列批量渲染收件人表格
+
+    以 DataFrame 为单位渲染：标题（以及较短模板的内容）用整列字符串拼接一次完成，
+    较长的内容逐行拼接，避免为每行构造 Series（iterrows）的开销。
+    """
+    # 内容不超过该长度时按列拼接；更长的内容按列拼接会反复复制长字符串，改为逐行渲染
+    SHORT_TEMPLATE_SIZE = 2000
+
+    def __init__(self, template, name=''):
+        """编译模板
+
+        Args:
+            template: 模板，包含 title、content
+            name: 模板名称，用于缓存
+        """
+        self.title = TemplateRenderer.compile(f'{name}.title', template['title'])
+        self.content = TemplateRenderer.compile(f'{name}.content', template['content'])
+
+    def render_chunk(self, frame):
+        """渲染一批收件人
+
+        Args:
+            frame: 收件人 DataFrame
+
+        Returns:
+            tuple: (标题列表, 内容序列)，内容较长时为逐行生成的迭代器
+        """
+        titles = self._render_columns(self.title, frame)
+        if len(self.content.text) <= self.SHORT_TEMPLATE_SIZE:
+            contents = self._render_columns(self.content, frame)
+        else:
+            contents = self._render_rows(self.content, frame)
+        return titles, contents
+
+    def _column_values(self, compiled, frame):
+        """取出模板用到的列，转换为字符串数组 {变量名: 数组}"""
+        return {name: frame[name].map(str).to_numpy(dtype=object)
+                for name in set(compiled.variables) if name in frame.columns}
+
+    def _render_columns(self, compiled, frame):
+        """按列拼接渲染整批文本"""
+        if not compiled.variables:
+            return [compiled.text] * len(frame)
+
+        columns = self._column_values(compiled, frame)
+        # 从空字符串数组开始，逐段按列拼接（对象数组的加法逐元素拼接字符串）
+        result = np.full(len(frame), '', dtype=object)
+        for i, part in enumerate(compiled.parts):
+            if i % 2:
+                result = result + (columns[part] if part in columns else '{' + part + '}')
+            elif part:
+                result = result + part
+        return result.tolist()
+
+    def _render_rows(self, compiled, frame):
+        """逐行渲染，只取模板用到的列"""
+        columns = self._column_values(compiled, frame)
+        for i in range(len(frame)):
+            yield compiled.render({name: values[i] for name, values in columns.items()})
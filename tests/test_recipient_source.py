@@ -0,0 +1,54 @@
+import datetime
+import os
+import sys
+import tempfile
+import unittest
+
+import pandas as pd
+from openpyxl import Workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recipient_source import ExcelSource
+
+
+class ExcelChunkTypeTest(unittest.TestCase):
+    """分批读取 Excel：每批的渲染结果与 pd.read_excel 整体读取一致"""
+
+    # 每列的值跨越批次边界（每批 2 行），前一批的类型与整列不同
+    COLUMNS = {
+        '收件人邮箱': ['a@example.com', 'b@example.com', 'c@example.com', 'd@example.com', 'e@example.com'],
+        '姓名': ['甲', '乙', '丙', '丁', '戊'],
+        '金额': [1, 2, 3, 4.5, 5],
+        '编号': [1, 2, 3, None, 5],
+        '订阅': [True, False, True, None, False],
+        '代码': ['00123', '00456', '789', 'A1', '001'],
+        '备注': ['', '', 'NA', '已确认', None],
+        '日期': [datetime.datetime(2024, 1, 2), datetime.datetime(2024, 3, 4), None, None,
+               datetime.datetime(2024, 5, 6, 7, 8)],
+    }
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(handle)
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(list(self.COLUMNS))
+        for values in zip(*self.COLUMNS.values()):
+            sheet.append([value if value != '' else None for value in values])
+        workbook.save(self.path)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_chunks_render_like_read_excel(self):
+        expected = pd.read_excel(self.path).map(str)
+        chunks = list(ExcelSource(self.path).iter_chunks(2))
+        self.assertEqual(len(chunks), 3)
+        actual = pd.concat([chunk.map(str) for chunk in chunks], ignore_index=True)
+        for column in self.COLUMNS:
+            self.assertEqual(actual[column].tolist(), expected[column].tolist(), column)
+
+
+if __name__ == '__main__':
+    unittest.main()
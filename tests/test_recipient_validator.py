@@ -0,0 +1,41 @@
+import os
+import sys
+import unittest
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recipient_validator import RecipientValidator, ISSUE_TYPO
+
+
+class SuggestDomainTest(unittest.TestCase):
+    """域名拼写检查：不同后缀的真实域名不能被认为拼写错误"""
+
+    # 与常见域名相似但后缀不同的真实域名
+    REAL_DOMAINS = ('yahoo.com.tw', 'yahoo.com.hk', 'yandex.ua', 'vip.sina.cn', 'mail.ua')
+
+    def test_real_domains_with_other_suffix_are_not_typos(self):
+        validator = RecipientValidator()
+        for domain in self.REAL_DOMAINS:
+            self.assertIsNone(validator.suggest_domain(domain), domain)
+
+    def test_real_domains_are_not_flagged_by_check(self):
+        emails = pd.Series([f'user@{domain}' for domain in self.REAL_DOMAINS])
+        result = RecipientValidator().check(emails)
+        self.assertTrue(result['issue'].isna().all(), result)
+
+    def test_typos_with_same_suffix_are_suggested(self):
+        validator = RecipientValidator()
+        self.assertEqual(validator.suggest_domain('gmial.com'), 'gmail.com')
+        self.assertEqual(validator.suggest_domain('hotmial.com'), 'hotmail.com')
+        self.assertEqual(validator.suggest_domain('qq.con'), 'qq.com')
+
+    def test_check_reports_typo_suggestion(self):
+        result = RecipientValidator().check(pd.Series(['user@gmial.com']))
+        self.assertEqual(result['issue'][0], ISSUE_TYPO)
+        self.assertEqual(result['suggestion'][0], 'gmail.com')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import types
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 数据库和日志写入临时的用户目录，不影响本机的发送记录
+os.environ['HOME'] = tempfile.mkdtemp()
+os.environ['USERPROFILE'] = os.environ['HOME']
+
+# 单实例检查依赖 Windows API，发送线程用不到
+try:
+    import win32api  # noqa: F401
+except ImportError:
+    single_instance = types.ModuleType('single_instance')
+    single_instance.SingleInstance = object
+    sys.modules.setdefault('single_instance', single_instance)
+
+from mail_sender import EmailSender, SendEmailThread
+from batch_checkpoint import ROW_SENT, BATCH_STOPPED
+
+
+SENDER = {'email': 'sender@example.com', 'password': '', 'server_type': None}
+
+
+def make_recipients(count):
+    """生成测试用的收件人表格"""
+    return pd.DataFrame({
+        '收件人邮箱': [f'user{row}@example.com' for row in range(count)],
+        '姓名': [f'用户{row}' for row in range(count)],
+    })
+
+
+def make_task(row):
+    """生成与生产线程相同结构的邮件任务"""
+    return {'row': row, 'email': f'user{row}@example.com', 'name': f'用户{row}',
+            'subject': '标题', 'content': '内容'}
+
+
+def finished_thread():
+    """已经结束的线程，代替已读完全部收件人的生产线程"""
+    thread = threading.Thread(target=lambda: None)
+    thread.start()
+    thread.join()
+    return thread
+
+
+class ResumeResultOrderTest(unittest.TestCase):
+    """继续发送：跳过的行不能阻塞之后各行结果的处理"""
+
+    def test_results_after_skipped_rows_are_handled_during_the_run(self):
+        resume_states = {0: ('user0@example.com', ROW_SENT), 3: ('user3@example.com', ROW_SENT)}
+        thread = SendEmailThread(SENDER, {'title': '标题', 'content': '内容'}, make_recipients(6),
+                                 batch_id='BATCH_TEST_RESUME', resume_states=resume_states)
+        progress = {}
+        thread.progress_updated.connect(
+            lambda row, completed, status, error: progress.setdefault(row - 1, status))
+
+        # (行号, 是否成功, 消息, 是否临时性错误)，第 4 行临时失败需要加入重试队列
+        results = [(1, True, '', False), (2, True, '', False),
+                   (4, False, '451 try again later', True), (5, True, '', False)]
+        handled_in_time = []
+        retry_jobs = []
+
+        def worker():
+            for row, success, message, transient in results:
+                thread.result_queue.put((make_task(row), success, message, transient))
+                deadline = time.time() + 2
+                while row not in progress and time.time() < deadline:
+                    time.sleep(0.01)
+                handled_in_time.append(row in progress)
+                if row == 4:
+                    retry_jobs.append(thread.db.count_retry_jobs(thread.batch_id))
+
+        worker_thread = threading.Thread(target=worker)
+        worker_thread.start()
+        thread.produced = len(results)
+        thread._collect_results(finished_thread(), [worker_thread])
+
+        self.assertEqual(handled_in_time, [True] * len(results))
+        self.assertEqual(retry_jobs, [1])
+        self.assertTrue(progress[4].startswith('等待重试'), progress[4])
+
+
+class GroupedModeTest(unittest.TestCase):
+    """群发模式：只有引用收件人列的占位符才算个性化内容"""
+
+    def test_imported_html_styles_do_not_disable_grouping(self):
+        # 导入的 HTML 模板会加入样式表，其中的大括号不是变量
+        content = EmailSender._ensure_html_styles(mock.Mock(), '<p>活动通知</p>')
+        self.assertIn('{', content)
+        thread = SendEmailThread(SENDER, {'title': '活动通知', 'content': content}, make_recipients(3),
+                                 group_send=True)
+        self.assertTrue(thread.grouped)
+
+    def test_recipient_columns_disable_grouping(self):
+        content = EmailSender._ensure_html_styles(mock.Mock(), '<p>{姓名}，你好</p>')
+        thread = SendEmailThread(SENDER, {'title': '活动通知', 'content': content}, make_recipients(3),
+                                 group_send=True)
+        self.assertFalse(thread.grouped)
+
+
+class WorkerFailureTest(unittest.TestCase):
+    """发送线程全部异常退出时，批次不能记为已完成"""
+
+    def test_batch_stays_resumable_when_all_workers_die(self):
+        checkpoint = {'source_file': 'recipients.xlsx', 'template_name': '通知', 'senders': [SENDER['email']]}
+        thread = SendEmailThread(SENDER, {'title': '标题', 'content': '内容'}, make_recipients(3),
+                                 worker_count=2, checkpoint=checkpoint, batch_id='BATCH_TEST_WORKERS_DIED')
+        finished = []
+        thread.finished.connect(lambda success, message: finished.append((success, message)))
+
+        with mock.patch.object(SendEmailThread, '_send_worker', side_effect=RuntimeError('连接池已损坏')):
+            thread.run()
+
+        self.assertEqual(len(finished), 1)
+        self.assertFalse(finished[0][0])
+        batches = {batch['batch_id']: batch for batch in thread.db.get_unfinished_batches()}
+        self.assertEqual(batches[thread.batch_id]['status'], BATCH_STOPPED)
+
+
+if __name__ == '__main__':
+    unittest.main()